@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import re
 import uuid
-from typing import Dict, List
+from typing import Any, Dict, List
 
 from services.deepseek import DeepSeekClient, DeepSeekMessage
+from agents.deadline import stage_timeout
 from agents.types import Claim, FakeScopeState
 
 LANGUAGE_NAME = {"es": "Spanish", "en": "English"}
@@ -59,15 +61,19 @@ class ClaimExtractor:
             claims.append(Claim(identifier=identifier, text=snippet, language=language, entities=[]))
         return claims
 
-    async def run(self, state: FakeScopeState) -> Dict[str, List[Claim]]:
+    async def run(self, state: FakeScopeState) -> Dict[str, Any]:
         article = state.get("normalized_text", "")
         language = state.get("language", "es")
         if not article:
             return {"claims": []}
 
+        degraded: List[str] = []
         if self._client.enabled:
+            timeout = stage_timeout(state.get("deadline"), "claims")
             try:
-                claims = await self._call_deepseek(article, language)
+                claims = await asyncio.wait_for(self._call_deepseek(article, language), timeout=timeout)
+            except asyncio.TimeoutError:
+                claims, degraded = self._fallback_split(article, language), ["claims"]
             except Exception:
                 claims = self._fallback_split(article, language)
         else:
@@ -75,7 +81,7 @@ class ClaimExtractor:
 
         for claim in claims:
             claim.language = language
-        return {"claims": claims}
+        return {"claims": claims, "degraded": degraded}
 
 
 __all__ = ["ClaimExtractor"]
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional
+
+STAGES = ("intake", "claims", "planner", "retriever", "stance", "report")
+
+
+@dataclass
+class Deadline:
+    """End-to-end latency budget for one run, split into cumulative per-stage cut-offs.
+
+    Stage ``n`` must finish by the sum of the shares of stages ``0..n``, so time an early
+    stage leaves unused is available to the later ones and the last stage ends at the deadline.
+    """
+
+    seconds: float
+    started: float = field(default_factory=time.monotonic)
+    cutoffs: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def split(cls, seconds: float, shares: Mapping[str, float]) -> "Deadline":
+        deadline = cls(seconds=seconds)
+        total = sum(max(0.0, shares.get(stage, 0.0)) for stage in STAGES) or 1.0
+        spent = 0.0
+        for stage in STAGES:
+            spent += max(0.0, shares.get(stage, 0.0))
+            deadline.cutoffs[stage] = deadline.started + seconds * spent / total
+        return deadline
+
+    @property
+    def expires_at(self) -> float:
+        return self.started + self.seconds
+
+    def remaining(self, stage: str) -> float:
+        cutoff = self.cutoffs.get(stage, self.expires_at)
+        return max(0.0, cutoff - time.monotonic())
+
+
+def stage_timeout(deadline: Optional[Deadline], stage: str, cap: Optional[float] = None) -> Optional[float]:
+    """Seconds ``stage`` may still spend: its remaining budget, bounded by ``cap`` (either may be unset)."""
+
+    if deadline is None:
+        return cap
+    remaining = deadline.remaining(stage)
+    return remaining if cap is None else min(cap, remaining)
+
+
+__all__ = ["Deadline", "STAGES", "stage_timeout"]
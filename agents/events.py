@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator
+
+from langgraph.config import get_stream_writer
+
+from agents.types import PipelineEvent, PipelineEventKind
+
+
+def emit_event(event: PipelineEvent) -> None:
+    """Send ``event`` on the graph's custom stream; a no-op when not running inside the graph."""
+
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        return
+    writer(event)
+
+
+def events_from_update(node: str, update: Dict[str, Any] | None) -> Iterator[PipelineEvent]:
+    """Translate one node's state update into progress events, ending with a ``NODE`` marker.
+
+    Evidence is not derived here: the retriever emits it per claim while the node is running.
+    """
+
+    update = update or {}
+    if node == "claims" and "claims" in update:
+        yield PipelineEvent(PipelineEventKind.CLAIMS, node, data=update["claims"])
+    elif node == "planner" and "plan" in update:
+        yield PipelineEvent(PipelineEventKind.PLAN, node, data=update["plan"])
+    elif node == "stance":
+        for claim_id, assessments in update.get("stance_results", {}).items():
+            yield PipelineEvent(PipelineEventKind.STANCE, node, data=assessments, claim_id=claim_id)
+    elif node == "aggregate" and "verdict" in update:
+        yield PipelineEvent(PipelineEventKind.VERDICT, node, data=update["verdict"])
+    elif node == "report" and "report" in update:
+        yield PipelineEvent(PipelineEventKind.REPORT, node, data=update["report"])
+    yield PipelineEvent(PipelineEventKind.NODE, node)
+
+
+__all__ = ["emit_event", "events_from_update"]
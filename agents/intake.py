@@ -8,6 +8,7 @@ import httpx
 from bs4 import BeautifulSoup
 from loguru import logger
 
+from agents.deadline import stage_timeout
 from agents.types import FakeScopeState, VerificationTask
 
 
@@ -43,8 +44,12 @@ class IntakeAgent:
 
         load_task = task if isinstance(task, VerificationTask) else VerificationTask(**task)  # type: ignore[arg-type]
 
+        degraded = []
         try:
-            text = await self._load_text(load_task)
+            text = await asyncio.wait_for(self._load_text(load_task), timeout=stage_timeout(state.get("deadline"), "intake"))
+        except asyncio.TimeoutError:
+            logger.warning("Intake ran out of its time budget")
+            text, degraded = load_task.input_text or "", ["intake"]
         except Exception as exc:
             logger.exception("Failed to load input text: %s", exc)
             text = load_task.input_text or ""
@@ -53,6 +58,7 @@ class IntakeAgent:
         return {
             "normalized_text": text,
             "language": language,
+            "degraded": degraded,
         }
 
     def run_blocking(self, state: FakeScopeState) -> Dict[str, Any]:
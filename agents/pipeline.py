@@ -1,60 +1,126 @@
 ﻿from __future__ import annotations
 
 import asyncio
+import queue
+import threading
+import time
 from datetime import UTC, datetime
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, Iterator, List, Sequence, Tuple
 
 from langgraph.graph import END, START, StateGraph
+from langgraph.types import Send
 
 from agents.aggregate import VerdictAggregator
 from agents.claim_extractor import ClaimExtractor
+from agents.deadline import Deadline
+from agents.events import events_from_update
 from agents.intake import IntakeAgent
 from agents.query_planner import QueryPlanner
 from agents.report_writer import ReportWriter
 from agents.retrieval import EvidenceRetriever
 from agents.rerank import HybridReranker
 from agents.stance import StanceAnalyzer
-from agents.types import Claim, FakeScopeState, VerificationTask
+from agents.types import Claim, ClaimBranchOutput, Evidence, FakeScopeState, PipelineEvent, PipelineEventKind, VerificationTask
+from config.settings import PipelineConfig, get_settings
+from services.deepseek import DeepSeekClient
+from services.microbatch import MicroBatcher
 
 
 class FakeScopePipeline:
-    def __init__(self) -> None:
+    def __init__(self, deepseek: DeepSeekClient | None = None, config: PipelineConfig | None = None) -> None:
+        self._config = config or get_settings().pipeline
+        # One DeepSeek client (and therefore one connection pool) shared by every LLM-backed agent.
+        self.deepseek = deepseek or DeepSeekClient()
         self.intake = IntakeAgent()
-        self.claim_extractor = ClaimExtractor()
-        self.query_planner = QueryPlanner()
+        self.claim_extractor = ClaimExtractor(client=self.deepseek)
+        self.query_planner = QueryPlanner(client=self.deepseek)
         self.retriever = EvidenceRetriever()
         self.reranker = HybridReranker()
+        # Branches rerank separately; claims arriving together share BM25 statistics and one encode.
+        self._rerank_batcher: MicroBatcher[Tuple[Claim, List[Evidence]], List[Evidence]] = MicroBatcher(
+            self._rerank_batch, window=get_settings().retrieval.rerank_batch_window_ms / 1000
+        )
         self.stance_analyzer = StanceAnalyzer()
         self.aggregator = VerdictAggregator()
-        self.report_writer = ReportWriter()
+        self.report_writer = ReportWriter(client=self.deepseek)
+
+        # Batched planning needs every claim in one prompt, so it stays an article-level step.
+        self._plan_per_claim = self.query_planner.mode != "batched"
 
         builder = StateGraph(FakeScopeState)
         builder.add_node("intake", self.intake.run)
         builder.add_node("claims", self.claim_extractor.run)
-        builder.add_node("planner", self.query_planner.run)
-        builder.add_node("retriever", self.retriever.run)
-        builder.add_node("rerank", self._rerank_node)
-        builder.add_node("stance", self.stance_analyzer.run)
+        builder.add_node("claim", self._build_claim_branch())
         builder.add_node("aggregate", self.aggregator.run)
         builder.add_node("report", self.report_writer.run)
 
         builder.add_edge(START, "intake")
         builder.add_edge("intake", "claims")
-        builder.add_edge("claims", "planner")
-        builder.add_edge("planner", "retriever")
-        builder.add_edge("retriever", "rerank")
-        builder.add_edge("rerank", "stance")
-        builder.add_edge("stance", "aggregate")
+        if self._plan_per_claim:
+            builder.add_conditional_edges("claims", self._fan_out, ["claim", "aggregate"])
+        else:
+            builder.add_node("planner", self.query_planner.run)
+            builder.add_edge("claims", "planner")
+            builder.add_conditional_edges("planner", self._fan_out, ["claim", "aggregate"])
+        builder.add_edge("claim", "aggregate")
         builder.add_edge("aggregate", "report")
         builder.add_edge("report", END)
 
         self.graph = builder.compile()
 
+    def _build_claim_branch(self) -> Any:
+        """Subgraph one claim runs through on its own: plan → retrieve → rerank → stance.
+
+        The agents see a state holding just that claim, so a slow search only delays its own
+        claim; branches join at ``aggregate``. Rerank and stance batch work from branches that
+        reach them at about the same time.
+        """
+
+        branch = StateGraph(FakeScopeState, output_schema=ClaimBranchOutput)
+        branch.add_node("retriever", self.retriever.run)
+        branch.add_node("rerank", self._rerank_node)
+        branch.add_node("stance", self.stance_analyzer.run)
+        if self._plan_per_claim:
+            branch.add_node("planner", self.query_planner.run)
+            branch.add_edge(START, "planner")
+            branch.add_edge("planner", "retriever")
+        else:
+            branch.add_edge(START, "retriever")
+        branch.add_edge("retriever", "rerank")
+        branch.add_edge("rerank", "stance")
+        branch.add_edge("stance", END)
+        return branch.compile()
+
+    @staticmethod
+    def _fan_out(state: FakeScopeState) -> List[Send] | str:
+        claims = state.get("claims", [])
+        if not claims:
+            return "aggregate"
+        plan = state.get("plan", {})
+        shared = {key: state[key] for key in ("task", "language", "normalized_text", "deadline") if key in state}
+        sends = []
+        for claim in claims:
+            branch: FakeScopeState = {**shared, "claims": [claim]}
+            if claim.identifier in plan:
+                branch["plan"] = {claim.identifier: plan[claim.identifier]}
+            sends.append(Send("claim", branch))
+        return sends
+
+    async def _rerank_batch(self, items: Sequence[Tuple[Claim, List[Evidence]]]) -> List[List[Evidence]]:
+        claims = [claim for claim, _ in items]
+        candidates = {claim.identifier: evidences for claim, evidences in items}
+        # dense reranking encodes on CPU/GPU; keep it off the event loop
+        reranked = await asyncio.to_thread(self.reranker.rerank_many, claims, candidates)
+        return [reranked[claim.identifier] for claim in claims]
+
     async def _rerank_node(self, state: FakeScopeState) -> Dict[str, Any]:
         claims: List[Claim] = []
         evidences = state.get("evidences", {})
-        for claim in state.get("claims", []):
-            ranked = self.reranker.rerank(claim, evidences.get(claim.identifier, claim.evidences))
+        state_claims = state.get("claims", [])
+        reranked = await self._rerank_batcher.submit(
+            [(claim, list(evidences.get(claim.identifier, claim.evidences))) for claim in state_claims]
+        )
+        for claim, ranked in zip(state_claims, reranked):
             claims.append(
                 Claim(
                     identifier=claim.identifier,
@@ -71,20 +137,122 @@ class FakeScopePipeline:
             evidences[claim.identifier] = ranked
         return {"claims": claims, "evidences": evidences}
 
-    async def ainvoke(self, task: VerificationTask, feedback: bool | None = None) -> Dict[str, Any]:
+    def _initial_state(self, task: VerificationTask, deadline: float | None = None) -> FakeScopeState:
         state: FakeScopeState = {
             "task": task,
             "run_metadata": {
                 "started_at": datetime.now(UTC).isoformat(),
             },
         }
-        result = await self.graph.ainvoke(state)
+        seconds = deadline if deadline is not None else self._config.deadline_seconds
+        if seconds is not None:
+            state["deadline"] = Deadline.split(seconds, self._config.stage_budgets)
+            state["run_metadata"]["deadline_seconds"] = seconds
+        return state
+
+    async def ainvoke(
+        self, task: VerificationTask, feedback: bool | None = None, deadline: float | None = None
+    ) -> Dict[str, Any]:
+        """Run the whole graph and return its final state.
+
+        ``deadline`` (seconds, defaulting to ``[pipeline] deadline_seconds``) bounds the run:
+        each stage gets a cumulative share of it, and a stage that runs out cancels its
+        outstanding calls and continues with a fallback or the partial results it has.
+        Those stages are listed under ``degraded`` in the result.
+        """
+
+        result = await self.graph.ainvoke(self._initial_state(task, deadline))
         if feedback is not None:
             result["user_feedback"] = feedback
         return result
 
-    def invoke(self, task: VerificationTask, feedback: bool | None = None) -> Dict[str, Any]:
-        return asyncio.run(self.ainvoke(task, feedback=feedback))
+    def invoke(
+        self, task: VerificationTask, feedback: bool | None = None, deadline: float | None = None
+    ) -> Dict[str, Any]:
+        async def run() -> Dict[str, Any]:
+            try:
+                return await self.ainvoke(task, feedback=feedback, deadline=deadline)
+            finally:
+                await self._close_connections()
+
+        return asyncio.run(run())
+
+    async def astream(
+        self, task: VerificationTask, feedback: bool | None = None, deadline: float | None = None
+    ) -> AsyncIterator[PipelineEvent]:
+        """Run the graph and yield progress events as nodes finish.
+
+        Node updates become typed events (claims, plan, stance per claim, verdict, report),
+        the retriever pushes evidence per claim on the custom stream while it runs, and the
+        last event is ``DONE`` carrying the same final state ``ainvoke`` returns.
+        """
+
+        started = time.perf_counter()
+        result: Dict[str, Any] = {}
+        stream = self.graph.astream(self._initial_state(task, deadline), stream_mode=["updates", "values", "custom"], subgraphs=True)
+        # subgraphs=True surfaces the per-claim branch nodes (planner, retriever, rerank, stance) as they finish.
+        async for namespace, mode, chunk in stream:
+            if mode == "values":
+                if not namespace:
+                    result = chunk
+                continue
+            if mode == "custom":
+                events = [chunk]
+            else:
+                events = [event for node, update in chunk.items() for event in events_from_update(node, update)]
+            for event in events:
+                if isinstance(event, PipelineEvent):
+                    event.elapsed = time.perf_counter() - started
+                    yield event
+        if feedback is not None:
+            result["user_feedback"] = feedback
+        yield PipelineEvent(PipelineEventKind.DONE, "end", data=result, elapsed=time.perf_counter() - started)
+
+    def stream(
+        self, task: VerificationTask, feedback: bool | None = None, deadline: float | None = None
+    ) -> Iterator[PipelineEvent]:
+        """Blocking iterator over :meth:`astream` for synchronous callers such as Streamlit.
+
+        The graph runs on its own event loop in a helper thread; events are handed over
+        through a queue as they are produced.
+        """
+
+        events: "queue.Queue[Any]" = queue.Queue()
+        finished = object()
+
+        async def consume() -> None:
+            try:
+                async for event in self.astream(task, feedback=feedback, deadline=deadline):
+                    events.put(event)
+            finally:
+                await self._close_connections()
+
+        def run() -> None:
+            try:
+                asyncio.run(consume())
+            except BaseException as exc:
+                events.put(exc)
+            finally:
+                events.put(finished)
+
+        worker = threading.Thread(target=run, name="fakescope-stream", daemon=True)
+        worker.start()
+        while (item := events.get()) is not finished:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+        worker.join()
+
+    async def _close_connections(self) -> None:
+        """Close the HTTP pools of the running loop before a sync entry point's loop ends."""
+
+        await self.deepseek.aclose()
+        await self.retriever.close_connections()
+
+    async def aclose(self) -> None:
+        await self.deepseek.aclose()
+        await self.retriever.aclose()
+        self.stance_analyzer.close()
 
 
 __all__ = ["FakeScopePipeline"]
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 import json
 from dataclasses import replace
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Sequence
 
+from loguru import logger
+
+from agents.deadline import stage_timeout
 from agents.types import Claim, FakeScopeState
+from config.settings import PlannerConfig, get_settings
 from services.deepseek import DeepSeekClient, DeepSeekMessage
 
 QUERY_PLANNER_PROMPT = """
@@ -12,10 +17,31 @@ Given a factual claim, propose up to five concise web search queries that would
 Return JSON with a `queries` list containing strings ordered by usefulness.
 """
 
+BATCH_QUERY_PLANNER_PROMPT = """
+For each factual claim below, propose up to five concise web search queries that would help verify it.
+Return JSON with a `plans` object mapping every claim `id` to a list of query strings ordered by usefulness.
+Use the ids exactly as given and include every claim.
+"""
+
 
 class QueryPlanner:
-    def __init__(self, client: DeepSeekClient | None = None) -> None:
+    def __init__(self, client: DeepSeekClient | None = None, config: PlannerConfig | None = None) -> None:
         self._client = client or DeepSeekClient()
+        self._config = config or get_settings().planner
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def mode(self) -> str:
+        return self._config.mode
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Shared by every run on the loop: per-claim branches each plan one claim concurrently.
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(max(1, self._config.max_concurrency))
+            self._slots_loop = loop
+        return self._slots
 
     async def _plan(self, claim: Claim) -> List[str]:
         messages = [
@@ -30,6 +56,37 @@ class QueryPlanner:
         queries = data.get("queries", [])
         return [str(q).strip() for q in queries if str(q).strip()]
 
+    async def _plan_batch(self, claims: Sequence[Claim]) -> Dict[str, List[str]]:
+        payload = [
+            {"id": claim.identifier, "claim": claim.text, "entities": claim.entities or []}
+            for claim in claims
+        ]
+        messages = [
+            DeepSeekMessage(role="system", content="You create fact-checking search queries."),
+            DeepSeekMessage(
+                role="user",
+                content=f"{BATCH_QUERY_PLANNER_PROMPT}\n\nCLAIMS:\n{json.dumps(payload, ensure_ascii=False)}",
+            ),
+        ]
+        response = await self._client.chat(messages, response_format={"type": "json_object"})
+        data = json.loads(response.content)
+        return self._parse_batch(data, {claim.identifier for claim in claims})
+
+    def _parse_batch(self, data: Any, expected: set[str]) -> Dict[str, List[str]]:
+        plans = data.get("plans", {}) if isinstance(data, dict) else {}
+        if isinstance(plans, list):  # tolerate [{"id": ..., "queries": [...]}]
+            plans = {str(entry.get("id")): entry.get("queries", []) for entry in plans if isinstance(entry, dict)}
+        parsed: Dict[str, List[str]] = {}
+        if not isinstance(plans, dict):
+            return parsed
+        for claim_id, queries in plans.items():
+            if str(claim_id) not in expected or not isinstance(queries, list):
+                continue
+            cleaned = [str(q).strip() for q in queries if str(q).strip()]
+            if cleaned:
+                parsed[str(claim_id)] = cleaned
+        return parsed
+
     def _fallback(self, claim: Claim) -> List[str]:
         base = claim.text[:180]
         queries = [base]
@@ -39,21 +96,61 @@ class QueryPlanner:
             queries.append("verify " + base.split(" ")[0] + " facts")
         return list(dict.fromkeys(q for q in queries if q))
 
-    async def run(self, state: FakeScopeState) -> Dict[str, List[str] | List[Claim]]:
+    async def _plan_or_fallback(self, claim: Claim, semaphore: asyncio.Semaphore) -> List[str]:
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(self._plan(claim), timeout=self._config.timeout_seconds)
+            except Exception as exc:
+                logger.debug("Query planning failed for claim '%s': %s", claim.identifier, exc)
+                return self._fallback(claim)
+
+    async def _plan_batch_or_fallback(self, claims: Sequence[Claim], semaphore: asyncio.Semaphore) -> List[List[str]]:
+        planned: Dict[str, List[str]] = {}
+        # A batched prompt answers for every claim in it, so it gets each claim's planning time.
+        timeout = self._config.timeout_seconds
+        if timeout is not None:
+            timeout *= len(claims)
+        async with semaphore:
+            try:
+                planned = await asyncio.wait_for(self._plan_batch(claims), timeout=timeout)
+            except Exception as exc:
+                logger.debug("Batched query planning failed for %s claims: %s", len(claims), exc)
+        # Claims the batch dropped or garbled are planned individually (outside the batch slot).
+        missing = [claim for claim in claims if claim.identifier not in planned]
+        retried = await asyncio.gather(*(self._plan_or_fallback(claim, semaphore) for claim in missing))
+        planned.update({claim.identifier: queries for claim, queries in zip(missing, retried)})
+        return [planned[claim.identifier] for claim in claims]
+
+    async def _plan_all(self, claims: List[Claim]) -> List[List[str]]:
+        semaphore = self._semaphore()
+        # gather keeps results aligned with the claim order regardless of completion order
+        if self._config.mode == "batched" and len(claims) > 1:
+            size = max(1, self._config.batch_size)
+            batches = [claims[start : start + size] for start in range(0, len(claims), size)]
+            results = await asyncio.gather(*(self._plan_batch_or_fallback(batch, semaphore) for batch in batches))
+            return [queries for batch_result in results for queries in batch_result]
+        return list(await asyncio.gather(*(self._plan_or_fallback(claim, semaphore) for claim in claims)))
+
+    async def run(self, state: FakeScopeState) -> Dict[str, Any]:
         claims = state.get("claims", [])
+        degraded: List[str] = []
+        if self._client.enabled:
+            try:
+                # Out of budget: outstanding prompts are cancelled and every claim gets the fallback plan.
+                planned = await asyncio.wait_for(
+                    self._plan_all(list(claims)), timeout=stage_timeout(state.get("deadline"), "planner")
+                )
+            except asyncio.TimeoutError:
+                planned, degraded = [self._fallback(claim) for claim in claims], ["planner"]
+        else:
+            planned = [self._fallback(claim) for claim in claims]
+
         plan: Dict[str, List[str]] = {}
         updated_claims: List[Claim] = []
-        for claim in claims:
-            if self._client.enabled:
-                try:
-                    queries = await self._plan(claim)
-                except Exception:
-                    queries = self._fallback(claim)
-            else:
-                queries = self._fallback(claim)
+        for claim, queries in zip(claims, planned):
             plan[claim.identifier] = queries
             updated_claims.append(replace(claim, queries=queries))
-        return {"plan": plan, "claims": updated_claims}
+        return {"plan": plan, "claims": updated_claims, "degraded": degraded}
 
 
 __all__ = ["QueryPlanner"]
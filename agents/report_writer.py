@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import Dict, List
+from typing import Any, Dict, List
 
-from agents.types import Claim, FakeScopeState, StanceLabel, Verdict
+from agents.deadline import stage_timeout
+from agents.events import emit_event
+from agents.types import Claim, FakeScopeState, PipelineEvent, PipelineEventKind, StanceLabel, Verdict
 from services.deepseek import DeepSeekClient, DeepSeekMessage
 
 REPORT_PROMPT = {
@@ -63,8 +66,13 @@ class ReportWriter:
                 + json.dumps({"verdict": verdict.label.value, "confidence": verdict.confidence, "claims": claims_payload}),
             ),
         ]
-        response = await self._client.chat(messages)
-        return response.content
+        # Streamed so the CLI/UI can render the report while the model is still writing it.
+        parts: List[str] = []
+        async for delta in self._client.chat_stream(messages):
+            if delta.content:
+                parts.append(delta.content)
+                emit_event(PipelineEvent(PipelineEventKind.REPORT_DELTA, "report", data=delta.content))
+        return "".join(parts).strip()
 
     def _fallback(self, claims: List[Claim], verdict: Verdict, language: str) -> str:
         headings = HEADINGS.get(language, HEADINGS["es"])
@@ -85,18 +93,22 @@ class ReportWriter:
                     lines.append(f"    - [{evidence.title}]({evidence.url})")
         return "\n".join(lines)
 
-    async def run(self, state: FakeScopeState) -> Dict[str, str]:
+    async def run(self, state: FakeScopeState) -> Dict[str, Any]:
         claims = state.get("claims", [])
         verdict = state.get("verdict") or Verdict(label=StanceLabel.UNKNOWN, confidence=0.0)
         language = state.get("language", "es")
+        degraded: List[str] = []
         if self._client.enabled:
+            timeout = stage_timeout(state.get("deadline"), "report")
             try:
-                report = await self._llm_report(claims, verdict, language)
+                report = await asyncio.wait_for(self._llm_report(claims, verdict, language), timeout=timeout)
+            except asyncio.TimeoutError:
+                report, degraded = self._fallback(claims, verdict, language), ["report"]
             except Exception:
                 report = self._fallback(claims, verdict, language)
         else:
             report = self._fallback(claims, verdict, language)
-        return {"report": report}
+        return {"report": report, "degraded": degraded}
 
 
 __all__ = ["ReportWriter"]
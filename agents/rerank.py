@@ -1,41 +1,154 @@
 from __future__ import annotations
 
 import math
-from typing import Iterable, List
+import re
+from typing import Dict, Iterable, List, Mapping, Sequence
+
+import numpy as np
+from loguru import logger
+from scipy import sparse
 
 from agents.types import Claim, Evidence
+from config.settings import RetrievalConfig, get_settings
+from rag.embeddings import EmbeddingService, get_embedding_service
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def reciprocal_rank_fusion(*scores: np.ndarray, k: int = 60) -> np.ndarray:
+    """Fuse score vectors by rank: ``sum(1 / (k + rank))`` with 1-based ranks."""
+
+    fused = np.zeros(len(scores[0]))
+    for values in scores:
+        ranks = np.empty(len(values), dtype=np.int64)
+        ranks[np.argsort(-values, kind="stable")] = np.arange(1, len(values) + 1)
+        fused += 1.0 / (k + ranks)
+    return fused
 
 
 class HybridReranker:
-    """Simple hybrid reranker placeholder combining lexical and score cues."""
+    """Hybrid reranker combining Okapi BM25, provider relevance scores and dense similarity.
+
+    BM25 statistics (document frequencies, average length) are built once over every
+    candidate snippet of a claim batch, and all claims are scored against all snippets with a
+    single sparse matrix product. With ``dense_rerank`` enabled, claims and snippets are also
+    embedded in one batched call and the two rankings are merged with reciprocal-rank fusion.
+    """
 
-    def __init__(self, top_k: int = 5) -> None:
+    def __init__(
+        self,
+        top_k: int = 5,
+        config: RetrievalConfig | None = None,
+        score_weight: float = 0.5,
+        embeddings: EmbeddingService | None = None,
+    ) -> None:
         self._top_k = top_k
+        self._config = config or get_settings().retrieval
+        self._score_weight = score_weight
+        self._embeddings = embeddings
+
+    def _embedding_service(self) -> EmbeddingService | None:
+        if self._embeddings is None and self._config.dense_rerank:
+            self._embeddings = get_embedding_service(self._config.embedding_model)
+        return self._embeddings
+
+    def _dense_scores(self, queries: Sequence[str], documents: Sequence[str]) -> np.ndarray | None:
+        service = self._embedding_service()
+        if service is None or not queries or not documents:
+            return None
+        try:
+            vectors = service.encode([*queries, *documents])
+        except Exception as exc:
+            logger.warning("Dense reranking disabled for this batch: %s", exc)
+            return None
+        # rows are normalised, so the dot product is the cosine similarity
+        return vectors[: len(queries)] @ vectors[len(queries) :].T
 
-    def _bm25_like(self, query: str, text: str) -> float:
-        query_terms = query.lower().split()
-        doc_terms = text.lower().split()
-        if not doc_terms:
-            return 0.0
-        score = 0.0
-        for term in query_terms:
-            tf = doc_terms.count(term)
-            if tf == 0:
+    def _bm25_scores(self, queries: Sequence[str], documents: Sequence[str]) -> np.ndarray:
+        """Return a dense ``(len(queries), len(documents))`` BM25 score matrix."""
+
+        vocabulary: Dict[str, int] = {}
+        rows: List[int] = []
+        cols: List[int] = []
+        for doc_idx, text in enumerate(documents):
+            for term in tokenize(text):
+                rows.append(doc_idx)
+                cols.append(vocabulary.setdefault(term, len(vocabulary)))
+        n_docs = len(documents)
+        if not vocabulary:
+            return np.zeros((len(queries), n_docs))
+
+        # duplicate (row, col) entries are summed, giving raw term frequencies
+        tf = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n_docs, len(vocabulary)))
+        tf.sum_duplicates()
+        doc_len = np.asarray(tf.sum(axis=1)).ravel()
+        avg_len = doc_len.mean() or 1.0
+        df = np.bincount(tf.indices, minlength=len(vocabulary))
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+        k1, b = self._config.bm25_k, self._config.bm25_b
+        row_of_entry = np.repeat(np.arange(n_docs), np.diff(tf.indptr))
+        norm = k1 * (1.0 - b + b * doc_len[row_of_entry] / avg_len)
+        weights = tf.copy()
+        weights.data = idf[tf.indices] * tf.data * (k1 + 1.0) / (tf.data + norm)
+
+        q_rows: List[int] = []
+        q_cols: List[int] = []
+        for query_idx, query in enumerate(queries):
+            for term in tokenize(query):
+                col = vocabulary.get(term)
+                if col is not None:
+                    q_rows.append(query_idx)
+                    q_cols.append(col)
+        query_matrix = sparse.csr_matrix(
+            (np.ones(len(q_rows)), (q_rows, q_cols)), shape=(len(queries), len(vocabulary))
+        )
+        return np.asarray((query_matrix @ weights.T).todense())
+
+    def _combine(self, lexical: np.ndarray, evidences: Sequence[Evidence]) -> np.ndarray:
+        peak = lexical.max() if lexical.size else 0.0
+        normalized = lexical / peak if peak > 0 else lexical
+        provider = np.array(
+            [min(max(ev.score, 0.0), 1.0) if ev.score is not None and math.isfinite(ev.score) else 0.0 for ev in evidences]
+        )
+        return normalized + self._score_weight * provider
+
+    def rerank_many(self, claims: Sequence[Claim], candidates: Mapping[str, Iterable[Evidence]]) -> Dict[str, List[Evidence]]:
+        """Rerank each claim's candidates; BM25 statistics span the whole batch."""
+
+        per_claim = {claim.identifier: list(candidates.get(claim.identifier, claim.evidences)) for claim in claims}
+        documents: List[Evidence] = []
+        positions: Dict[int, int] = {}
+        for evidences in per_claim.values():
+            for evidence in evidences:
+                if id(evidence) not in positions:
+                    positions[id(evidence)] = len(documents)
+                    documents.append(evidence)
+
+        queries = [claim.text for claim in claims]
+        snippets = [ev.snippet for ev in documents]
+        scores = self._bm25_scores(queries, snippets)
+        dense = self._dense_scores(queries, snippets) if self._config.dense_rerank else None
+        ranked: Dict[str, List[Evidence]] = {}
+        for row, claim in enumerate(claims):
+            evidences = per_claim[claim.identifier]
+            if not evidences:
+                ranked[claim.identifier] = []
                 continue
-            score += math.log(1 + tf)
-        return score
+            columns = [positions[id(ev)] for ev in evidences]
+            hybrid = self._combine(scores[row, columns], evidences)
+            if dense is not None:
+                hybrid = reciprocal_rank_fusion(hybrid, dense[row, columns], k=self._config.rrf_k)
+            order = np.argsort(-hybrid, kind="stable")[: self._top_k]
+            ranked[claim.identifier] = [evidences[idx] for idx in order]
+        return ranked
 
     def rerank(self, claim: Claim, evidences: Iterable[Evidence]) -> List[Evidence]:
-        scored: List[tuple[float, Evidence]] = []
-        query = claim.text
-        for evidence in evidences:
-            lexical = self._bm25_like(query, evidence.snippet)
-            hybrid_score = lexical
-            if evidence.score is not None:
-                hybrid_score += evidence.score
-            scored.append((hybrid_score, evidence))
-        scored.sort(key=lambda item: item[0], reverse=True)
-        return [ev for _, ev in scored[: self._top_k]]
-
-
-__all__ = ["HybridReranker"]
+        return self.rerank_many([claim], {claim.identifier: evidences})[claim.identifier]
+
+
+__all__ = ["HybridReranker", "reciprocal_rank_fusion", "tokenize"]
@@ -1,14 +1,28 @@
 from __future__ import annotations
 
 import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import replace
-from typing import Dict, Iterable, List
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, TypeVar
 
 import httpx
 from loguru import logger
 
-from agents.types import Claim, Evidence, FakeScopeState
-from config.settings import RetrievalConfig, get_settings
+from agents.deadline import Deadline, stage_timeout
+from agents.events import emit_event
+from agents.types import Claim, Evidence, FakeScopeState, PipelineEvent, PipelineEventKind
+from config.settings import RetrievalConfig, StorageConfig, get_settings
+from rag.evidence_index import EvidenceIndex
+from rag.local_index import get_local_index
+from services.circuit_breaker import BreakerRegistry, get_breakers
+from services.http import PooledAsyncClient
+from services.latency import LatencyTracker
+from services.ratelimit import RateLimiter, get_rate_limiter
+from services.search_cache import Freshness, SearchCache, get_search_cache
+from services.stub_search import StubSearchProvider
+from services.wikipedia import WikipediaClient
 
 try:  # optional tavily import
     from tavily import TavilyClient
@@ -20,45 +34,157 @@ try:  # optional duckduckgo import
 except Exception:  # pragma: no cover
     DDGS = None  # type: ignore
 
+T = TypeVar("T")
+# Providers answered from local data gain nothing from the result cache.
+UNCACHED_PROVIDERS = {"local"}
+SearchFactory = Callable[[], Awaitable[List[Evidence]]]
+_DEFAULT_CACHE: Any = object()
+_DEFAULT_INDEX: Any = object()
+
 
 class EvidenceRetriever:
-    def __init__(self, config: RetrievalConfig | None = None) -> None:
+    def __init__(
+        self,
+        config: RetrievalConfig | None = None,
+        cache: SearchCache | None = _DEFAULT_CACHE,
+        index: EvidenceIndex | None = _DEFAULT_INDEX,
+        storage: StorageConfig | None = None,
+        limiter: RateLimiter | None = None,
+        breakers: BreakerRegistry | None = None,
+    ) -> None:
         self._config = config or get_settings().retrieval
+        self._storage = storage or get_settings().storage
+        self._cache: SearchCache | None = get_search_cache() if cache is _DEFAULT_CACHE else cache
+        self._stub: StubSearchProvider | None = None
+        if self._config.search_provider == "stub":
+            self._stub = StubSearchProvider(self._config.stub)
+            if not self._config.stub.use_cache:
+                # stub runs measure the pipeline, not the cache
+                self._cache = None
+        self._limiter: RateLimiter | None = None if self._stub is not None else limiter or get_rate_limiter()
+        self._breakers = breakers or get_breakers()
+        if index is _DEFAULT_INDEX:
+            index = EvidenceIndex(self._storage) if self._storage.evidence_index_enabled else None
+        self._index: EvidenceIndex | None = index
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._remembering: Set[asyncio.Task] = set()
         self._tavily = None
-        if self._config.search_provider == "tavily" and TavilyClient and self._config.tavily_api_key:
+        wants_tavily = self._config.search_provider == "tavily" or (
+            self._config.search_strategy != "all" and "tavily" in self._config.race_providers
+        )
+        if wants_tavily and TavilyClient and self._config.tavily_api_key:
             self._tavily = TavilyClient(api_key=self._config.tavily_api_key)
         self._http_timeout = httpx.Timeout(20)
+        self._http = PooledAsyncClient(timeout=self._http_timeout)
+        self._wikipedia = WikipediaClient(api_url=self._config.wikipedia_api_url, timeout=self._http_timeout)
+        # Blocking SDKs (ddgs, tavily) get their own bounded pool so they neither
+        # starve nor get starved by the loop's default executor.
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, self._config.executor_workers),
+            thread_name_prefix="fakescope-retrieval",
+        )
+        self._latency = LatencyTracker(window=self._config.latency_window)
+        self._provider_limits: Dict[str, asyncio.Semaphore] = {}
+        self._query_limit: Optional[asyncio.Semaphore] = None
+        self._limits_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _run_blocking(self, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    def _reset_limits(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._limits_loop is not loop:
+            self._provider_limits = {}
+            self._query_limit = None
+            self._limits_loop = loop
+
+    def _query_slots(self) -> asyncio.Semaphore:
+        """Queries in flight across every claim branch retrieving on this loop."""
+
+        self._reset_limits()
+        if self._query_limit is None:
+            self._query_limit = asyncio.Semaphore(max(1, self._config.max_concurrency))
+        return self._query_limit
+
+    def _provider_slot(self, provider: str) -> asyncio.Semaphore:
+        self._reset_limits()
+        if provider not in self._provider_limits:
+            limit = self._config.provider_concurrency.get(provider, self._config.max_concurrency)
+            self._provider_limits[provider] = asyncio.Semaphore(max(1, limit))
+        return self._provider_limits[provider]
+
+    def _api_key(self, provider: str) -> Optional[str]:
+        return {"tavily": self._config.tavily_api_key, "bing": self._config.bing_api_key}.get(provider)
+
+    async def _call_provider(self, provider: str, fetch: SearchFactory) -> List[Evidence]:
+        # The breaker sits outside the retries: while a provider is down, its calls raise
+        # CircuitOpenError at once instead of queueing, retrying and timing out.
+        async def attempt() -> List[Evidence]:
+            # The slot is held per attempt, so a call sleeping off a backoff does not block
+            # other queries to the provider.
+            async with self._provider_slot(provider):
+                started = time.perf_counter()
+                results = await fetch()
+                # Only completed attempts are sampled; they drive the hedging delay.
+                self._latency.record(provider, time.perf_counter() - started)
+                return results
+
+        async with self._breakers.get(provider).guard():
+            if self._limiter is None:
+                return await attempt()
+            # Throttled and transient failures are retried here; what still fails is raised to the caller.
+            return await self._limiter.call(provider, attempt, key=self._api_key(provider))
+
+    def breaker_states(self) -> Dict[str, Dict[str, Any]]:
+        return self._breakers.snapshot()
+
+    def _result_limit(self, provider: str) -> int:
+        return self._config.wikipedia_results if provider == "wikipedia" else self._config.max_documents
+
+    async def _search(self, provider: str, query: str, language: str, fetch: SearchFactory) -> List[Evidence]:
+        """Run one provider search behind the result cache and the provider's concurrency slot."""
+
+        if self._cache is None or provider in UNCACHED_PROVIDERS:
+            return await self._call_provider(provider, fetch)
+        key = self._cache.key(provider, query, language, self._result_limit(provider))
+        freshness, cached = self._cache.get(key, provider)
+        if freshness is Freshness.FRESH and cached is not None:
+            return cached
+        if freshness is Freshness.STALE and cached is not None:
+            self._revalidate(key, provider, fetch)
+            return cached
+        results = await self._call_provider(provider, fetch)
+        # Empty lists are usually provider failures; caching them would hide the recovery.
+        if results:
+            self._cache.set(key, results)
+        return results
+
+    def _revalidate(self, key: str, provider: str, fetch: SearchFactory) -> None:
+        if key in self._refreshing:
+            return
+
+        async def _refresh() -> None:
+            try:
+                results = await self._call_provider(provider, fetch)
+                if results and self._cache is not None:
+                    self._cache.set(key, results)
+            except Exception as exc:
+                logger.debug("Background refresh for %s failed: %s", provider, exc)
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(_refresh())
 
     async def _search_wikipedia(self, query: str, language: str) -> List[Evidence]:
-        try:
-            import wikipedia  # type: ignore
-
-            wikipedia.set_lang("es" if language == "es" else language if language not in ("auto", "unknown") else "en")
-            results = wikipedia.search(query, results=5)
-            evidences: List[Evidence] = []
-            for title in results:
-                try:
-                    page = wikipedia.page(title, auto_suggest=False)
-                    evidences.append(
-                        Evidence(
-                            source="wikipedia",
-                            title=page.title,
-                            url=page.url,
-                            snippet=page.summary[:500],
-                        )
-                    )
-                except Exception:
-                    continue
-            return evidences
-        except Exception as exc:  # pragma: no cover - offline fallback
-            logger.debug("Wikipedia search failed: %s", exc)
-            return []
+        if self._stub is not None and self._config.stub.stub_wikipedia:
+            return await self._stub.search("wikipedia", query, limit=self._config.wikipedia_results)
+        return await self._wikipedia.search(query, language, limit=self._config.wikipedia_results)
 
     async def _search_tavily(self, query: str) -> List[Evidence]:
         if not self._tavily:
             return []
-        loop = asyncio.get_running_loop()
-        data = await loop.run_in_executor(None, self._tavily.search, query, "advanced")
+        data = await self._run_blocking(self._tavily.search, query, "advanced")
         evidences: List[Evidence] = []
         for result in data.get("results", []):
             evidences.append(
@@ -81,13 +207,8 @@ class EvidenceRetriever:
             with DDGS() as ddgs:
                 return list(ddgs.text(query, max_results=self._config.max_documents))
 
-        loop = asyncio.get_running_loop()
-        try:
-            results = await loop.run_in_executor(None, _run_search)
-        except Exception as exc:  # pragma: no cover - network failure
-            logger.debug("DuckDuckGo search failed: %s", exc)
-            return []
-
+        # ddgs rate-limit/timeout exceptions propagate so the rate limiter can retry them
+        results = await self._run_blocking(_run_search)
         evidences: List[Evidence] = []
         for item in results:
             evidences.append(
@@ -100,18 +221,127 @@ class EvidenceRetriever:
             )
         return evidences
 
+    async def _search_local(self, query: str) -> List[Evidence]:
+        index = get_local_index(self._config.local_index_path, self._config.bm25_k, self._config.bm25_b)
+        hits = await self._run_blocking(index.search, query, self._config.max_documents)
+        top = hits[0].score if hits else 0.0
+        return [
+            Evidence(
+                source="local",
+                title=hit.title,
+                url=hit.url,
+                snippet=hit.text,
+                score=hit.score / top if top > 0 else None,
+                metadata={"bm25": round(hit.score, 4)},
+            )
+            for hit in hits
+        ]
+
+    def _provider_search(self, provider: str, query: str, language: str) -> Optional[SearchFactory]:
+        if provider == "wikipedia":
+            return partial(self._search_wikipedia, query, language)
+        if self._stub is not None:
+            # stub runs simulate every provider, each with its own latency/failure draws
+            return partial(self._stub.search, provider, query)
+        if provider == "local":
+            return partial(self._search_local, query)
+        if provider == "tavily":
+            return partial(self._search_tavily, query)
+        if provider == "duckduckgo":
+            return partial(self._search_duckduckgo, query)
+        if provider == "bing":  # kept for backwards compatibility
+            return partial(self._search_bing, query)
+        return None
+
+    def _web_search(self, query: str) -> Optional[Tuple[str, SearchFactory]]:
+        provider = self._config.search_provider
+        fetch = self._provider_search(provider, query, "auto")
+        return (provider, fetch) if fetch is not None else None
+
+    def _hedge_delay(self, provider: str) -> float:
+        observed = self._latency.quantile(provider, self._config.hedge_quantile)
+        delay_ms = self._config.hedge_default_delay_ms if observed is None else observed * 1000
+        return max(self._config.hedge_min_delay_ms, delay_ms) / 1000
+
+    async def _race(self, query: str, language: str, searches: List[Tuple[str, SearchFactory]]) -> List[Evidence]:
+        """Query every provider at once and stop as soon as ``race_min_results`` distinct results arrived.
+
+        Providers still running at that point are cancelled; the answers that made it are
+        merged in preference order.
+        """
+
+        running = {asyncio.ensure_future(self._search(p, query, language, fetch)): p for p, fetch in searches}
+        finished: Dict[str, List[Evidence]] = {}
+        pending = set(running)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        logger.debug("%s search failed for query '%s': %s", running[task], query, task.exception())
+                        continue
+                    finished[running[task]] = task.result()
+                if len({ev.url for found in finished.values() for ev in found}) >= self._config.race_min_results:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        return self._merge([], (ev for provider, _ in searches for ev in finished.get(provider, [])))
+
+    async def _hedge(self, query: str, language: str, searches: List[Tuple[str, SearchFactory]]) -> List[Evidence]:
+        """Ask the preferred provider first and add the next one whenever the last is overdue.
+
+        A provider is overdue once it has run longer than its recent ``hedge_quantile``
+        latency; a failed or empty answer brings in the next provider straight away. The
+        first non-empty answer wins and the other calls are cancelled.
+        """
+
+        backups = list(searches)
+        running: Dict[asyncio.Future, str] = {}
+        try:
+            while backups or running:
+                if backups:
+                    provider, fetch = backups.pop(0)
+                    running[asyncio.ensure_future(self._search(provider, query, language, fetch))] = provider
+                delay = self._hedge_delay(provider) if backups else None
+                done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    if task.exception() is not None:
+                        logger.debug("%s search failed for query '%s': %s", name, query, task.exception())
+                    elif task.result():
+                        return task.result()
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+        return []
+
     async def _retrieve_for_query(self, claim: Claim, query: str) -> List[Evidence]:
         language = claim.language or "auto"
+        if self._config.search_strategy != "all":
+            candidates = [(p, self._provider_search(p, query, language)) for p in self._config.race_providers]
+            racers = [(provider, fetch) for provider, fetch in candidates if fetch is not None]
+            if self._config.search_strategy == "race":
+                return (await self._race(query, language, racers))[: self._config.max_documents]
+            return (await self._hedge(query, language, racers))[: self._config.max_documents]
+
+        searches: List[Tuple[str, SearchFactory]] = [("wikipedia", partial(self._search_wikipedia, query, language))]
+        web = self._web_search(query)
+        if web:
+            searches.append(web)
+        # Providers run side by side; results keep the provider order (Wikipedia first).
+        results = await asyncio.gather(
+            *(self._search(provider, query, language, fetch) for provider, fetch in searches),
+            return_exceptions=True,
+        )
         gathered: List[Evidence] = []
-        wiki = await self._search_wikipedia(query, language)
-        gathered.extend(wiki)
-        provider = self._config.search_provider
-        if provider == "tavily":
-            gathered.extend(await self._search_tavily(query))
-        elif provider == "duckduckgo":
-            gathered.extend(await self._search_duckduckgo(query))
-        elif provider == "bing":  # kept for backwards compatibility
-            gathered.extend(await self._search_bing(query))
+        for (provider, _), result in zip(searches, results):
+            if isinstance(result, BaseException):
+                logger.debug("%s search failed for query '%s': %s", provider, query, result)
+                continue
+            gathered.extend(result)
         return gathered[: self._config.max_documents]
 
     async def _search_bing(self, query: str) -> List[Evidence]:  # pragma: no cover - legacy path
@@ -120,10 +350,9 @@ class EvidenceRetriever:
         endpoint = "https://api.bing.microsoft.com/v7.0/search"
         headers = {"Ocp-Apim-Subscription-Key": self._config.bing_api_key}
         params = {"q": query, "textDecorations": False, "textFormat": "Raw", "mkt": "en-US"}
-        async with httpx.AsyncClient(timeout=self._http_timeout) as client:
-            response = await client.get(endpoint, headers=headers, params=params)
-            response.raise_for_status()
-            data = response.json()
+        response = await self._http.get().get(endpoint, headers=headers, params=params)
+        response.raise_for_status()
+        data = response.json()
         evidences: List[Evidence] = []
         for item in data.get("webPages", {}).get("value", []):
             evidences.append(
@@ -144,22 +373,87 @@ class EvidenceRetriever:
             combined[item.url] = item
         return list(combined.values())
 
-    async def run(self, state: FakeScopeState) -> Dict[str, Dict[str, List[Evidence]]]:
+    async def _run_job(self, claim: Claim, query: str, semaphore: asyncio.Semaphore) -> List[Evidence]:
+        async with semaphore:
+            try:
+                return await self._retrieve_for_query(claim, query)
+            except Exception as exc:
+                logger.debug("Retrieval failed for query '%s': %s", query, exc)
+                return []
+
+    async def _lookup_local(self, claims: List[Claim], deadline: Optional[Deadline] = None) -> Dict[str, List[Evidence]]:
+        if self._index is None or not claims:
+            return {}
+        try:
+            # Embedding the claims shares the retriever's budget; past it, every claim goes to the web.
+            return await asyncio.wait_for(
+                self._run_blocking(self._index.lookup, claims), timeout=stage_timeout(deadline, "retriever")
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Local evidence lookup ran out of the retrieval budget, searching the web")
+            return {}
+        except Exception as exc:
+            logger.warning("Local evidence lookup failed, searching the web: %s", exc)
+            return {}
+
+    async def _remember(self, found: List[Evidence]) -> None:
+        try:
+            await self._run_blocking(self._index.add, found)
+        except Exception as exc:
+            logger.warning("Could not update the local evidence index: %s", exc)
+
+    def _remember_later(self, found: List[Evidence]) -> None:
+        """Embed and store new evidence in the background, off the path to rerank and stance."""
+
+        if self._index is None or not found:
+            return
+        task = asyncio.create_task(self._remember(found))
+        self._remembering.add(task)
+        task.add_done_callback(self._remembering.discard)
+
+    async def run(self, state: FakeScopeState) -> Dict[str, Any]:
         plan = state.get("plan", {})
         claim_lookup = {claim.identifier: claim for claim in state.get("claims", [])}
-        evidences: Dict[str, List[Evidence]] = {claim_id: [] for claim_id in plan.keys()}
+        planned = [claim_lookup[claim_id] for claim_id in plan if claim_id in claim_lookup]
+        deadline = state.get("deadline")
+        local = await self._lookup_local(planned, deadline)
+        evidences: Dict[str, List[Evidence]] = {claim_id: list(local.get(claim_id, [])) for claim_id in plan.keys()}
+        # Claims with enough close local evidence skip the web entirely.
+        web_claims = {
+            claim.identifier for claim in planned if len(local.get(claim.identifier, [])) < self._storage.local_min_hits
+        }
+        if self._index is not None:
+            logger.debug("Local evidence index answered %d/%d claims", len(planned) - len(web_claims), len(planned))
 
-        for claim_id, queries in plan.items():
-            claim = claim_lookup.get(claim_id)
-            if not claim:
-                continue
-            for query in queries:
-                try:
-                    results = await self._retrieve_for_query(claim, query)
-                except Exception as exc:
-                    logger.debug("Retrieval failed for query '%s': %s", query, exc)
-                    results = []
-                evidences[claim_id] = self._merge(evidences.get(claim_id, []), results)
+        semaphore = self._query_slots()
+        timed_out = False
+
+        async def retrieve_claim(claim: Claim) -> List[Evidence]:
+            nonlocal timed_out
+            queries = plan[claim.identifier] if claim.identifier in web_claims else []
+            jobs = [asyncio.ensure_future(self._run_job(claim, query, semaphore)) for query in queries]
+            if jobs:
+                _, pending = await asyncio.wait(jobs, timeout=stage_timeout(deadline, "retriever"))
+                if pending:
+                    # Out of budget: drop the slow searches and keep what already came back.
+                    logger.warning(
+                        "Retrieval for '%s' ran out of its time budget (%d queries dropped)", claim.identifier, len(pending)
+                    )
+                    timed_out = True
+                    for job in pending:
+                        job.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+            results = [job.result() if not job.cancelled() else [] for job in jobs]
+            # Merge in plan order so the evidence lists do not depend on completion order.
+            for found in results:
+                evidences[claim.identifier] = self._merge(evidences[claim.identifier], found)
+            emit_event(
+                PipelineEvent(PipelineEventKind.EVIDENCE, "retriever", data=evidences[claim.identifier], claim_id=claim.identifier)
+            )
+            return [evidence for found in results for evidence in found]
+
+        retrieved = await asyncio.gather(*(retrieve_claim(claim) for claim in planned))
+        self._remember_later([evidence for found in retrieved for evidence in found])
 
         updated_claims: List[Claim] = []
         for claim in state.get("claims", []):
@@ -168,7 +462,20 @@ class EvidenceRetriever:
         return {
             "claims": updated_claims,
             "evidences": evidences,
+            "degraded": ["retriever"] if timed_out else [],
         }
 
+    async def close_connections(self) -> None:
+        """Close this loop's HTTP pools; the retriever stays usable and reconnects on demand."""
+
+        await self._http.aclose()
+        await self._wikipedia.aclose()
+
+    async def aclose(self) -> None:
+        for task in [*self._refreshing.values(), *self._remembering]:
+            task.cancel()
+        await self.close_connections()
+        self._executor.shutdown(wait=False)
+
 
 __all__ = ["EvidenceRetriever"]
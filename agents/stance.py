@@ -1,19 +1,28 @@
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import Dict, Iterable, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import numpy as np
 from loguru import logger
 
+from agents.deadline import stage_timeout
 from agents.types import Claim, Evidence, FakeScopeState, StanceAssessment, StanceLabel
+from config.settings import StanceConfig, get_settings
+from services.microbatch import MicroBatcher
 
-try:  # optional heavy import
+try:  # optional heavy import (the ONNX backend needs the tokenizer but not torch)
     from transformers import AutoModelForSequenceClassification, AutoTokenizer
-    import torch
 except Exception:  # pragma: no cover
     AutoModelForSequenceClassification = None  # type: ignore
     AutoTokenizer = None  # type: ignore
+
+try:  # optional heavy import
+    import torch
+except Exception:  # pragma: no cover
     torch = None  # type: ignore
 
 
@@ -27,56 +36,118 @@ def _env_flag(name: str, default: bool = False) -> bool:
     return value.lower() in {"1", "true", "yes", "on"}
 
 
+class TorchStanceModel:
+    """PyTorch NLI backend: the reference fp32 path (uses CUDA when available)."""
+
+    def __init__(self, model_name: str, intra_op_threads: Optional[int] = None) -> None:
+        if intra_op_threads:
+            # process-wide setting; torch releases the GIL inside its kernels
+            torch.set_num_threads(intra_op_threads)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self._model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        if torch.cuda.is_available():
+            self._model.to("cuda")
+        self._model.eval()
+        self.id2label: Dict[int, str] = self._model.config.id2label
+
+    def predict_proba(self, features: List[Dict[str, Any]]) -> np.ndarray:
+        batch = self.tokenizer.pad(features, return_tensors="pt")
+        batch = {key: value.to(self._model.device) for key, value in batch.items()}
+        with torch.no_grad():
+            logits = self._model(**batch).logits
+        return torch.softmax(logits, dim=-1).cpu().numpy()
+
+
+def load_stance_model(model_name: str, config: StanceConfig) -> Any:
+    """Build the NLI backend selected by ``config.backend``."""
+
+    if config.backend == "onnx":
+        from agents.stance_onnx import OnnxStanceModel, ort
+
+        if ort is not None:
+            return OnnxStanceModel(model_name, config)
+        logger.warning("onnxruntime is not installed; falling back to the PyTorch stance backend")
+    if torch is None:
+        raise RuntimeError("The PyTorch stance backend requires torch")
+    return TorchStanceModel(model_name, intra_op_threads=config.intra_op_threads)
+
+
 class StanceAnalyzer:
-    def __init__(self, model_name: str = MODEL_NAME, threshold: float = 0.5, load_model: Optional[bool] = None) -> None:
+    def __init__(
+        self,
+        model_name: str = MODEL_NAME,
+        threshold: float = 0.5,
+        load_model: Optional[bool] = None,
+        config: StanceConfig | None = None,
+    ) -> None:
         self._model_name = model_name
         self._threshold = threshold
+        self._config = config or get_settings().stance
         env_desired = _env_flag("FAKESCOPE_LOAD_STANCE_MODEL", default=False)
         desired = load_model if load_model is not None else env_desired
-        self._use_model = bool(desired and AutoTokenizer and AutoModelForSequenceClassification)
+        runtime = torch is not None or self._config.backend == "onnx"
+        self._use_model = bool(desired and AutoTokenizer and runtime)
         self._tokenizer = None
         self._model = None
         if self._use_model:
             try:
-                self._tokenizer = AutoTokenizer.from_pretrained(model_name)
-                self._model = AutoModelForSequenceClassification.from_pretrained(model_name)
-                if torch and torch.cuda.is_available():
-                    self._model.to("cuda")
+                self._model = load_stance_model(model_name, self._config)
+                self._tokenizer = self._model.tokenizer
             except Exception as exc:  # pragma: no cover - weight download failure
                 logger.debug("Failed to load stance model: %s", exc)
                 self._tokenizer = None
                 self._model = None
                 self._use_model = False
+        # Inference runs off the event loop on dedicated workers so other coroutines keep going.
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tokenizer_lock = threading.Lock()  # fast tokenizers are not safe to share across threads
+        if self._use_model:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, self._config.workers),
+                thread_name_prefix="fakescope-stance",
+            )
+        # Claim branches reach stance separately; pairs arriving within the window share one batch.
+        self._batcher: MicroBatcher[Tuple[Claim, Evidence], StanceAssessment] = MicroBatcher(
+            self.analyze_pairs_async,
+            window=self._config.batch_window_ms / 1000 if self._use_model else 0.0,
+            max_items=max(1, self._config.batch_size) * max(1, self._config.workers),
+        )
 
-    def _predict_with_model(self, claim: Claim, evidence: Evidence) -> Optional[StanceAssessment]:
+    def _predict_batch(self, pairs: Sequence[Tuple[Claim, Evidence]]) -> List[Optional[StanceAssessment]]:
+        """Score claim/evidence pairs in padded batches bucketed by token length."""
+
+        results: List[Optional[StanceAssessment]] = [None] * len(pairs)
         if not self._use_model or not self._model or not self._tokenizer:
-            return None
-        if not claim.text or not evidence.snippet:
-            return None
-        encoded = self._tokenizer(
-            claim.text,
-            evidence.snippet,
-            return_tensors="pt",
-            truncation=True,
-            padding=True,
-            max_length=512,
-        )
-        if torch and torch.cuda.is_available():
-            encoded = {k: v.to(self._model.device) for k, v in encoded.items()}
-        with torch.no_grad():
-            logits = self._model(**encoded).logits
-        probs = torch.softmax(logits, dim=-1).cpu().numpy()[0]
-        labels = self._model.config.id2label
-        label_idx = int(np.argmax(probs))
-        label_name = labels[label_idx].lower()
-        map_label = self._map_label(label_name)
-        confidence = float(probs[label_idx])
-        return StanceAssessment(
-            claim_id=claim.identifier,
-            evidence=evidence,
-            label=map_label,
-            confidence=confidence,
-        )
+            return results
+        eligible = [idx for idx, (claim, evidence) in enumerate(pairs) if claim.text and evidence.snippet]
+        if not eligible:
+            return results
+
+        with self._tokenizer_lock:
+            encoded = self._tokenizer(
+                [pairs[idx][0].text for idx in eligible],
+                [pairs[idx][1].snippet for idx in eligible],
+                truncation=True,
+                max_length=self._config.max_length,
+            )
+        features = [{key: values[pos] for key, values in encoded.items()} for pos in range(len(eligible))]
+        # Sorting by length keeps similarly sized pairs together so padding stays minimal.
+        order = sorted(range(len(eligible)), key=lambda pos: len(features[pos]["input_ids"]))
+        labels = self._model.id2label
+        batch_size = max(1, self._config.batch_size)
+        for start in range(0, len(order), batch_size):
+            chunk = order[start : start + batch_size]
+            probs = self._model.predict_proba([features[pos] for pos in chunk])
+            for pos, row in zip(chunk, probs):
+                claim, evidence = pairs[eligible[pos]]
+                label_idx = int(np.argmax(row))
+                results[eligible[pos]] = StanceAssessment(
+                    claim_id=claim.identifier,
+                    evidence=evidence,
+                    label=self._map_label(labels[label_idx].lower()),
+                    confidence=float(row[label_idx]),
+                )
+        return results
 
     def _map_label(self, name: str) -> StanceLabel:
         if "entail" in name or "support" in name:
@@ -103,20 +174,49 @@ class StanceAnalyzer:
             confidence=confidence,
         )
 
+    def analyze_pairs(self, pairs: Sequence[Tuple[Claim, Evidence]]) -> List[StanceAssessment]:
+        predicted = self._predict_batch(pairs)
+        return [
+            assessment if assessment is not None else self._heuristic(claim, evidence)
+            for (claim, evidence), assessment in zip(pairs, predicted)
+        ]
+
     def analyze(self, claim: Claim, evidences: Iterable[Evidence]) -> List[StanceAssessment]:
-        results: List[StanceAssessment] = []
-        for evidence in evidences:
-            assessment = self._predict_with_model(claim, evidence)
-            if assessment is None:
-                assessment = self._heuristic(claim, evidence)
-            results.append(assessment)
+        return self.analyze_pairs([(claim, evidence) for evidence in evidences])
+
+    async def analyze_pairs_async(self, pairs: Sequence[Tuple[Claim, Evidence]]) -> List[StanceAssessment]:
+        if self._executor is None or not pairs:
+            return self.analyze_pairs(pairs)
+        loop = asyncio.get_running_loop()
+        workers = max(1, min(self._config.workers, len(pairs)))
+        # Interleaved shards keep the work balanced; each shard is length-bucketed on its own.
+        shards = [list(pairs[offset::workers]) for offset in range(workers)]
+        shard_results = await asyncio.gather(
+            *(loop.run_in_executor(self._executor, self.analyze_pairs, shard) for shard in shards)
+        )
+        results: List[StanceAssessment] = [None] * len(pairs)  # type: ignore[list-item]
+        for offset, shard_result in enumerate(shard_results):
+            results[offset::workers] = shard_result
         return results
 
-    async def run(self, state: FakeScopeState) -> Dict[str, Dict[str, List[StanceAssessment]]]:
+    async def run(self, state: FakeScopeState) -> Dict[str, Any]:
+        claims: List[Claim] = state.get("claims", [])
+        # Pairs go through the batcher so concurrent claim branches share NLI batches.
+        pairs = [(claim, evidence) for claim in claims for evidence in claim.evidences]
+        degraded: List[str] = []
+        try:
+            predicted = await asyncio.wait_for(
+                self._batcher.submit(pairs), timeout=stage_timeout(state.get("deadline"), "stance")
+            )
+        except asyncio.TimeoutError:
+            # Batches already running in the executor finish in the background; their results are dropped.
+            logger.warning("Stance analysis ran out of its time budget; using heuristic stance")
+            predicted, degraded = [self._heuristic(claim, evidence) for claim, evidence in pairs], ["stance"]
+        assessed = iter(predicted)
         stance_results: Dict[str, List[StanceAssessment]] = {}
         updated_claims: List[Claim] = []
-        for claim in state.get("claims", []):
-            assessments = self.analyze(claim, claim.evidences)
+        for claim in claims:
+            assessments = [next(assessed) for _ in claim.evidences]
             stance_results[claim.identifier] = assessments
             if assessments:
                 # pick the most confident label
@@ -136,7 +236,12 @@ class StanceAnalyzer:
         return {
             "claims": updated_claims,
             "stance_results": stance_results,
+            "degraded": degraded,
         }
 
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
 
-__all__ = ["StanceAnalyzer"]
+__all__ = ["StanceAnalyzer", "TorchStanceModel", "load_stance_model"]
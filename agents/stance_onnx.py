@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+from loguru import logger
+
+from config.settings import StanceConfig
+
+try:  # optional onnx runtime
+    import onnxruntime as ort
+except Exception:  # pragma: no cover
+    ort = None  # type: ignore
+
+try:  # optional heavy import (tokenizer and label config at serve time)
+    from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+except Exception:  # pragma: no cover
+    AutoConfig = None  # type: ignore
+    AutoModelForSequenceClassification = None  # type: ignore
+    AutoTokenizer = None  # type: ignore
+
+try:  # only needed for the one-off export
+    import torch
+except Exception:  # pragma: no cover
+    torch = None  # type: ignore
+
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+
+
+def export_directory(model_name: str, config: StanceConfig) -> Path:
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name.strip("/"))
+    return Path(config.onnx_directory) / slug
+
+
+def export_onnx(model_name: str, directory: Path, opset: int = 17) -> Path:
+    """Export the Hugging Face NLI model to ONNX (logits only) with dynamic batch/sequence axes."""
+
+    if torch is None or AutoModelForSequenceClassification is None:
+        raise RuntimeError("Exporting to ONNX requires torch and transformers")
+    directory.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer("The tower is in Paris.", "Paris hosts the tower.", return_tensors="pt")
+    input_names = [name for name in tokenizer.model_input_names if name in sample]
+
+    class _LogitsOnly(torch.nn.Module):
+        def __init__(self) -> None:
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs: Any) -> Any:
+            return self.model(**dict(zip(input_names, inputs))).logits
+
+    target = directory / FP32_FILE
+    partial_target = directory / (FP32_FILE + ".partial")
+    dynamic_axes: Dict[str, Dict[int, str]] = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+    with torch.no_grad():
+        torch.onnx.export(
+            _LogitsOnly(),
+            tuple(sample[name] for name in input_names),
+            str(partial_target),
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False,
+        )
+    partial_target.replace(target)
+    tokenizer.save_pretrained(directory)
+    model.config.save_pretrained(directory)
+    logger.info("Exported %s to %s", model_name, target)
+    return target
+
+
+def quantize_onnx(source: Path, target: Path) -> Path:
+    """Dynamic int8 quantization: int8 weights, activations quantized on the fly."""
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    partial_target = target.with_name(target.name + ".partial")
+    quantize_dynamic(str(source), str(partial_target), weight_type=QuantType.QInt8)
+    partial_target.replace(target)
+    logger.info("Quantized %s to %s", source, target)
+    return target
+
+
+def ensure_onnx_model(model_name: str, config: StanceConfig) -> Path:
+    directory = export_directory(model_name, config)
+    fp32 = directory / FP32_FILE
+    if not fp32.exists():
+        export_onnx(model_name, directory)
+    if not config.quantize:
+        return fp32
+    int8 = directory / INT8_FILE
+    if not int8.exists():
+        quantize_onnx(fp32, int8)
+    return int8
+
+
+class OnnxStanceModel:
+    """ONNX Runtime NLI backend (fp32 or dynamic int8) for CPU-only nodes.
+
+    The graph is exported once into ``config.onnx_directory`` together with the tokenizer and
+    label config, so later processes only need onnxruntime and transformers (for the
+    tokenizer), not torch.
+    """
+
+    def __init__(self, model_name: str, config: StanceConfig) -> None:
+        if ort is None:
+            raise RuntimeError("onnxruntime is not installed")
+        path = ensure_onnx_model(model_name, config)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if config.intra_op_threads:
+            options.intra_op_num_threads = config.intra_op_threads
+        self._session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self._input_names = [node.name for node in self._session.get_inputs()]
+        directory = path.parent
+        self.tokenizer = AutoTokenizer.from_pretrained(directory)
+        self.id2label: Dict[int, str] = {int(k): v for k, v in AutoConfig.from_pretrained(directory).id2label.items()}
+
+    def predict_proba(self, features: List[Dict[str, Any]]) -> np.ndarray:
+        batch = self.tokenizer.pad(features, return_tensors="np")
+        feeds = {name: np.asarray(batch[name], dtype=np.int64) for name in self._input_names}
+        logits = self._session.run(["logits"], feeds)[0]
+        shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+__all__ = ["OnnxStanceModel", "ensure_onnx_model", "export_onnx", "quantize_onnx", "ort"]
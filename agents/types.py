@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional, TypedDict
+from typing import Annotated, Any, Dict, List, Optional, TypedDict
 
 
 class StanceLabel(str, Enum):
@@ -66,17 +66,80 @@ class VerificationTask:
         return bool(self.input_text)
 
 
+class PipelineEventKind(str, Enum):
+    CLAIMS = "claims"
+    PLAN = "plan"
+    EVIDENCE = "evidence"
+    STANCE = "stance"
+    VERDICT = "verdict"
+    REPORT = "report"
+    REPORT_DELTA = "report_delta"
+    NODE = "node"
+    DONE = "done"
+
+
+@dataclass
+class PipelineEvent:
+    """Progress event yielded by ``FakeScopePipeline.astream``.
+
+    ``data`` depends on ``kind``: the claim list, the plan, one claim's evidence or stance
+    assessments, the verdict, the report text (or a streamed chunk of it for
+    ``REPORT_DELTA``), or the final state for ``DONE``. ``NODE`` marks the end of any graph
+    node. ``elapsed`` counts seconds since the run started.
+    """
+
+    kind: PipelineEventKind
+    node: str
+    data: Any = None
+    claim_id: str | None = None
+    elapsed: float = 0.0
+
+
+def merge_claims(existing: List[Claim] | None, update: List[Claim] | None) -> List[Claim]:
+    """State reducer: replace claims by identifier, keeping the original order and appending new ones."""
+
+    merged = {claim.identifier: claim for claim in existing or []}
+    merged.update({claim.identifier: claim for claim in update or []})
+    return list(merged.values())
+
+
+def merge_by_claim(existing: Dict[str, Any] | None, update: Dict[str, Any] | None) -> Dict[str, Any]:
+    """State reducer for the per-claim maps (plan, evidence, stance) written by parallel branches."""
+
+    return {**(existing or {}), **(update or {})}
+
+
+def merge_degraded(existing: List[str] | None, update: List[str] | None) -> List[str]:
+    """State reducer: stages that ran out of time, each listed once in the order they degraded."""
+
+    return list(dict.fromkeys([*(existing or []), *(update or [])]))
+
+
 class FakeScopeState(TypedDict, total=False):
     task: VerificationTask
     normalized_text: str
     language: str
-    claims: List[Claim]
-    plan: Dict[str, List[str]]
-    evidences: Dict[str, List[Evidence]]
-    stance_results: Dict[str, List[StanceAssessment]]
+    # Written concurrently by the per-claim branches, hence the merging reducers.
+    claims: Annotated[List[Claim], merge_claims]
+    plan: Annotated[Dict[str, List[str]], merge_by_claim]
+    evidences: Annotated[Dict[str, List[Evidence]], merge_by_claim]
+    stance_results: Annotated[Dict[str, List[StanceAssessment]], merge_by_claim]
     verdict: Verdict
     report: str
     run_metadata: Dict[str, Any]
+    # Optional agents.deadline.Deadline; stages that exceed their share fall back and are listed in ``degraded``.
+    deadline: Any
+    degraded: Annotated[List[str], merge_degraded]
+
+
+class ClaimBranchOutput(TypedDict, total=False):
+    """What one claim's plan → retrieve → rerank → stance branch hands back to the article graph."""
+
+    claims: Annotated[List[Claim], merge_claims]
+    plan: Annotated[Dict[str, List[str]], merge_by_claim]
+    evidences: Annotated[Dict[str, List[Evidence]], merge_by_claim]
+    stance_results: Annotated[Dict[str, List[StanceAssessment]], merge_by_claim]
+    degraded: Annotated[List[str], merge_degraded]
 
 
 __all__ = [
@@ -86,5 +149,11 @@ __all__ = [
     "StanceAssessment",
     "Verdict",
     "VerificationTask",
+    "PipelineEvent",
+    "PipelineEventKind",
     "FakeScopeState",
+    "ClaimBranchOutput",
+    "merge_claims",
+    "merge_by_claim",
+    "merge_degraded",
 ]
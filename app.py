@@ -2,10 +2,14 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import sys
 from textwrap import indent
 
 from agents.pipeline import FakeScopePipeline
-from agents.types import StanceLabel, VerificationTask
+from agents.types import PipelineEvent, PipelineEventKind, StanceLabel, VerificationTask
+from config.settings import get_settings
+from rag.local_index import LocalIndex, read_corpus
+from services.batch import run_batch
 
 LANGUAGE_LABELS = {"es": "Espa?ol", "en": "English"}
 
@@ -18,6 +22,12 @@ LANG_STRINGS = {
         "claims": "=== Afirmaciones ===",
         "stance": "Postura",
         "evidence": "  Evidencia:",
+        "progress_claims": "{count} afirmaciones extraidas",
+        "progress_plan": "{count} consultas planificadas",
+        "progress_evidence": "{claim}: {count} evidencias",
+        "progress_stance": "{claim}: postura {label}",
+        "progress_verdict": "veredicto {label} ({confidence:.2f})",
+        "progress_report": "reporte listo",
     },
     "en": {
         "verdict": "=== Verdict ===",
@@ -27,6 +37,12 @@ LANG_STRINGS = {
         "claims": "=== Claims ===",
         "stance": "Stance",
         "evidence": "  Evidence:",
+        "progress_claims": "{count} claims extracted",
+        "progress_plan": "{count} queries planned",
+        "progress_evidence": "{claim}: {count} evidence items",
+        "progress_stance": "{claim}: stance {label}",
+        "progress_verdict": "verdict {label} ({confidence:.2f})",
+        "progress_report": "report ready",
     },
 }
 
@@ -44,14 +60,26 @@ def _build_parser() -> argparse.ArgumentParser:
         default="en",
         help="Language code for the input and the generated output (es or en)",
     )
+    parser.add_argument("--quiet", action="store_true", help="Do not print pipeline progress to stderr")
+    commands = parser.add_subparsers(dest="command")
+    index_parser = commands.add_parser("index", help="Build or extend the offline corpus index for the 'local' provider")
+    index_parser.add_argument("action", choices=["build", "extend"], help="build replaces the index, extend only adds new documents")
+    index_parser.add_argument("corpus", nargs="+", help="JSONL files with title/url/text records (e.g. WikiExtractor --json output)")
+    index_parser.add_argument("--index-dir", default=None, help="Index directory (defaults to retrieval.local_index_path)")
+    index_parser.add_argument("--segment-size", type=int, default=50_000, help="Documents per index segment")
+    batch_parser = commands.add_parser("batch", help="Verify a JSONL file of {text|url, language, id} records")
+    batch_parser.add_argument("--input", required=True, help="JSONL file with one verification request per line")
+    batch_parser.add_argument("--output", required=True, help="JSONL results file; an existing file is resumed")
+    batch_parser.add_argument("--concurrency", type=int, default=4, help="Verifications running at the same time")
+    batch_parser.add_argument("--language", choices=["es", "en"], default="en", help="Language for records without one")
     return parser
 
 
-def _render(result: dict, language: str) -> str:
+def _render(result: dict, language: str, include_report: bool = True) -> str:
     strings = LANG_STRINGS.get(language, LANG_STRINGS["en"])
     verdict = result.get("verdict")
     claims = result.get("claims", [])
-    report = result.get("report", "")
+    report = result.get("report", "") if include_report else ""
 
     lines = []
     if verdict:
@@ -82,22 +110,92 @@ def _render(result: dict, language: str) -> str:
     return "\n".join(lines)
 
 
-async def _ainvoke(task: VerificationTask) -> dict:
+def _describe_progress(event: PipelineEvent, language: str) -> str | None:
+    strings = LANG_STRINGS.get(language, LANG_STRINGS["en"])
+    if event.kind is PipelineEventKind.CLAIMS:
+        return strings["progress_claims"].format(count=len(event.data))
+    if event.kind is PipelineEventKind.PLAN:
+        return strings["progress_plan"].format(count=sum(len(queries) for queries in event.data.values()))
+    if event.kind is PipelineEventKind.EVIDENCE:
+        return strings["progress_evidence"].format(claim=event.claim_id, count=len(event.data))
+    if event.kind is PipelineEventKind.STANCE:
+        best = max(event.data, key=lambda item: item.confidence, default=None)
+        label = best.label.value if best else StanceLabel.UNKNOWN.value
+        return strings["progress_stance"].format(claim=event.claim_id, label=label)
+    if event.kind is PipelineEventKind.VERDICT:
+        return strings["progress_verdict"].format(label=event.data.label.value, confidence=event.data.confidence)
+    if event.kind is PipelineEventKind.REPORT:
+        return strings["progress_report"]
+    return None
+
+
+async def _ainvoke(task: VerificationTask, progress: bool = True) -> tuple[dict, str]:
+    """Run the pipeline, returning the final state and the report text streamed to stdout."""
+
     pipeline = FakeScopePipeline()
-    return await pipeline.ainvoke(task)
+    result: dict = {}
+    streamed: list[str] = []
+    try:
+        async for event in pipeline.astream(task):
+            if event.kind is PipelineEventKind.DONE:
+                result = event.data
+            elif event.kind is PipelineEventKind.REPORT_DELTA:
+                if not streamed:
+                    print(LANG_STRINGS.get(task.language, LANG_STRINGS["en"])["report"], flush=True)
+                streamed.append(event.data)
+                print(event.data, end="", flush=True)
+            elif progress and (line := _describe_progress(event, task.language)):
+                print(f"[{event.elapsed:6.1f}s] {line}", file=sys.stderr, flush=True)
+        if streamed:
+            print("\n", flush=True)
+        return result, "".join(streamed)
+    finally:
+        await pipeline.aclose()
+
+
+def _run_index(args: argparse.Namespace) -> None:
+    config = get_settings().retrieval
+    index = LocalIndex(args.index_dir or config.local_index_path, k1=config.bm25_k, b=config.bm25_b)
+    if args.action == "build":
+        index.clear()
+    added = index.add_documents(
+        read_corpus(args.corpus),
+        segment_size=args.segment_size,
+        snippet_chars=config.local_snippet_chars,
+    )
+    print(f"Indexed {added} new documents into {index.directory} ({len(index)} total)")
+
+
+async def _abatch(args: argparse.Namespace) -> None:
+    pipeline = FakeScopePipeline()
+    try:
+        stats = await run_batch(pipeline, args.input, args.output, args.concurrency, default_language=args.language)
+    finally:
+        await pipeline.aclose()
+    print(
+        f"Processed {stats.total} records: {stats.succeeded} verified, {stats.failed} failed, "
+        f"{stats.skipped} already in {args.output}"
+    )
 
 
 def main() -> None:
     parser = _build_parser()
     args = parser.parse_args()
 
+    if args.command == "index":
+        _run_index(args)
+        return
+    if args.command == "batch":
+        asyncio.run(_abatch(args))
+        return
     if not args.url and not args.text:
         parser.error("Provide either --url or --text")
 
     task = VerificationTask(input_text=args.text, url=args.url, language=args.language)
-    result = asyncio.run(_ainvoke(task))
+    result, streamed = asyncio.run(_ainvoke(task, progress=not args.quiet))
     language = result.get("language", args.language)
-    output = _render(result, language)
+    # A report that fell back after a failed stream differs from what was printed, so show it again.
+    output = _render(result, language, include_report=streamed.strip() != result.get("report", "").strip())
     print(output)
 
 
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from statistics import mean
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from agents.stance import MODEL_NAME, StanceAnalyzer
+from agents.types import Claim, Evidence, StanceAssessment
+from config.settings import StanceConfig
+
+SAMPLE_PAIRS = [
+    ("The Eiffel Tower is located in Paris.", "The Eiffel Tower is a wrought-iron lattice tower in Paris, France.", "supports"),
+    ("The Eiffel Tower is located in Rome.", "The Eiffel Tower is a wrought-iron lattice tower in Paris, France.", "refutes"),
+    ("The Eiffel Tower is located in Paris.", "The Colosseum is an ancient amphitheatre in Rome.", "unknown"),
+    ("La Torre Eiffel está en París.", "La torre Eiffel es una estructura de hierro situada en París, Francia.", "supports"),
+    ("La Torre Eiffel está en Madrid.", "La torre Eiffel es una estructura de hierro situada en París, Francia.", "refutes"),
+    ("Water boils at 100 degrees Celsius at sea level.", "At standard atmospheric pressure water boils at 100 °C.", "supports"),
+    ("The moon is made of cheese.", "The Moon's surface is covered in regolith, a layer of dust and rock.", "refutes"),
+    ("Madrid es la capital de España.", "El fútbol es el deporte más popular de Brasil.", "unknown"),
+]
+
+VARIANTS = {
+    "torch-fp32": StanceConfig(backend="torch"),
+    "onnx-fp32": StanceConfig(backend="onnx", quantize=False),
+    "onnx-int8": StanceConfig(backend="onnx", quantize=True),
+}
+
+
+def _load_pairs(path: Optional[Path], limit: Optional[int]) -> List[Tuple[Claim, Evidence, Optional[str]]]:
+    rows: List[Tuple[str, str, Optional[str]]]
+    if path:
+        with path.open(encoding="utf-8") as fh:
+            records = [json.loads(line) for line in fh if line.strip()]
+        rows = [(record["claim"], record["evidence"], record.get("label")) for record in records]
+    else:
+        rows = list(SAMPLE_PAIRS)
+    if limit:
+        rows = rows[:limit]
+    return [
+        (Claim(identifier=f"claim-{idx}", text=claim), Evidence(source="bench", title="", url=f"bench://{idx}", snippet=evidence), label)
+        for idx, (claim, evidence, label) in enumerate(rows)
+    ]
+
+
+def _run_variant(
+    name: str, config: StanceConfig, model_name: str, pairs: List[Tuple[Claim, Evidence]], repeat: int
+) -> Tuple[List[StanceAssessment], List[float]]:
+    analyzer = StanceAnalyzer(model_name=model_name, load_model=True, config=config)
+    if not analyzer._use_model:
+        raise RuntimeError(f"{name}: stance model could not be loaded")
+    analyzer.analyze_pairs(pairs[: config.batch_size])  # warm-up (graph init, allocator)
+    timings: List[float] = []
+    results: List[StanceAssessment] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = analyzer.analyze_pairs(pairs)
+        timings.append(time.perf_counter() - started)
+    return results, timings
+
+
+def compare(model_name: str, samples: Optional[Path], limit: Optional[int], batch_size: int, repeat: int, variants: List[str]) -> Dict[str, Dict[str, float]]:
+    loaded = _load_pairs(samples, limit)
+    pairs = [(claim, evidence) for claim, evidence, _ in loaded]
+    gold = [label for _, _, label in loaded]
+    report: Dict[str, Dict[str, float]] = {}
+    reference: Optional[List[StanceAssessment]] = None
+    for name in variants:
+        config = VARIANTS[name].model_copy(update={"batch_size": batch_size})
+        results, timings = _run_variant(name, config, model_name, pairs, repeat)
+        if reference is None:
+            reference = results
+        per_pair_ms = [1000 * elapsed / max(1, len(pairs)) for elapsed in timings]
+        row: Dict[str, float] = {
+            "pairs": float(len(pairs)),
+            "ms_per_pair_p50": float(np.percentile(per_pair_ms, 50)),
+            "ms_per_pair_p95": float(np.percentile(per_pair_ms, 95)),
+            "agreement_vs_reference": float(mean(a.label == b.label for a, b in zip(results, reference))),
+            "max_confidence_delta": max((abs(a.confidence - b.confidence) for a, b in zip(results, reference)), default=0.0),
+        }
+        labelled = [(assessment, label) for assessment, label in zip(results, gold) if label]
+        if labelled:
+            row["accuracy_vs_gold"] = float(mean(assessment.label.value == label for assessment, label in labelled))
+        report[name] = row
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare stance backends (torch fp32, ONNX fp32, ONNX int8) on accuracy and latency.")
+    parser.add_argument("--model", default=MODEL_NAME, help="Hugging Face model id or local path")
+    parser.add_argument("--samples", type=Path, default=None, help="JSONL with claim, evidence and optional label (supports/refutes/unknown)")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N samples")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed passes per backend")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS), help="The first variant is the reference")
+    args = parser.parse_args()
+
+    report = compare(args.model, args.samples, args.limit, args.batch_size, args.repeat, args.variants)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
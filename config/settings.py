@@ -3,7 +3,7 @@
 import os
 from functools import lru_cache
 from pathlib import Path
-from typing import Literal, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -22,22 +22,192 @@ class DeepSeekConfig(BaseModel):
     model: str = Field(default="deepseek-reasoner", description="Default DeepSeek model")
     api_base: str = Field(default="https://api.deepseek.com/v1", description="Base URL for DeepSeek API")
     timeout_seconds: int = Field(default=60, description="Timeout for DeepSeek requests")
+    http2: bool = Field(default=False, description="Negotiate HTTP/2 (requires the h2 package)")
+    max_connections: int = Field(default=20, description="Maximum open connections in the shared pool")
+    max_keepalive_connections: int = Field(default=10, description="Idle connections kept alive for reuse")
+    keepalive_expiry: float = Field(default=30.0, description="Seconds an idle connection stays in the pool")
+
+
+class PlannerConfig(BaseModel):
+    mode: Literal["per_claim", "batched"] = Field(default="per_claim", description="One prompt per claim or several per prompt")
+    batch_size: int = Field(default=5, description="Claims sent together in batched mode")
+    max_concurrency: int = Field(default=4, description="Planning requests in flight against DeepSeek")
+    timeout_seconds: Optional[float] = Field(
+        default=30.0, description="Per-claim planning timeout before falling back; batched prompts get it once per claim"
+    )
+
+
+class PipelineConfig(BaseModel):
+    deadline_seconds: Optional[float] = Field(
+        default=None, description="End-to-end budget for one verification; unset runs every stage to completion"
+    )
+    stage_budgets: Dict[str, float] = Field(
+        default_factory=lambda: {
+            "intake": 0.10,
+            "claims": 0.15,
+            "planner": 0.10,
+            "retriever": 0.35,
+            "stance": 0.15,
+            "report": 0.15,
+        },
+        description="Relative share of the deadline per stage; time a stage leaves unused rolls over to the next",
+    )
+
+
+class StubSearchConfig(BaseModel):
+    fixtures_path: Optional[str] = Field(
+        default="config/stub_evidence.jsonl",
+        description="JSONL fixtures (title/url/snippet); without it results are synthesised from the query",
+    )
+    results: int = Field(default=5, description="Evidence returned per stub query")
+    latency: Literal["fixed", "uniform", "normal", "lognormal", "exponential"] = Field(default="fixed")
+    latency_ms: float = Field(default=0.0, description="Mean latency (median for lognormal)")
+    latency_jitter_ms: float = Field(default=0.0, description="Half-width (uniform) or standard deviation (normal)")
+    latency_sigma: float = Field(default=0.5, description="Shape of the lognormal latency distribution")
+    failure_rate: float = Field(default=0.0, ge=0.0, le=1.0, description="Probability that a stub call raises")
+    seed: int = Field(default=0, description="Seeds latency and failure draws so runs are reproducible")
+    stub_wikipedia: bool = Field(default=True, description="Serve the Wikipedia searches from the stub as well")
+    use_cache: bool = Field(default=False, description="Keep the search cache in front of the stub")
+
+
+class CircuitBreakerConfig(BaseModel):
+    enabled: bool = Field(default=True, description="Fail fast on providers that keep failing")
+    failure_threshold: int = Field(default=5, description="Consecutive failed calls that open a provider's circuit")
+    cooldown_seconds: float = Field(default=30.0, description="How long an open circuit rejects calls before probing")
+    half_open_max_calls: int = Field(default=1, description="Probe calls let through while half-open")
+    close_after_successes: int = Field(default=1, description="Successful probes needed to close the circuit")
 
 
 class RetrievalConfig(BaseModel):
-    search_provider: Literal["duckduckgo", "tavily", "bing", "serpapi", "stub"] = Field(default="duckduckgo")
+    search_provider: Literal["duckduckgo", "tavily", "bing", "serpapi", "stub", "local"] = Field(default="duckduckgo")
     tavily_api_key: Optional[str] = None
     bing_api_key: Optional[str] = None
     serpapi_key: Optional[str] = None
     wikipedia_language: str = Field(default="auto")
+    wikipedia_api_url: str = Field(
+        default="https://{language}.wikipedia.org/w/api.php",
+        description="MediaWiki API endpoint; {language} is replaced with the claim language",
+    )
+    wikipedia_results: int = Field(default=5, description="Wikipedia pages fetched per query")
     max_documents: int = Field(default=10)
     bm25_k: float = Field(default=1.2)
     bm25_b: float = Field(default=0.75)
+    dense_rerank: bool = Field(default=False, description="Fuse BM25 with dense embedding similarity when reranking")
+    embedding_model: str = Field(default="BAAI/bge-m3", description="Sentence-transformer used for dense reranking")
+    rrf_k: int = Field(default=60, description="Reciprocal-rank-fusion constant")
+    rerank_batch_window_ms: float = Field(
+        default=10.0, description="How long reranking waits to batch claims from concurrent claim branches (0 disables)"
+    )
+    max_concurrency: int = Field(default=8, description="(claim, query) retrieval jobs in flight")
+    provider_concurrency: Dict[str, int] = Field(
+        default_factory=lambda: {"wikipedia": 8, "duckduckgo": 2, "tavily": 4, "bing": 4},
+        description="Concurrent requests allowed per search provider",
+    )
+    executor_workers: int = Field(default=8, description="Threads reserved for blocking search SDKs (ddgs, tavily)")
+    local_index_path: str = Field(default=".cache/local_index", description="Inverted index served by the 'local' provider")
+    local_snippet_chars: int = Field(default=600, description="Characters of each indexed document kept as the snippet")
+    search_strategy: Literal["all", "race", "hedge"] = Field(
+        default="all",
+        description="all: Wikipedia plus search_provider; race: first results win; hedge: backup after a p95 delay",
+    )
+    race_providers: List[str] = Field(
+        default_factory=lambda: ["wikipedia", "duckduckgo", "tavily"],
+        description="Providers queried by the race/hedge strategies, in order of preference",
+    )
+    race_min_results: int = Field(default=5, description="Race: stop waiting once this many distinct results arrived")
+    hedge_quantile: float = Field(default=0.95, description="Hedge: latency quantile of a provider before a backup starts")
+    hedge_min_delay_ms: float = Field(default=200.0, description="Hedge: never start a backup sooner than this")
+    hedge_default_delay_ms: float = Field(default=1500.0, description="Hedge: delay used until a provider has samples")
+    latency_window: int = Field(default=256, description="Recent calls per provider kept for latency quantiles")
+    breaker: CircuitBreakerConfig = Field(default_factory=CircuitBreakerConfig)
+    stub: StubSearchConfig = Field(default_factory=StubSearchConfig)
+
+
+class StanceConfig(BaseModel):
+    backend: Literal["torch", "onnx"] = Field(default="torch", description="NLI runtime for the stance model")
+    quantize: bool = Field(default=False, description="Serve the dynamically int8-quantized ONNX graph")
+    onnx_directory: str = Field(default=".cache/onnx", description="Where exported ONNX graphs are kept")
+    batch_size: int = Field(default=16, description="Claim/evidence pairs per NLI forward pass")
+    max_length: int = Field(default=512, description="Token limit for each claim/evidence pair")
+    workers: int = Field(default=1, description="Inference threads running batches off the event loop")
+    batch_window_ms: float = Field(
+        default=10.0, description="How long pairs from concurrent claim branches are collected into one NLI batch (0 disables)"
+    )
+    intra_op_threads: Optional[int] = Field(
+        default=None,
+        description="Threads per forward pass (torch/ONNX Runtime); keep workers x intra_op_threads <= cores",
+    )
+
+
+class ProviderLimitConfig(BaseModel):
+    rate_per_second: Optional[float] = Field(default=None, description="Token-bucket refill rate per API key; unset = unlimited")
+    burst: int = Field(default=5, description="Requests allowed back to back before the rate applies")
+    initial_concurrency: Optional[int] = Field(default=None, description="Starting AIMD limit (defaults to max_concurrency)")
+    min_concurrency: int = Field(default=1, description="AIMD never throttles below this many requests in flight")
+    max_concurrency: int = Field(default=16, description="AIMD ceiling for requests in flight")
+
+
+class RateLimitConfig(BaseModel):
+    enabled: bool = Field(default=True, description="Throttle and retry DeepSeek and search provider calls")
+    default: ProviderLimitConfig = Field(default_factory=ProviderLimitConfig, description="Limits for unlisted providers")
+    providers: Dict[str, ProviderLimitConfig] = Field(
+        default_factory=lambda: {
+            "deepseek": ProviderLimitConfig(max_concurrency=20),
+            "duckduckgo": ProviderLimitConfig(rate_per_second=1.0, burst=3, max_concurrency=2),
+            "wikipedia": ProviderLimitConfig(rate_per_second=20.0, burst=20, max_concurrency=8),
+            "tavily": ProviderLimitConfig(max_concurrency=4),
+        },
+        description="Per-provider token buckets and adaptive concurrency",
+    )
+    max_retries: int = Field(default=3, description="Retries for 429s, 5xx and transport errors")
+    backoff_base_ms: float = Field(default=250.0, description="First backoff ceiling; doubles per attempt (full jitter)")
+    backoff_max_ms: float = Field(default=8000.0, description="Largest backoff ceiling")
+    max_retry_after_seconds: float = Field(default=30.0, description="Longest Retry-After honoured before retrying")
+    aimd_increase: float = Field(default=1.0, description="Slots added per limit's worth of successful calls")
+    aimd_decrease: float = Field(default=0.5, description="Factor applied to the limit when a provider throttles")
+    aimd_cooldown_seconds: float = Field(default=1.0, description="Throttles within this window cut the limit once")
 
 
 class StorageConfig(BaseModel):
     persist_directory: str = Field(default=".chromadb")
     reset_on_startup: bool = Field(default=False)
+    evidence_index_enabled: bool = Field(default=False, description="Reuse previously retrieved evidence before searching the web")
+    evidence_collection: str = Field(default="evidence")
+    local_top_k: int = Field(default=5, description="Evidence pulled from the local index per claim")
+    local_min_hits: int = Field(default=3, description="Claims with fewer close local hits still go to the web")
+    local_min_similarity: float = Field(default=0.75, description="Cosine similarity a local hit needs to count")
+
+
+class CacheConfig(BaseModel):
+    directory: str = Field(default=".cache", description="Directory holding the persistent caches")
+    llm_enabled: bool = Field(default=True, description="Reuse identical DeepSeek completions across runs")
+    llm_ttl_seconds: int = Field(default=7 * 24 * 3600, description="Lifetime of a cached completion")
+    llm_max_entries: int = Field(default=20_000, description="Least recently used completions beyond this are evicted")
+    search_enabled: bool = Field(default=True, description="Cache search provider results across runs")
+    search_ttl_seconds: Dict[str, int] = Field(
+        default_factory=lambda: {"wikipedia": 7 * 24 * 3600, "duckduckgo": 3600, "tavily": 3600, "bing": 3600},
+        description="Freshness lifetime per provider; news search should stay short",
+    )
+    search_default_ttl_seconds: int = Field(default=3600, description="Lifetime for providers missing above")
+    search_stale_seconds: int = Field(
+        default=6 * 3600,
+        description="How long past its TTL a result is still served while it is refreshed in the background",
+    )
+    search_max_entries: int = Field(default=50_000, description="Least recently used search results beyond this are evicted")
+    embeddings_enabled: bool = Field(default=True, description="Persist embeddings so each text is encoded only once")
+    embeddings_dtype: Literal["float16", "float32"] = Field(default="float16", description="Storage precision of cached vectors")
+
+
+class ServerConfig(BaseModel):
+    host: str = Field(default="127.0.0.1")
+    port: int = Field(default=8000)
+    workers: int = Field(default=2, description="Verifications running concurrently on the shared pipeline")
+    max_queue: int = Field(default=32, ge=1, description="Jobs allowed to wait; beyond this submissions get HTTP 429")
+    sync_timeout_seconds: float = Field(default=120.0, description="How long POST /verify waits before answering 504")
+    result_ttl_seconds: int = Field(default=3600, description="How long finished job results stay retrievable")
+    max_results: int = Field(default=1000, description="Finished jobs kept in memory")
+    drain_timeout_seconds: float = Field(default=60.0, description="Grace period for queued/running jobs on shutdown")
+    max_body_bytes: int = Field(default=1_000_000)
 
 
 class AppConfig(BaseModel):
@@ -55,9 +225,15 @@ class LangsmithConfig(BaseModel):
 
 class FakeScopeSettings(BaseSettings):
     deepseek: DeepSeekConfig = Field(default_factory=DeepSeekConfig)
+    planner: PlannerConfig = Field(default_factory=PlannerConfig)
+    pipeline: PipelineConfig = Field(default_factory=PipelineConfig)
     retrieval: RetrievalConfig = Field(default_factory=RetrievalConfig)
+    stance: StanceConfig = Field(default_factory=StanceConfig)
     storage: StorageConfig = Field(default_factory=StorageConfig)
+    cache: CacheConfig = Field(default_factory=CacheConfig)
+    ratelimit: RateLimitConfig = Field(default_factory=RateLimitConfig)
     app: AppConfig = Field(default_factory=AppConfig)
+    server: ServerConfig = Field(default_factory=ServerConfig)
     langsmith: LangsmithConfig = Field(default_factory=LangsmithConfig)
 
     model_config = SettingsConfigDict(env_prefix="FAKESCOPE_", env_nested_delimiter="__", extra="ignore")
@@ -99,9 +275,18 @@ def get_settings() -> FakeScopeSettings:
 __all__ = [
     "FakeScopeSettings",
     "DeepSeekConfig",
+    "PlannerConfig",
+    "PipelineConfig",
     "RetrievalConfig",
+    "CircuitBreakerConfig",
+    "StubSearchConfig",
+    "StanceConfig",
     "StorageConfig",
+    "CacheConfig",
+    "ProviderLimitConfig",
+    "RateLimitConfig",
     "AppConfig",
+    "ServerConfig",
     "LangsmithConfig",
     "get_settings",
 ]
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+DIGEST_SIZE = 16
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+class EmbeddingCache:
+    """Append-only, memory-mapped embedding store for one model.
+
+    ``vectors.bin`` is a raw ``(rows, dim)`` matrix and ``keys.bin`` holds the 16-byte text
+    digest of each row in the same order; the digest -> row index is rebuilt from it on open.
+    Rows are written vectors-first, so a crash mid-append can only leave a trailing vector
+    without a key, which is ignored. One writer process per directory is assumed.
+    """
+
+    def __init__(self, directory: str | Path, model_name: str, dtype: str = "float16") -> None:
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name.strip("/"))
+        self._dir = Path(directory) / slug
+        self._model_name = model_name
+        self._dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        self._dim: Optional[int] = None
+        self._index: Dict[bytes, int] = {}
+        self._rows = 0
+        self._matrix: Optional[np.memmap] = None
+        self._opened = False
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self._dir / "vectors.bin"
+
+    @property
+    def _keys_path(self) -> Path:
+        return self._dir / "keys.bin"
+
+    @property
+    def _meta_path(self) -> Path:
+        return self._dir / "meta.json"
+
+    def _open(self) -> None:
+        if self._opened:
+            return
+        self._opened = True
+        if not self._meta_path.exists():
+            return
+        meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+        self._dim = int(meta["dim"])
+        self._dtype = np.dtype(meta["dtype"])
+        keys = self._keys_path.read_bytes() if self._keys_path.exists() else b""
+        row_bytes = self._dim * self._dtype.itemsize
+        vector_rows = self._vectors_path.stat().st_size // row_bytes if self._vectors_path.exists() else 0
+        self._rows = min(len(keys) // DIGEST_SIZE, vector_rows)
+        self._index = {keys[row * DIGEST_SIZE : (row + 1) * DIGEST_SIZE]: row for row in range(self._rows)}
+
+    def _mapped(self) -> np.memmap:
+        if self._matrix is None or self._matrix.shape[0] < self._rows:
+            self._matrix = np.memmap(self._vectors_path, dtype=self._dtype, mode="r", shape=(self._rows, self._dim))
+        return self._matrix
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._open()
+            return self._rows
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        with self._lock:
+            self._open()
+            rows = [self._index.get(text_digest(text)) for text in texts]
+            matrix = self._mapped() if self._rows and any(row is not None for row in rows) else None
+            found = [np.array(matrix[row], dtype=np.float32) if row is not None else None for row in rows]
+        hits = sum(vector is not None for vector in found)
+        self.hits += hits
+        self.misses += len(found) - hits
+        return found
+
+    def add_many(self, texts: Sequence[str], vectors: np.ndarray) -> None:
+        if not len(texts):
+            return
+        vectors = np.asarray(vectors)
+        with self._lock:
+            self._open()
+            if self._dim is None:
+                self._dim = int(vectors.shape[1])
+                self._dir.mkdir(parents=True, exist_ok=True)
+                self._meta_path.write_text(
+                    json.dumps({"model": self._model_name, "dim": self._dim, "dtype": self._dtype.name}),
+                    encoding="utf-8",
+                )
+            fresh: List[int] = []
+            digests: List[bytes] = []
+            seen: Set[bytes] = set()
+            for position, text in enumerate(texts):
+                digest = text_digest(text)
+                if digest in self._index or digest in seen:
+                    continue
+                fresh.append(position)
+                digests.append(digest)
+                seen.add(digest)
+            if not fresh:
+                return
+            block = np.ascontiguousarray(vectors[fresh], dtype=self._dtype)
+            with self._vectors_path.open("r+b" if self._vectors_path.exists() else "wb") as fh:
+                # truncate any orphaned trailing vector left by an interrupted append
+                fh.truncate(self._rows * self._dim * self._dtype.itemsize)
+                fh.seek(0, 2)
+                fh.write(block.tobytes())
+            with self._keys_path.open("ab") as fh:
+                fh.truncate(self._rows * DIGEST_SIZE)
+                fh.write(b"".join(digests))
+            for offset, digest in enumerate(digests):
+                self._index[digest] = self._rows + offset
+            self._rows += len(digests)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "rows": self._rows}
+
+
+__all__ = ["EmbeddingCache", "text_digest"]
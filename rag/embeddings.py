@@ -1,19 +1,103 @@
 from __future__ import annotations
 
-from typing import Iterable, List
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
 
-from sentence_transformers import SentenceTransformer
+import numpy as np
+
+from config.settings import get_settings
+from rag.embedding_cache import EmbeddingCache
+
+try:  # optional heavy import
+    from sentence_transformers import SentenceTransformer
+except Exception:  # pragma: no cover
+    SentenceTransformer = None  # type: ignore
+
+
+DEFAULT_MODEL = "BAAI/bge-m3"
+_DEFAULT_CACHE: Any = object()
+
+
+def default_embedding_cache(model_name: str) -> EmbeddingCache | None:
+    config = get_settings().cache
+    if not config.embeddings_enabled:
+        return None
+    return EmbeddingCache(Path(config.directory) / "embeddings", model_name, dtype=config.embeddings_dtype)
 
 
 class EmbeddingService:
-    def __init__(self, model_name: str = "BAAI/bge-m3") -> None:
-        self._model = SentenceTransformer(model_name)
+    """Sentence-transformer wrapper returning L2-normalised float32 matrices.
+
+    The model is loaded on the first ``encode`` call, so constructing the service is free.
+    Vectors are looked up in a persistent :class:`EmbeddingCache` first and the model only
+    runs on cache misses.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        batch_size: int = 32,
+        cache: EmbeddingCache | None = _DEFAULT_CACHE,
+    ) -> None:
+        self.model_name = model_name
+        self._batch_size = batch_size
+        self._model: Optional[SentenceTransformer] = None
+        self._lock = threading.Lock()
+        self._cache: EmbeddingCache | None = default_embedding_cache(model_name) if cache is _DEFAULT_CACHE else cache
+
+    def _load(self) -> "SentenceTransformer":
+        with self._lock:
+            if self._model is None:
+                if SentenceTransformer is None:
+                    raise RuntimeError("sentence-transformers is not installed")
+                self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def _encode_with_model(self, texts: List[str]) -> np.ndarray:
+        vectors = self._load().encode(
+            texts,
+            batch_size=self._batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+    def encode(self, texts: Iterable[str]) -> np.ndarray:
+        batch = list(texts)
+        if not batch:
+            return np.zeros((0, 0), dtype=np.float32)
+        if self._cache is None:
+            return self._encode_with_model(batch)
+
+        unique = list(dict.fromkeys(batch))
+        vectors: Dict[str, np.ndarray] = {
+            text: vector for text, vector in zip(unique, self._cache.get_many(unique)) if vector is not None
+        }
+        missing = [text for text in unique if text not in vectors]
+        if missing:
+            encoded = self._encode_with_model(missing)
+            self._cache.add_many(missing, encoded)
+            vectors.update(zip(missing, encoded))
+        matrix = np.stack([vectors[text] for text in batch]).astype(np.float32, copy=False)
+        # float16 storage loses a little precision; restore unit length for cosine scoring
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1.0)
+
+    def embed_documents(self, texts: Iterable[str]) -> np.ndarray:
+        return self.encode(texts)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.encode([text])[0]
+
 
-    def embed_documents(self, texts: Iterable[str]) -> List[List[float]]:
-        return self._model.encode(list(texts), convert_to_numpy=False)
+@lru_cache(maxsize=None)
+def get_embedding_service(model_name: str = DEFAULT_MODEL) -> EmbeddingService:
+    """Process-wide shared service per model, so the weights are loaded only once."""
 
-    def embed_query(self, text: str) -> List[float]:
-        return self._model.encode([text], convert_to_numpy=False)[0]
+    return EmbeddingService(model_name)
 
 
-__all__ = ["EmbeddingService"]
+__all__ = ["EmbeddingService", "get_embedding_service", "default_embedding_cache", "DEFAULT_MODEL"]
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import Any, Dict, List, Sequence
+
+from agents.types import Claim, Evidence
+from config.settings import StorageConfig, get_settings
+from rag.embeddings import EmbeddingService, get_embedding_service
+from rag.vectorstore import VectorStoreManager
+
+
+def evidence_id(evidence: Evidence) -> str:
+    return hashlib.sha1(evidence.url.encode("utf-8")).hexdigest()
+
+
+class EvidenceIndex:
+    """Local memory of previously retrieved evidence, searched before the web.
+
+    Evidence is keyed by URL and embedded from its snippet with the shared
+    :class:`EmbeddingService`, the same text the dense reranker encodes, so the embedding cache
+    usually already holds the vectors. Chroma only stores and searches them.
+    """
+
+    def __init__(
+        self,
+        config: StorageConfig | None = None,
+        embeddings: EmbeddingService | None = None,
+        store: VectorStoreManager | None = None,
+    ) -> None:
+        self._config = config or get_settings().storage
+        self._embeddings = embeddings
+        self._store = store
+
+    def _embedding_service(self) -> EmbeddingService:
+        if self._embeddings is None:
+            self._embeddings = get_embedding_service(get_settings().retrieval.embedding_model)
+        return self._embeddings
+
+    def _vector_store(self) -> VectorStoreManager:
+        if self._store is None:
+            self._store = VectorStoreManager(self._config.evidence_collection, self._config.persist_directory)
+        return self._store
+
+    def lookup(self, claims: Sequence[Claim]) -> Dict[str, List[Evidence]]:
+        """Close local hits per claim, best first; hits below ``local_min_similarity`` are dropped."""
+
+        if not claims or self._vector_store().count() == 0:
+            return {claim.identifier: [] for claim in claims}
+        vectors = self._embedding_service().encode([claim.text for claim in claims])
+        batches = self._vector_store().query_embeddings(vectors, k=self._config.local_top_k)
+        found: Dict[str, List[Evidence]] = {}
+        for claim, hits in zip(claims, batches):
+            found[claim.identifier] = [
+                self._to_evidence(hit, 1.0 - hit["distance"])
+                for hit in hits
+                if 1.0 - hit["distance"] >= self._config.local_min_similarity
+            ]
+        return found
+
+    def add(self, evidences: Sequence[Evidence]) -> int:
+        """Upsert evidence in one batch; items without URL or snippet are skipped."""
+
+        unique: Dict[str, Evidence] = {}
+        for evidence in evidences:
+            if evidence.url and evidence.snippet and not evidence.metadata.get("local_index"):
+                unique.setdefault(evidence_id(evidence), evidence)
+        if not unique:
+            return 0
+        items = list(unique.values())
+        vectors = self._embedding_service().encode([evidence.snippet for evidence in items])
+        indexed_at = time.time()
+        self._vector_store().upsert(
+            ids=list(unique.keys()),
+            embeddings=vectors,
+            documents=[evidence.snippet for evidence in items],
+            metadatas=[self._to_metadata(evidence, indexed_at) for evidence in items],
+        )
+        return len(items)
+
+    def count(self) -> int:
+        return self._vector_store().count()
+
+    @staticmethod
+    def _to_metadata(evidence: Evidence, indexed_at: float) -> Dict[str, Any]:
+        metadata: Dict[str, Any] = {
+            "source": evidence.source,
+            "title": evidence.title,
+            "url": evidence.url,
+            "indexed_at": indexed_at,
+        }
+        if evidence.score is not None:
+            metadata["score"] = float(evidence.score)
+        if evidence.published_at:
+            metadata["published_at"] = evidence.published_at
+        return metadata
+
+    @staticmethod
+    def _to_evidence(hit: Dict[str, Any], similarity: float) -> Evidence:
+        metadata = hit["metadata"]
+        return Evidence(
+            source=metadata.get("source", "local"),
+            title=metadata.get("title", ""),
+            url=metadata.get("url", ""),
+            snippet=hit["document"] or "",
+            score=metadata.get("score"),
+            published_at=metadata.get("published_at"),
+            metadata={"local_index": True, "similarity": round(similarity, 4)},
+        )
+
+
+__all__ = ["EvidenceIndex", "evidence_id"]
@@ -0,0 +1,392 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from agents.rerank import tokenize
+
+MANIFEST = "manifest.json"
+LEXICON_DTYPE = np.dtype(
+    [
+        ("hash", "<u8"),
+        ("offset", "<u8"),
+        ("size", "<u4"),
+        ("df", "<u4"),
+        ("max_tf", "<u4"),
+        ("min_len", "<u4"),
+    ]
+)
+
+
+def term_hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def varint_lengths(values: np.ndarray) -> np.ndarray:
+    lengths = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        lengths += rest > 0
+        rest >>= np.uint64(7)
+    return lengths
+
+
+def encode_varints(values: np.ndarray) -> np.ndarray:
+    """LEB128-encode unsigned integers: 7 bits per byte, high bit set on all but the last byte."""
+
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = varint_lengths(values)
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    starts = np.cumsum(lengths) - lengths
+    for byte in range(int(lengths.max(initial=0))):
+        mask = lengths > byte
+        chunk = (values[mask] >> np.uint64(7 * byte)) & np.uint64(0x7F)
+        more = (lengths[mask] > byte + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[mask] + byte] = (chunk | more).astype(np.uint8)
+    return out
+
+
+def decode_varints(buffer: np.ndarray) -> np.ndarray:
+    buffer = np.asarray(buffer, dtype=np.uint8)
+    if not len(buffer):
+        return np.zeros(0, dtype=np.uint64)
+    ends = np.flatnonzero(buffer < 0x80)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    shift = (np.arange(len(buffer)) - np.repeat(starts, ends - starts + 1)) * 7
+    parts = (buffer & 0x7F).astype(np.uint64) << shift.astype(np.uint64)
+    return np.bitwise_or.reduceat(parts, starts)
+
+
+def document_key(document: Dict[str, Any]) -> int:
+    identity = document.get("url") or document.get("id") or f"{document.get('title', '')}\n{document.get('text', '')}"
+    return term_hash(str(identity))
+
+
+def read_corpus(paths: Iterable[str | Path]) -> Iterator[Dict[str, Any]]:
+    """Yield ``{"id", "url", "title", "text"}`` records from JSONL files.
+
+    This is also the format WikiExtractor writes with ``--json``, so Wikipedia dumps can be
+    indexed after extraction without conversion.
+    """
+
+    for path in paths:
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record.get("text"):
+                    yield record
+
+
+@dataclass
+class LocalHit:
+    score: float
+    title: str
+    url: str
+    text: str
+
+
+class _Segment:
+    """One immutable, memory-mapped slice of the index."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        # plain ndarray views over the maps skip np.memmap's per-slice bookkeeping
+        self.lexicon = np.asarray(np.load(directory / "lexicon.npy", mmap_mode="r"))
+        self.hashes = self.lexicon["hash"]
+        self.doc_lengths = np.asarray(np.load(directory / "doc_lengths.npy", mmap_mode="r"))
+        self.doc_offsets = np.asarray(np.load(directory / "doc_offsets.npy", mmap_mode="r"))
+        self.doc_keys = np.asarray(np.load(directory / "doc_keys.npy", mmap_mode="r"))
+        self.postings = self._map(directory / "postings.bin")
+        self.documents = self._map(directory / "docs.jsonl")
+
+    @staticmethod
+    def _map(path: Path) -> np.ndarray:
+        if path.stat().st_size == 0:
+            return np.zeros(0, dtype=np.uint8)
+        return np.asarray(np.memmap(path, dtype=np.uint8, mode="r"))
+
+    def entry(self, key: int) -> Optional[np.void]:
+        position = int(np.searchsorted(self.hashes, np.uint64(key)))
+        if position < len(self.hashes) and int(self.hashes[position]) == key:
+            return self.lexicon[position]
+        return None
+
+    def posting_list(self, entry: np.void) -> Tuple[np.ndarray, np.ndarray]:
+        offset, size, df = int(entry["offset"]), int(entry["size"]), int(entry["df"])
+        values = decode_varints(self.postings[offset : offset + size])
+        return np.cumsum(values[:df]).astype(np.int64), values[df:].astype(np.float64)
+
+    def document(self, doc: int) -> Dict[str, Any]:
+        start, end = int(self.doc_offsets[doc]), int(self.doc_offsets[doc + 1])
+        return json.loads(bytes(self.documents[start:end]))
+
+    def contains(self, key: int) -> bool:
+        position = int(np.searchsorted(self.doc_keys, np.uint64(key)))
+        return position < len(self.doc_keys) and int(self.doc_keys[position]) == key
+
+
+def write_segment(directory: Path, documents: Sequence[Dict[str, Any]], snippet_chars: int) -> Dict[str, int]:
+    """Write one segment: a sorted term-hash lexicon and delta + varint compressed postings."""
+
+    directory.mkdir(parents=True)
+    term_ids: List[int] = []
+    doc_ids: List[int] = []
+    freqs: List[int] = []
+    lengths: List[int] = []
+    offsets = [0]
+    with open(directory / "docs.jsonl", "wb") as handle:
+        for doc, record in enumerate(documents):
+            counts = Counter(tokenize(f"{record.get('title', '')} {record['text']}"))
+            lengths.append(sum(counts.values()))
+            for term, freq in counts.items():
+                term_ids.append(term_hash(term))
+                doc_ids.append(doc)
+                freqs.append(freq)
+            stored = {"title": record.get("title", ""), "url": record.get("url", ""), "text": record["text"][:snippet_chars]}
+            line = (json.dumps(stored, ensure_ascii=False) + "\n").encode("utf-8")
+            handle.write(line)
+            offsets.append(offsets[-1] + len(line))
+
+    doc_lengths = np.asarray(lengths, dtype=np.uint32)
+    hashes = np.asarray(term_ids, dtype=np.uint64)
+    docs = np.asarray(doc_ids, dtype=np.uint64)
+    tfs = np.asarray(freqs, dtype=np.uint64)
+    order = np.lexsort((docs, hashes))
+    hashes, docs, tfs = hashes[order], docs[order], tfs[order]
+    unique, starts, df = np.unique(hashes, return_index=True, return_counts=True)
+
+    # Each posting list is stored as [doc gaps..., term frequencies...].
+    gaps = docs.copy()
+    if len(gaps):
+        gaps[1:] -= docs[:-1]
+        gaps[starts] = docs[starts]
+    term_of = np.repeat(np.arange(len(unique)), df)
+    relative = np.arange(len(docs)) - starts[term_of]
+    values = np.empty(2 * len(docs), dtype=np.uint64)
+    values[2 * starts[term_of] + relative] = gaps
+    values[2 * starts[term_of] + df[term_of] + relative] = tfs
+    encoded = encode_varints(values)
+    encoded.tofile(directory / "postings.bin")
+
+    lexicon = np.zeros(len(unique), dtype=LEXICON_DTYPE)
+    if len(unique):
+        sizes = np.add.reduceat(varint_lengths(values), 2 * starts)
+        lexicon["hash"] = unique
+        lexicon["offset"] = np.cumsum(sizes) - sizes
+        lexicon["size"] = sizes
+        lexicon["df"] = df
+        lexicon["max_tf"] = np.maximum.reduceat(tfs, starts)
+        lexicon["min_len"] = np.minimum.reduceat(doc_lengths[docs.astype(np.int64)], starts)
+    np.save(directory / "lexicon.npy", lexicon)
+    np.save(directory / "doc_lengths.npy", doc_lengths)
+    np.save(directory / "doc_offsets.npy", np.asarray(offsets, dtype=np.uint64))
+    np.save(directory / "doc_keys.npy", np.unique(np.asarray([document_key(d) for d in documents], dtype=np.uint64)))
+    return {"docs": len(documents), "tokens": int(doc_lengths.sum())}
+
+
+class LocalIndex:
+    """Segmented on-disk inverted index queried with BM25 and MaxScore pruning.
+
+    Every segment is immutable and memory-mapped, so resident memory stays flat no matter how
+    many queries run; extending the index writes a new segment and swaps the manifest.
+    Queries are scored term-at-a-time from the highest per-term score bound down: once the
+    remaining terms cannot lift an unseen document into the top ``k``, only existing
+    candidates are updated and hopeless ones are dropped.
+    """
+
+    def __init__(self, directory: str | Path, k1: float = 1.2, b: float = 0.75) -> None:
+        self.directory = Path(directory)
+        self._k1 = k1
+        self._b = b
+        self._lock = threading.Lock()
+        self._segments: List[_Segment] = []
+        self._docs = 0
+        self._tokens = 0
+        self._manifest_mtime: Optional[int] = None
+
+    def _manifest(self) -> Dict[str, Any]:
+        path = self.directory / MANIFEST
+        if not path.exists():
+            return {"segments": [], "docs": 0, "tokens": 0}
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _refresh(self) -> None:
+        path = self.directory / MANIFEST
+        mtime = path.stat().st_mtime_ns if path.exists() else None
+        with self._lock:
+            if mtime == self._manifest_mtime:
+                return
+            manifest = self._manifest()
+            self._segments = [_Segment(self.directory / segment["name"]) for segment in manifest["segments"]]
+            self._docs = manifest["docs"]
+            self._tokens = manifest["tokens"]
+            self._manifest_mtime = mtime
+
+    def __len__(self) -> int:
+        self._refresh()
+        return self._docs
+
+    def add_documents(
+        self,
+        documents: Iterable[Dict[str, Any]],
+        segment_size: int = 50_000,
+        snippet_chars: int = 600,
+    ) -> int:
+        """Index documents whose URL/id is not indexed yet, ``segment_size`` per new segment."""
+
+        self._refresh()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest = self._manifest()
+        pending: List[Dict[str, Any]] = []
+        # keys taken by this run; unlike ``pending`` it survives a flush, so a document repeated
+        # across a segment boundary is not indexed twice
+        seen_keys: set = set()
+        added = 0
+
+        def flush() -> None:
+            nonlocal added
+            if not pending:
+                return
+            name = f"seg-{len(manifest['segments']):05d}"
+            partial_dir = self.directory / f".{name}.partial"
+            shutil.rmtree(partial_dir, ignore_errors=True)
+            stats = write_segment(partial_dir, pending, snippet_chars)
+            partial_dir.rename(self.directory / name)
+            manifest["segments"].append({"name": name, **stats})
+            manifest["docs"] += stats["docs"]
+            manifest["tokens"] += stats["tokens"]
+            partial_manifest = self.directory / (MANIFEST + ".partial")
+            partial_manifest.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+            os.replace(partial_manifest, self.directory / MANIFEST)
+            added += len(pending)
+            pending.clear()
+
+        for document in documents:
+            key = document_key(document)
+            if key in seen_keys or any(segment.contains(key) for segment in self._segments):
+                continue
+            pending.append(document)
+            seen_keys.add(key)
+            if len(pending) >= segment_size:
+                flush()
+        flush()
+        self._refresh()
+        return added
+
+    def clear(self) -> None:
+        for segment in self._manifest()["segments"]:
+            shutil.rmtree(self.directory / segment["name"], ignore_errors=True)
+        (self.directory / MANIFEST).unlink(missing_ok=True)
+        self._refresh()
+
+    def search(self, query: str, k: int = 10) -> List[LocalHit]:
+        self._refresh()
+        segments, n_docs, tokens = self._segments, self._docs, self._tokens
+        weights = Counter(term_hash(term) for term in tokenize(query))
+        if not segments or not weights or k <= 0:
+            return []
+        avg_len = tokens / n_docs if n_docs else 1.0
+
+        entries = {key: [segment.entry(key) for segment in segments] for key in weights}
+        idf: Dict[int, float] = {}
+        for key, per_segment in entries.items():
+            df = sum(int(entry["df"]) for entry in per_segment if entry is not None)
+            if df:
+                idf[key] = math.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+        best_scores = np.zeros(0)
+        best_refs: List[Tuple[int, int]] = []
+        for seg_index, segment in enumerate(segments):
+            terms = [
+                (weights[key] * idf[key], entries[key][seg_index])
+                for key in idf
+                if entries[key][seg_index] is not None
+            ]
+            threshold = best_scores[k - 1] if len(best_scores) >= k else 0.0
+            docs, scores = self._score_segment(segment, terms, threshold, k, avg_len)
+            merged = np.concatenate([best_scores, scores])
+            refs = best_refs + [(seg_index, int(doc)) for doc in docs]
+            order = np.argsort(-merged, kind="stable")[:k]
+            best_scores = merged[order]
+            best_refs = [refs[i] for i in order]
+
+        hits: List[LocalHit] = []
+        for score, (seg_index, doc) in zip(best_scores, best_refs):
+            record = segments[seg_index].document(doc)
+            hits.append(LocalHit(float(score), record.get("title", ""), record.get("url", ""), record.get("text", "")))
+        return hits
+
+    def _score_segment(
+        self,
+        segment: _Segment,
+        terms: List[Tuple[float, np.void]],
+        threshold: float,
+        k: int,
+        avg_len: float,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        k1, b = self._k1, self._b
+
+        def saturate(tf: np.ndarray | float, length: np.ndarray | float) -> np.ndarray | float:
+            return tf * (k1 + 1.0) / (tf + k1 * (1.0 - b + b * length / avg_len))
+
+        # max_tf and the shortest matching document bound every posting's contribution
+        bounds = [weight * saturate(float(entry["max_tf"]), float(entry["min_len"])) for weight, entry in terms]
+        order = np.argsort(bounds)[::-1]
+        remaining = np.concatenate([np.cumsum(np.asarray(bounds)[order][::-1])[::-1], [0.0]])
+
+        cand_docs = np.zeros(0, dtype=np.int64)
+        cand_scores = np.zeros(0)
+        for step, term_index in enumerate(order):
+            weight, entry = terms[term_index]
+            docs, tfs = segment.posting_list(entry)
+            contribution = weight * saturate(tfs, segment.doc_lengths[docs].astype(np.float64))
+            if remaining[step] >= threshold:
+                merged_docs = np.concatenate([cand_docs, docs])
+                unique, inverse = np.unique(merged_docs, return_inverse=True)
+                cand_scores = np.bincount(inverse, weights=np.concatenate([cand_scores, contribution]))
+                cand_docs = unique
+            elif len(cand_docs):
+                positions = np.minimum(np.searchsorted(docs, cand_docs), len(docs) - 1)
+                found = docs[positions] == cand_docs
+                cand_scores[found] += contribution[positions[found]]
+            if len(cand_scores) >= k:
+                threshold = max(threshold, float(np.partition(cand_scores, -k)[-k]))
+            keep = cand_scores + remaining[step + 1] >= threshold
+            cand_docs, cand_scores = cand_docs[keep], cand_scores[keep]
+            if not len(cand_docs) and remaining[step + 1] < threshold:
+                break
+        return cand_docs, cand_scores
+
+
+@lru_cache(maxsize=None)
+def get_local_index(directory: str, k1: float = 1.2, b: float = 0.75) -> LocalIndex:
+    """Shared reader per index directory; segments added by ``extend`` are picked up on the next query."""
+
+    return LocalIndex(directory, k1=k1, b=b)
+
+
+__all__ = [
+    "LocalHit",
+    "LocalIndex",
+    "decode_varints",
+    "encode_varints",
+    "get_local_index",
+    "read_corpus",
+    "write_segment",
+]
@@ -1,41 +1,106 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Iterable, List, Sequence
-
-import chromadb
-from chromadb.config import Settings
+from typing import Any, Dict, List, Sequence
 
 from config.settings import get_settings
 
+try:  # optional chromadb import
+    import chromadb
+    from chromadb.config import Settings
+except Exception:  # pragma: no cover
+    chromadb = None  # type: ignore
+    Settings = None  # type: ignore
+
 
 class VectorStoreManager:
-    def __init__(self, collection_name: str = "fakescope") -> None:
+    """Persistent Chroma collection fed with precomputed embeddings.
+
+    The collection has no embedding function: callers always pass vectors, so Chroma never
+    embeds a second time. Distances are cosine distances (``1 - cosine similarity``).
+    """
+
+    def __init__(self, collection_name: str = "fakescope", persist_directory: str | None = None) -> None:
+        if chromadb is None:
+            raise RuntimeError("chromadb is not installed")
         settings = get_settings()
-        persist_dir = Path(settings.storage.persist_directory)
+        persist_dir = Path(persist_directory or settings.storage.persist_directory)
         persist_dir.mkdir(parents=True, exist_ok=True)
-        self._client = chromadb.Client(Settings(chroma_db_impl="duckdb+parquet", persist_directory=str(persist_dir)))
-        self._collection = self._client.get_or_create_collection(collection_name)
-
-    def add_texts(self, ids: Sequence[str], texts: Sequence[str], metadatas: Sequence[dict] | None = None) -> None:
-        self._collection.add(ids=list(ids), documents=list(texts), metadatas=list(metadatas) if metadatas else None)
-
-    def similarity_search(self, query: str, k: int = 5) -> List[dict]:
-        result = self._collection.query(query_texts=[query], n_results=k)
-        documents = result.get("documents", [[]])[0]
-        metadatas = result.get("metadatas", [[]])[0]
-        ids = result.get("ids", [[]])[0]
-        return [
-            {
-                "id": doc_id,
-                "document": doc,
-                "metadata": metadata or {},
-            }
-            for doc_id, doc, metadata in zip(ids, documents, metadatas)
-        ]
+        self._collection_name = collection_name
+        self._client = chromadb.PersistentClient(path=str(persist_dir), settings=Settings(anonymized_telemetry=False))
+        if settings.storage.reset_on_startup:
+            self.reset()
+        self._collection = self._open_collection()
+
+    def _open_collection(self) -> Any:
+        return self._client.get_or_create_collection(
+            self._collection_name,
+            metadata={"hnsw:space": "cosine"},
+            embedding_function=None,
+        )
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Sequence[str],
+        metadatas: Sequence[dict] | None = None,
+    ) -> None:
+        if not ids:
+            return
+        self._collection.upsert(
+            ids=list(ids),
+            embeddings=[list(map(float, vector)) for vector in embeddings],
+            documents=list(documents),
+            metadatas=list(metadatas) if metadatas else None,
+        )
+
+    def add_texts(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Sequence[dict] | None = None,
+    ) -> None:
+        self.upsert(ids, embeddings, texts, metadatas)
+
+    def query_embeddings(self, embeddings: Sequence[Sequence[float]], k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Nearest neighbours for a batch of query vectors, one hit list per query."""
+
+        if not len(embeddings) or self.count() == 0:
+            return [[] for _ in range(len(embeddings))]
+        result = self._collection.query(
+            query_embeddings=[list(map(float, vector)) for vector in embeddings],
+            n_results=min(k, self.count()),
+            include=["documents", "metadatas", "distances"],
+        )
+        batches: List[List[Dict[str, Any]]] = []
+        for ids, documents, metadatas, distances in zip(
+            result.get("ids", []),
+            result.get("documents", []),
+            result.get("metadatas", []),
+            result.get("distances", []),
+        ):
+            batches.append(
+                [
+                    {"id": doc_id, "document": doc, "metadata": metadata or {}, "distance": distance}
+                    for doc_id, doc, metadata, distance in zip(ids, documents, metadatas, distances)
+                ]
+            )
+        return batches
+
+    def similarity_search(self, query_embedding: Sequence[float], k: int = 5) -> List[dict]:
+        return self.query_embeddings([query_embedding], k=k)[0]
+
+    def count(self) -> int:
+        return self._collection.count()
 
     def reset(self) -> None:
-        self._collection.delete()
+        try:
+            self._client.delete_collection(self._collection_name)
+        except Exception:
+            pass
+        self._collection = self._open_collection()
 
 
 __all__ = ["VectorStoreManager"]
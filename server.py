@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from loguru import logger
+
+from agents.pipeline import FakeScopePipeline
+from agents.types import VerificationTask
+from config.settings import ServerConfig, get_settings
+from services.batch import parse_task, serialize_result
+from services.circuit_breaker import get_breakers
+from services.jobs import Job, JobQueue, JobStatus, QueueClosedError, QueueFullError
+
+try:  # optional ASGI server
+    import uvicorn
+except Exception:  # pragma: no cover
+    uvicorn = None  # type: ignore
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+JOB_PATH = re.compile(r"^/jobs/(?P<job_id>[0-9a-f]{32})(?P<result>/result)?$")
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: List[Tuple[str, str]] | None = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or []
+
+
+class VerificationService:
+    """ASGI application serving verifications from one warm :class:`FakeScopePipeline`.
+
+    ``POST /jobs`` queues a verification (202), ``GET /jobs/{id}`` reports its status and
+    ``GET /jobs/{id}/result`` returns it; ``POST /verify`` waits for the result inline.
+    A saturated queue answers 429 with ``Retry-After``; during shutdown new work gets 503 while
+    accepted jobs are drained.
+    """
+
+    def __init__(self, pipeline: FakeScopePipeline | None = None, config: ServerConfig | None = None) -> None:
+        self._config = config or get_settings().server
+        self._pipeline = pipeline
+        self._owns_pipeline = pipeline is None
+        self.jobs = JobQueue(
+            self._verify,
+            workers=self._config.workers,
+            max_queue=self._config.max_queue,
+            result_ttl_seconds=self._config.result_ttl_seconds,
+            max_results=self._config.max_results,
+        )
+
+    async def _verify(self, task: VerificationTask) -> Dict[str, Any]:
+        assert self._pipeline is not None
+        return serialize_result(await self._pipeline.ainvoke(task))
+
+    async def startup(self) -> None:
+        if self._pipeline is None:
+            self._pipeline = FakeScopePipeline()
+        self.jobs.start()
+        logger.info("Verification service ready with %s workers", self._config.workers)
+
+    async def shutdown(self) -> None:
+        drained = await self.jobs.drain(self._config.drain_timeout_seconds)
+        logger.info("Verification service stopped (drained cleanly: %s)", drained)
+        if self._owns_pipeline and self._pipeline is not None:
+            await self._pipeline.aclose()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            try:
+                status, payload, headers = await self._route(scope, receive)
+            except HTTPError as exc:
+                status, payload, headers = exc.status, {"error": exc.message}, exc.headers
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.exception("Unhandled request error: %s", exc)
+                status, payload, headers = 500, {"error": "internal error"}, []
+            await self._respond(send, status, payload, headers)
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as exc:
+                    await send({"type": "lifespan.startup.failed", "message": str(exc)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _route(self, scope: Scope, receive: Receive) -> Tuple[int, Dict[str, Any], List[Tuple[str, str]]]:
+        method, path = scope["method"], scope["path"].rstrip("/") or "/"
+        if path == "/health" and method == "GET":
+            status = "draining" if self.jobs.closed else "ok"
+            return 200, {"status": status, **self.jobs.stats(), "providers": get_breakers().snapshot()}, []
+        if path == "/jobs" and method == "POST":
+            job = self._submit(await self._read_task(receive))
+            return 202, job.describe(), [("location", f"/jobs/{job.identifier}")]
+        if path == "/verify" and method == "POST":
+            job = self._submit(await self._read_task(receive))
+            try:
+                await asyncio.wait_for(job.done.wait(), self._config.sync_timeout_seconds)
+            except asyncio.TimeoutError:
+                # the job keeps running; the client can poll it
+                return 504, job.describe(), [("location", f"/jobs/{job.identifier}")]
+            return self._result(job)
+        match = JOB_PATH.match(path)
+        if match and method == "GET":
+            job = self.jobs.get(match["job_id"])
+            if job is None:
+                raise HTTPError(404, "unknown or expired job")
+            return self._result(job) if match["result"] else (200, job.describe(), [])
+        if path in ("/health", "/jobs", "/verify") or match:
+            raise HTTPError(405, "method not allowed")
+        raise HTTPError(404, "not found")
+
+    def _submit(self, task: VerificationTask) -> Job:
+        try:
+            return self.jobs.submit(task)
+        except QueueFullError:
+            raise HTTPError(429, "verification queue is full", [("retry-after", str(self.jobs.retry_after()))])
+        except QueueClosedError:
+            raise HTTPError(503, "service is shutting down")
+
+    @staticmethod
+    def _result(job: Job) -> Tuple[int, Dict[str, Any], List[Tuple[str, str]]]:
+        if job.status is JobStatus.DONE:
+            return 200, {**job.describe(), "result": job.result}, []
+        if job.status is JobStatus.FAILED:
+            return 500, job.describe(), []
+        return 202, job.describe(), []
+
+    async def _read_task(self, receive: Receive) -> VerificationTask:
+        body = bytearray()
+        while True:
+            message = await receive()
+            body.extend(message.get("body", b""))
+            if len(body) > self._config.max_body_bytes:
+                raise HTTPError(413, "request body too large")
+            if not message.get("more_body"):
+                break
+        try:
+            payload = json.loads(body or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("expected a JSON object")
+            return parse_task(payload, get_settings().app.default_language)
+        except ValueError as exc:
+            raise HTTPError(400, str(exc))
+
+    @staticmethod
+    async def _respond(send: Send, status: int, payload: Dict[str, Any], headers: List[Tuple[str, str]]) -> None:
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        raw_headers.extend((name.encode(), value.encode()) for name, value in headers)
+        await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def create_app(pipeline: FakeScopePipeline | None = None, config: ServerConfig | None = None) -> VerificationService:
+    return VerificationService(pipeline=pipeline, config=config)
+
+
+app = create_app()
+
+
+def main() -> None:
+    if uvicorn is None:
+        raise SystemExit("uvicorn is not installed; run the ASGI app 'server:app' with any ASGI server")
+    config = get_settings().server
+    # a single process keeps one warm pipeline; scale with ServerConfig.workers instead
+    uvicorn.run(app, host=config.host, port=config.port, lifespan="on")
+
+
+__all__ = ["VerificationService", "app", "create_app"]
+
+
+if __name__ == "__main__":
+    main()
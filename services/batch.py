@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Protocol, Set, Tuple
+
+from loguru import logger
+
+from agents.types import StanceLabel, VerificationTask
+
+
+class SupportsAinvoke(Protocol):
+    async def ainvoke(self, task: VerificationTask, feedback: bool | None = None) -> Dict[str, Any]: ...
+
+
+@dataclass
+class BatchStats:
+    total: int = 0
+    skipped: int = 0
+    succeeded: int = 0
+    failed: int = 0
+
+
+def _label(value: Any) -> str:
+    return value.value if isinstance(value, StanceLabel) else str(value)
+
+
+def serialize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-ready view of a pipeline result: verdict, report and claims with their evidence."""
+
+    verdict = result.get("verdict")
+    return {
+        "language": result.get("language"),
+        "verdict": {"label": _label(verdict.label), "confidence": verdict.confidence} if verdict else None,
+        "report": result.get("report", ""),
+        "claims": [
+            {
+                "id": claim.identifier,
+                "text": claim.text,
+                "stance": _label(claim.stance),
+                "confidence": claim.confidence,
+                "evidences": [
+                    {"source": ev.source, "title": ev.title, "url": ev.url, "snippet": ev.snippet, "score": ev.score}
+                    for ev in claim.evidences
+                ],
+            }
+            for claim in result.get("claims", [])
+        ],
+        "degraded": result.get("degraded", []),
+        "run_metadata": result.get("run_metadata", {}),
+    }
+
+
+def parse_task(record: Dict[str, Any], default_language: str) -> VerificationTask:
+    text = record.get("text") or record.get("input_text")
+    url = record.get("url")
+    if not text and not url:
+        raise ValueError("record needs 'text' or 'url'")
+    return VerificationTask(input_text=text, url=url, language=record.get("language") or default_language)
+
+
+def read_requests(path: str | Path) -> Iterator[Tuple[int, str]]:
+    """Yield ``(index, raw line)`` for every non-blank input line; the index is the line's position."""
+
+    with open(path, encoding="utf-8") as handle:
+        for index, line in enumerate(handle):
+            if line.strip():
+                yield index, line
+
+
+def completed_indices(path: str | Path) -> Set[int]:
+    """Indices already verified in ``path``.
+
+    A line cut short by a crash is truncated away so appending starts on a clean line. Failed
+    items are not counted, so they are retried on resume; the last line for an index wins.
+    """
+
+    output = Path(path)
+    if not output.exists():
+        return set()
+    data = output.read_bytes()
+    complete = data[: data.rfind(b"\n") + 1]
+    if len(complete) != len(data):
+        with output.open("r+b") as handle:
+            handle.truncate(len(complete))
+    done: Set[int] = set()
+    for line in complete.decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if record.get("status") == "ok":
+            done.add(int(record["index"]))
+        else:
+            done.discard(int(record["index"]))
+    return done
+
+
+async def run_batch(
+    pipeline: SupportsAinvoke,
+    input_path: str | Path,
+    output_path: str | Path,
+    concurrency: int = 4,
+    default_language: str = "en",
+) -> BatchStats:
+    """Verify a JSONL backlog with one warm pipeline and at most ``concurrency`` runs in flight.
+
+    Input lines are streamed through a bounded queue, so memory does not grow with the backlog.
+    Each result is appended and flushed as soon as it completes, tagged with its input index.
+    """
+
+    stats = BatchStats()
+    done = completed_indices(output_path)
+    workers = max(1, concurrency)
+    queue: asyncio.Queue[Optional[Tuple[int, str]]] = asyncio.Queue(maxsize=workers * 2)
+
+    with open(output_path, "a", encoding="utf-8") as output:
+
+        def write(record: Dict[str, Any]) -> None:
+            output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            output.flush()
+
+        async def produce() -> None:
+            for index, line in read_requests(input_path):
+                stats.total += 1
+                if index in done:
+                    stats.skipped += 1
+                    continue
+                await queue.put((index, line))
+            for _ in range(workers):
+                await queue.put(None)
+
+        async def work() -> None:
+            while (item := await queue.get()) is not None:
+                index, line = item
+                record: Dict[str, Any] = {"index": index}
+                started = time.perf_counter()
+                try:
+                    payload = json.loads(line)
+                    if isinstance(payload, dict) and "id" in payload:
+                        record["id"] = payload["id"]
+                    result = await pipeline.ainvoke(parse_task(payload, default_language))
+                    record.update(status="ok", result=serialize_result(result))
+                    stats.succeeded += 1
+                except Exception as exc:
+                    logger.warning("Batch item %s failed: %s", index, exc)
+                    record.update(status="error", error=f"{type(exc).__name__}: {exc}")
+                    stats.failed += 1
+                record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+                write(record)
+
+        tasks = [asyncio.ensure_future(produce()), *(asyncio.ensure_future(work()) for _ in range(workers))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # A failed task (unreadable input, a failed write, a cancelled worker) would leave the
+            # others blocked on the queue; stop them all so the error surfaces instead of hanging.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    return stats
+
+
+__all__ = ["BatchStats", "completed_indices", "parse_task", "read_requests", "run_batch", "serialize_result"]
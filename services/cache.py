@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+
+def hash_key(payload: Any) -> str:
+    """Content-address an arbitrary JSON-serialisable payload."""
+
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class PersistentCache:
+    """SQLite-backed key/value cache with TTL expiry and LRU size eviction.
+
+    Values are stored as JSON text. The connection is opened lazily so constructing a cache
+    never touches the filesystem, and every access is serialised through a lock so the cache
+    can be shared between the event loop and worker threads.
+    """
+
+    def __init__(self, path: str | Path, ttl_seconds: float | None = None, max_entries: int | None = None) -> None:
+        self._path = Path(path)
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self._path), check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return ``(value, age_seconds)`` without applying the TTL or touching the counters."""
+
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as exc:
+                logger.debug("Cache lookup failed: %s", exc)
+                return None
+        return json.loads(row[0]), now - row[1]
+
+    def get(self, key: str) -> Optional[Any]:
+        found = self.lookup(key)
+        if found is None or (self._ttl is not None and found[1] > self._ttl):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return found[0]
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        encoded = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, encoded, now, now),
+                )
+                self._evict(conn, now)
+            except sqlite3.Error as exc:
+                logger.debug("Cache write failed: %s", exc)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        if self._ttl is not None:
+            conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self._ttl,))
+        if self._max_entries is not None:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,),
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM entries")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+__all__ = ["PersistentCache", "hash_key"]
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import time
+from contextlib import asynccontextmanager
+from enum import Enum
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict
+
+import httpx
+from loguru import logger
+
+from config.settings import CircuitBreakerConfig, get_settings
+from services.telemetry import get_telemetry
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+    def __init__(self, provider: str, retry_in: float) -> None:
+        super().__init__(f"{provider} circuit is open; next probe in {retry_in:.1f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+def counts_as_failure(exc: BaseException) -> bool:
+    """Outages trip the breaker; a request the provider rejected on its merits (4xx) does not."""
+
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status >= 500 or status in (408, 429)
+    return isinstance(exc, Exception)
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one provider.
+
+    ``failure_threshold`` consecutive failures open the circuit; calls then fail fast with
+    :class:`CircuitOpenError` for ``cooldown_seconds``. After that the breaker is half-open
+    and lets ``half_open_max_calls`` probes through: ``close_after_successes`` successful
+    probes close it again and any failed probe re-opens it for another cool-down.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        config: CircuitBreakerConfig,
+        clock: Callable[[], float] = time.monotonic,
+        on_change: Callable[["CircuitBreaker", BreakerState, BreakerState], None] | None = None,
+    ) -> None:
+        self.name = name
+        self._config = config
+        self._clock = clock
+        self._on_change = on_change
+        self._state = BreakerState.CLOSED
+        self._failures = 0
+        self._probe_successes = 0
+        self._probes = 0
+        self._opened_at = 0.0
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def state(self) -> BreakerState:
+        if self._state is BreakerState.OPEN and self._clock() - self._opened_at >= self._config.cooldown_seconds:
+            self._transition(BreakerState.HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: BreakerState) -> None:
+        previous, self._state = self._state, state
+        if state is BreakerState.OPEN:
+            self._opened_at = self._clock()
+            self.trips += 1
+        if state is not BreakerState.CLOSED:
+            self._probe_successes = self._probes = 0
+        if state is BreakerState.CLOSED:
+            self._failures = 0
+        if self._on_change is not None and previous is not state:
+            self._on_change(self, previous, state)
+
+    def allow(self) -> None:
+        """Admit one call or raise :class:`CircuitOpenError`."""
+
+        state = self.state
+        if state is BreakerState.CLOSED:
+            return
+        if state is BreakerState.HALF_OPEN and self._probes < self._config.half_open_max_calls:
+            self._probes += 1
+            return
+        self.rejected += 1
+        retry_in = max(0.0, self._opened_at + self._config.cooldown_seconds - self._clock())
+        raise CircuitOpenError(self.name, retry_in)
+
+    def record_success(self) -> None:
+        if self._state is BreakerState.HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+            self._probe_successes += 1
+            if self._probe_successes >= self._config.close_after_successes:
+                self._transition(BreakerState.CLOSED)
+            return
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        if self._state is BreakerState.HALF_OPEN:
+            self._transition(BreakerState.OPEN)
+            return
+        self._failures += 1
+        if self._state is BreakerState.CLOSED and self._failures >= self._config.failure_threshold:
+            self._transition(BreakerState.OPEN)
+
+    def _release_probe(self) -> None:
+        if self._state is BreakerState.HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """Run the body as one call through the breaker (fails fast while open)."""
+
+        if not self._config.enabled:
+            yield
+            return
+        self.allow()
+        try:
+            yield
+        except Exception as exc:
+            if counts_as_failure(exc):
+                self.record_failure()
+            else:
+                self._release_probe()
+            raise
+        except BaseException:
+            # cancelled (hedging, deadlines): says nothing about the provider's health
+            self._release_probe()
+            raise
+        else:
+            self.record_success()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self._failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+class BreakerRegistry:
+    """One breaker per provider; state changes are logged and sent to telemetry."""
+
+    def __init__(self, config: CircuitBreakerConfig, clock: Callable[[], float] = time.monotonic) -> None:
+        self._config = config
+        self._clock = clock
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, provider: str) -> CircuitBreaker:
+        if provider not in self._breakers:
+            self._breakers[provider] = CircuitBreaker(provider, self._config, self._clock, on_change=self._report)
+        return self._breakers[provider]
+
+    @staticmethod
+    def _report(breaker: CircuitBreaker, previous: BreakerState, state: BreakerState) -> None:
+        logger.warning("Circuit for %s: %s -> %s", breaker.name, previous.value, state.value)
+        get_telemetry().log_event(
+            None, "circuit_breaker", provider=breaker.name, previous=previous.value, state=state.value, trips=breaker.trips
+        )
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: breaker.snapshot() for name, breaker in sorted(self._breakers.items())}
+
+
+@lru_cache(maxsize=1)
+def get_breakers() -> BreakerRegistry:
+    return BreakerRegistry(get_settings().retrieval.breaker)
+
+
+__all__ = [
+    "BreakerRegistry",
+    "BreakerState",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "counts_as_failure",
+    "get_breakers",
+]
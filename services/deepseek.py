@@ -1,12 +1,20 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict, Iterable, List, Optional
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
 
 import httpx
 from pydantic import BaseModel, Field
 
 from config.settings import DeepSeekConfig, get_settings
+from services.cache import PersistentCache, hash_key
+from services.http import PooledAsyncClient
+from services.ratelimit import RateLimiter, get_rate_limiter
+
+_DEFAULT_CACHE: Any = object()
 
 
 class DeepSeekMessage(BaseModel):
@@ -19,19 +27,68 @@ class DeepSeekResponse(BaseModel):
     model: str
     content: str
     usage: Dict[str, Any] | None = Field(default=None)
+    cached: bool = Field(default=False)
+
+
+class DeepSeekDelta(BaseModel):
+    """One streamed increment; the last one has ``done`` set and carries the usage totals."""
+
+    content: str = ""
+    reasoning: str = ""
+    usage: Dict[str, Any] | None = Field(default=None)
+    done: bool = Field(default=False)
+    cached: bool = Field(default=False)
+
+
+@lru_cache(maxsize=1)
+def get_llm_cache() -> PersistentCache | None:
+    config = get_settings().cache
+    if not config.llm_enabled:
+        return None
+    return PersistentCache(
+        Path(config.directory) / "llm.sqlite",
+        ttl_seconds=config.llm_ttl_seconds,
+        max_entries=config.llm_max_entries,
+    )
 
 
 class DeepSeekClient:
-    """Lightweight HTTP client to interact with DeepSeek chat/completions API."""
+    """Lightweight HTTP client to interact with DeepSeek chat/completions API.
+
+    A single instance owns a pooled, keep-alive connection pool; share it between agents
+    instead of creating one client per agent.
+    """
 
-    def __init__(self, config: DeepSeekConfig | None = None) -> None:
+    def __init__(
+        self,
+        config: DeepSeekConfig | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        cache: PersistentCache | None = _DEFAULT_CACHE,
+        limiter: RateLimiter | None = None,
+    ) -> None:
         self._config = config or get_settings().deepseek
+        self._limiter = limiter or get_rate_limiter()
+        self._cache: PersistentCache | None = get_llm_cache() if cache is _DEFAULT_CACHE else cache
         self._timeout = httpx.Timeout(self._config.timeout_seconds)
+        self._http = PooledAsyncClient(
+            base_url=self._config.api_base,
+            timeout=self._timeout,
+            limits=httpx.Limits(
+                max_connections=self._config.max_connections,
+                max_keepalive_connections=self._config.max_keepalive_connections,
+                keepalive_expiry=self._config.keepalive_expiry,
+            ),
+            http2=self._config.http2,
+            transport=transport,
+        )
 
     @property
     def enabled(self) -> bool:
         return bool(self._config.api_key)
 
+    def cache_stats(self) -> Dict[str, int]:
+        return self._cache.stats() if self._cache else {"hits": 0, "misses": 0}
+
     def _build_headers(self) -> Dict[str, str]:
         if not self._config.api_key:
             raise RuntimeError("DeepSeek API key is not configured")
@@ -40,16 +97,15 @@ class DeepSeekClient:
             "Content-Type": "application/json",
         }
 
-    async def chat(
+    def _payload(
         self,
         messages: Iterable[DeepSeekMessage],
-        model: Optional[str] = None,
-        temperature: float = 0.2,
-        response_format: Optional[Dict[str, Any]] = None,
-    ) -> DeepSeekResponse:
+        model: Optional[str],
+        temperature: float,
+        response_format: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
         if not self.enabled:
             raise RuntimeError("DeepSeek client is disabled because no API key is set")
-
         payload: Dict[str, Any] = {
             "model": model or self._config.model,
             "messages": [message.model_dump() for message in messages],
@@ -57,14 +113,116 @@ class DeepSeekClient:
         }
         if response_format:
             payload["response_format"] = response_format
+        return payload
 
-        async with httpx.AsyncClient(base_url=self._config.api_base, timeout=self._timeout) as client:
-            response = await client.post("/chat/completions", json=payload, headers=self._build_headers())
+    async def chat(
+        self,
+        messages: Iterable[DeepSeekMessage],
+        model: Optional[str] = None,
+        temperature: float = 0.2,
+        response_format: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True,
+    ) -> DeepSeekResponse:
+        payload = self._payload(messages, model, temperature, response_format)
+        cache = self._cache if use_cache else None
+        cache_key = hash_key(payload) if cache else ""
+        if cache:
+            hit = cache.get(cache_key)
+            if hit is not None:
+                return DeepSeekResponse(**hit, cached=True)
+
+        async def post() -> Dict[str, Any]:
+            response = await self._http.get().post("/chat/completions", json=payload, headers=self._build_headers())
             response.raise_for_status()
-            data = response.json()
+            return response.json()
+
+        # 429s, 5xx and dropped connections are retried (honouring Retry-After) under the shared limits.
+        data = await self._limiter.call("deepseek", post, key=self._config.api_key)
 
         content = data["choices"][0]["message"]["content"].strip()
-        return DeepSeekResponse(id=data.get("id", ""), model=data.get("model", ""), content=content, usage=data.get("usage"))
+        result = DeepSeekResponse(id=data.get("id", ""), model=data.get("model", ""), content=content, usage=data.get("usage"))
+        if cache:
+            cache.set(cache_key, result.model_dump(exclude={"cached"}))
+        return result
+
+    async def chat_stream(
+        self,
+        messages: Iterable[DeepSeekMessage],
+        model: Optional[str] = None,
+        temperature: float = 0.2,
+        use_cache: bool = True,
+    ) -> AsyncIterator[DeepSeekDelta]:
+        """Stream a completion over server-sent events, yielding content deltas as they arrive.
+
+        The final delta has ``done=True`` and the usage reported by the API
+        (``stream_options.include_usage``). Completed streams share cache entries with
+        :meth:`chat`, and a cache hit is replayed as a single delta.
+        """
+
+        payload = self._payload(messages, model, temperature, None)
+        cache = self._cache if use_cache else None
+        cache_key = hash_key(payload) if cache else ""
+        if cache:
+            hit = cache.get(cache_key)
+            if hit is not None:
+                yield DeepSeekDelta(content=hit["content"], cached=True)
+                yield DeepSeekDelta(usage=hit.get("usage"), done=True, cached=True)
+                return
+
+        request = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+        parts: List[str] = []
+        meta: Dict[str, Any] = {}
+
+        async def open_stream() -> httpx.Response:
+            client = self._http.get()
+            opened = await client.send(
+                client.build_request("POST", "/chat/completions", json=request, headers=self._build_headers()), stream=True
+            )
+            if opened.is_error:
+                await opened.aread()
+                await opened.aclose()
+                opened.raise_for_status()
+            return opened
+
+        # Only opening the stream is retried: once deltas were yielded a retry would repeat them.
+        response = await self._limiter.call("deepseek", open_stream, key=self._config.api_key)
+        try:
+            async for line in response.aiter_lines():
+                # SSE frames are "data: {...}" lines; ": keep-alive" comments and blanks are skipped
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                meta.setdefault("id", chunk.get("id", ""))
+                meta.setdefault("model", chunk.get("model", ""))
+                if chunk.get("usage"):
+                    meta["usage"] = chunk["usage"]
+                for choice in chunk.get("choices", []):
+                    delta = choice.get("delta") or {}
+                    content, reasoning = delta.get("content") or "", delta.get("reasoning_content") or ""
+                    if content or reasoning:
+                        parts.append(content)
+                        yield DeepSeekDelta(content=content, reasoning=reasoning)
+        finally:
+            await response.aclose()
+
+        result = DeepSeekResponse(
+            id=meta.get("id", ""), model=meta.get("model", ""), content="".join(parts).strip(), usage=meta.get("usage")
+        )
+        if cache:
+            cache.set(cache_key, result.model_dump(exclude={"cached"}))
+        yield DeepSeekDelta(usage=result.usage, done=True)
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def __aenter__(self) -> "DeepSeekClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
 
     def chat_blocking(
         self,
@@ -72,10 +230,20 @@ class DeepSeekClient:
         model: Optional[str] = None,
         temperature: float = 0.2,
         response_format: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True,
     ) -> DeepSeekResponse:
         """Run an async chat request from sync context."""
 
-        return asyncio.run(self.chat(messages, model=model, temperature=temperature, response_format=response_format))
+        async def chat_once() -> DeepSeekResponse:
+            try:
+                return await self.chat(
+                    messages, model=model, temperature=temperature, response_format=response_format, use_cache=use_cache
+                )
+            finally:
+                # the pool belongs to this short-lived loop; close it before asyncio.run discards the loop
+                await self.aclose()
+
+        return asyncio.run(chat_once())
 
 
-__all__ = ["DeepSeekClient", "DeepSeekMessage", "DeepSeekResponse"]
+__all__ = ["DeepSeekClient", "DeepSeekDelta", "DeepSeekMessage", "DeepSeekResponse", "get_llm_cache"]
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx
+from loguru import logger
+
+
+class PooledAsyncClient:
+    """Lazily creates one pooled ``httpx.AsyncClient`` per running event loop.
+
+    Connections in an ``httpx.AsyncClient`` are bound to the loop that opened them, while the
+    CLI and Streamlit entry points call ``asyncio.run`` once per verification, sometimes on
+    several threads at once. Each loop therefore gets its own pool. Whoever ends a loop
+    should ``await aclose()`` on it first: that closes this loop's pool, and a later ``get()``
+    builds a fresh one. Pools of loops that finished without it are dropped on the next call.
+    """
+
+    def __init__(
+        self,
+        *,
+        base_url: str = "",
+        timeout: httpx.Timeout | float | None = None,
+        limits: httpx.Limits | None = None,
+        http2: bool = False,
+        transport: httpx.AsyncBaseTransport | None = None,
+        **client_kwargs: Any,
+    ) -> None:
+        self._base_url = base_url
+        self._timeout = timeout if timeout is not None else httpx.Timeout(30)
+        self._limits = limits or httpx.Limits()
+        self._http2 = http2
+        self._transport = transport
+        self._client_kwargs = client_kwargs
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _build(self) -> httpx.AsyncClient:
+        kwargs: Dict[str, Any] = dict(
+            base_url=self._base_url,
+            timeout=self._timeout,
+            limits=self._limits,
+            transport=self._transport,
+            **self._client_kwargs,
+        )
+        if self._http2:
+            try:
+                return httpx.AsyncClient(http2=True, **kwargs)
+            except ImportError:
+                logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+                self._http2 = False
+        return httpx.AsyncClient(**kwargs)
+
+    def _drop_finished(self) -> None:
+        for loop in [loop for loop in self._clients if loop.is_closed()]:
+            # Nothing can be awaited on a finished loop; its sockets are released when the pool is collected.
+            logger.debug("Dropping an HTTP pool left open by a closed event loop")
+            del self._clients[loop]
+
+    def get(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._drop_finished()
+            client = self._clients.get(loop)
+            if client is None or client.is_closed:
+                client = self._clients[loop] = self._build()
+            return client
+
+    async def aclose(self) -> None:
+        """Close the running loop's pool; pools other live loops are using are left to them."""
+
+        with self._lock:
+            self._drop_finished()
+            client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+
+__all__ = ["PooledAsyncClient"]
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from agents.types import VerificationTask
+
+JobRunner = Callable[[VerificationTask], Awaitable[Dict[str, Any]]]
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the bounded queue is saturated; callers should retry later."""
+
+
+class QueueClosedError(RuntimeError):
+    """Raised once the queue is draining and no longer accepts work."""
+
+
+@dataclass
+class Job:
+    identifier: str
+    task: VerificationTask
+    status: JobStatus = JobStatus.QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    result: Dict[str, Any] | None = None
+    error: str | None = None
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.identifier,
+            "status": self.status.value,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """Bounded verification queue drained by a fixed pool of worker tasks.
+
+    At most ``max_queue`` jobs wait and ``workers`` run at once; further submissions raise
+    :class:`QueueFullError` instead of queueing unbounded work. Finished jobs are kept for
+    ``result_ttl_seconds`` (at most ``max_results`` of them) so clients can fetch results.
+    """
+
+    def __init__(
+        self,
+        runner: JobRunner,
+        workers: int = 2,
+        max_queue: int = 32,
+        result_ttl_seconds: float = 3600,
+        max_results: int = 1000,
+    ) -> None:
+        self._runner = runner
+        self._workers = max(1, workers)
+        self._max_queue = max(1, max_queue)
+        self._result_ttl = result_ttl_seconds
+        self._max_results = max_results
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue[Job]] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running = 0
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._closed = False
+        self._tasks = [asyncio.create_task(self._work(), name=f"fakescope-job-{i}") for i in range(self._workers)]
+
+    def submit(self, task: VerificationTask) -> Job:
+        if self._closed or self._queue is None:
+            raise QueueClosedError("service is shutting down")
+        if self._queue.qsize() >= self._max_queue:
+            raise QueueFullError(f"{self._queue.qsize()} jobs already queued")
+        self._evict()
+        job = Job(identifier=uuid.uuid4().hex, task=task)
+        self._jobs[job.identifier] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, identifier: str) -> Job | None:
+        return self._jobs.get(identifier)
+
+    def retry_after(self) -> int:
+        """Rough seconds until a queue slot frees up, from recent job durations."""
+
+        durations = [
+            job.finished_at - job.started_at
+            for job in self._jobs.values()
+            if job.finished_at is not None and job.started_at is not None
+        ][-20:]
+        average = sum(durations) / len(durations) if durations else 5.0
+        return max(1, round(average * max(1, self.queued) / self._workers))
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        finished = [job for job in self._jobs.values() if job.status in (JobStatus.DONE, JobStatus.FAILED)]
+        return {
+            "queued": self.queued,
+            "running": self._running,
+            "workers": self._workers,
+            "max_queue": self._max_queue,
+            "completed": sum(job.status is JobStatus.DONE for job in finished),
+            "failed": sum(job.status is JobStatus.FAILED for job in finished),
+            "closed": self._closed,
+        }
+
+    async def _work(self) -> None:
+        assert self._queue is not None
+        while True:
+            job = await self._queue.get()
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+            self._running += 1
+            try:
+                job.result = await self._runner(job.task)
+                job.status = JobStatus.DONE
+            except asyncio.CancelledError:
+                job.status, job.error = JobStatus.FAILED, "cancelled during shutdown"
+                raise
+            except Exception as exc:
+                logger.warning("Job %s failed: %s", job.identifier, exc)
+                job.status, job.error = JobStatus.FAILED, f"{type(exc).__name__}: {exc}"
+            finally:
+                self._running -= 1
+                job.finished_at = time.time()
+                job.done.set()
+                self._queue.task_done()
+
+    async def drain(self, timeout: float | None = None) -> bool:
+        """Stop accepting jobs, let queued and running ones finish, then stop the workers.
+
+        Returns ``False`` when ``timeout`` expired and unfinished jobs had to be cancelled.
+        """
+
+        self._closed = True
+        finished = True
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                finished = False
+                logger.warning("Drain timed out with %s queued and %s running jobs", self.queued, self._running)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                job = self._queue.get_nowait()
+                job.status, job.error, job.finished_at = JobStatus.FAILED, "cancelled during shutdown", time.time()
+                job.done.set()
+        return finished
+
+    def _evict(self) -> None:
+        cutoff = time.time() - self._result_ttl
+        for identifier, job in list(self._jobs.items()):
+            if job.finished_at is None:
+                continue
+            if job.finished_at < cutoff or len(self._jobs) >= self._max_results:
+                del self._jobs[identifier]
+
+
+__all__ = ["Job", "JobQueue", "JobRunner", "JobStatus", "QueueClosedError", "QueueFullError"]
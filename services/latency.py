@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class LatencyTracker:
+    """Rolling window of recent call durations per provider, queried by quantile.
+
+    Used to decide when a search is late enough to hedge: only the last ``window`` calls of
+    each provider count, so the estimate follows the provider as its latency drifts.
+    """
+
+    def __init__(self, window: int = 256, min_samples: int = 8) -> None:
+        self._window = max(1, window)
+        self._min_samples = max(1, min_samples)
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, provider: str, seconds: float) -> None:
+        samples = self._samples.get(provider)
+        if samples is None:
+            samples = self._samples[provider] = deque(maxlen=self._window)
+        samples.append(seconds)
+
+    def quantile(self, provider: str, q: float) -> Optional[float]:
+        """Nearest-rank ``q`` quantile in seconds, or ``None`` until enough calls were seen."""
+
+        samples = self._samples.get(provider)
+        if not samples or len(samples) < self._min_samples:
+            return None
+        ordered = sorted(samples)
+        rank = min(len(ordered), max(1, math.ceil(q * len(ordered))))
+        return ordered[rank - 1]
+
+    def count(self, provider: str) -> int:
+        return len(self._samples.get(provider, ()))
+
+
+__all__ = ["LatencyTracker"]
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import weakref
+from typing import Awaitable, Callable, Generic, List, Optional, Sequence, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class _Window(Generic[T, R]):
+    """Items submitted on one event loop since its window opened."""
+
+    def __init__(self) -> None:
+        self.items: List[T] = []
+        self.callers: List[Tuple[int, int, "asyncio.Future[List[R]]"]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher(Generic[T, R]):
+    """Coalesces concurrent submissions into one call of ``func``.
+
+    The first submission opens a window of ``window`` seconds; everything submitted on the
+    same loop before it closes (or until ``max_items`` are waiting) goes to ``func`` in one
+    list, and each caller gets back the results for its own items, in order. ``func`` must
+    return one result per item. A caller that is cancelled or times out only drops its own
+    results; the batch still completes for the others.
+    """
+
+    def __init__(self, func: Callable[[List[T]], Awaitable[List[R]]], window: float, max_items: Optional[int] = None) -> None:
+        self._func = func
+        self._window = max(0.0, window)
+        self._max_items = max_items
+        # Futures can only be resolved on their own loop, so each loop batches separately.
+        self._windows: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Window[T, R]]" = weakref.WeakKeyDictionary()
+        self._running: Set[asyncio.Task] = set()
+
+    async def submit(self, items: Sequence[T]) -> List[R]:
+        if not items:
+            return []
+        if self._window <= 0:
+            return await self._func(list(items))
+        loop = asyncio.get_running_loop()
+        window = self._windows.get(loop)
+        if window is None:
+            window = self._windows[loop] = _Window()
+            window.timer = loop.call_later(self._window, self._flush, loop)
+        future: "asyncio.Future[List[R]]" = loop.create_future()
+        window.callers.append((len(window.items), len(items), future))
+        window.items.extend(items)
+        if self._max_items is not None and len(window.items) >= self._max_items:
+            self._flush(loop)
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        window = self._windows.pop(loop, None)
+        if window is None:
+            return
+        if window.timer is not None:
+            window.timer.cancel()
+        task = loop.create_task(self._run(window))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, window: _Window[T, R]) -> None:
+        try:
+            results = await self._func(window.items)
+        except asyncio.CancelledError:
+            for _, _, future in window.callers:
+                future.cancel()
+            raise
+        except Exception as exc:
+            for _, _, future in window.callers:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for start, count, future in window.callers:
+            if not future.done():
+                future.set_result(results[start : start + count])
+
+
+__all__ = ["MicroBatcher"]
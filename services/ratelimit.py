@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+import httpx
+from loguru import logger
+
+from config.settings import ProviderLimitConfig, RateLimitConfig, get_settings
+from services.cache import hash_key
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class RateLimitError(Exception):
+    """Raised by a provider that was throttled; ``retry_after`` is in seconds when known."""
+
+    def __init__(self, message: str = "rate limited", retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or an HTTP date)."""
+
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class Failure:
+    retryable: bool
+    throttled: bool = False
+    retry_after: Optional[float] = None
+
+
+def classify(exc: BaseException) -> Failure:
+    """Decide whether a failed call is worth retrying and whether it was a throttling signal."""
+
+    if isinstance(exc, RateLimitError):
+        return Failure(retryable=True, throttled=True, retry_after=exc.retry_after)
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        retry_after = parse_retry_after(exc.response.headers.get("retry-after"))
+        return Failure(retryable=status in RETRYABLE_STATUS, throttled=status in (429, 503), retry_after=retry_after)
+    if isinstance(exc, (httpx.TransportError, asyncio.TimeoutError)):
+        return Failure(retryable=True)
+    # SDKs without HTTP status codes (ddgs, tavily) name their throttling/timeout exceptions.
+    name = type(exc).__name__.lower()
+    if "ratelimit" in name or "usagelimit" in name:
+        return Failure(retryable=True, throttled=True)
+    if "timeout" in name:
+        return Failure(retryable=True)
+    return Failure(retryable=False)
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, holding at most ``burst``.
+
+    ``defer`` empties the bucket until a point in time, so one ``Retry-After`` answer holds
+    back every caller sharing the bucket instead of each of them finding out separately.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, float(burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._resume_at = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return how long the caller must wait before using it."""
+
+        now = time.monotonic()
+        if self._resume_at > self._updated:
+            # nothing accrues while deferred; the first caller may go right at the resume time
+            self._tokens, self._updated = min(self._tokens, 1.0), self._resume_at
+        if now > self._updated:
+            self._refill(now)
+        self._tokens -= 1.0
+        # A negative balance queues callers behind each other at the refill rate.
+        return max(0.0, self._updated - now) + max(0.0, -self._tokens) / self.rate
+
+    async def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def defer(self, seconds: float) -> None:
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+
+class _LoopSlots:
+    """Requests in flight and parked waiters of one event loop."""
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+
+
+class AIMDLimiter:
+    """Adaptive concurrency limit: additive increase on success, multiplicative decrease on throttling.
+
+    The limit grows by about one slot per limit's worth of successful calls and is cut by
+    ``decrease`` at most once per ``cooldown`` seconds, so one burst of 429s counts once.
+    The limit is shared, but slots and waiters are kept per event loop: a future can only be
+    woken on its own loop, and the UI runs sessions on several loops at once.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 32,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        cooldown: float = 1.0,
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(self.maximum, max(self.minimum, initial)))
+        self._increase = increase
+        self._decrease = decrease
+        self._cooldown = cooldown
+        self._last_decrease = float("-inf")
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopSlots]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(slots.in_flight for slots in self._loops.values())
+
+    def _slots(self) -> _LoopSlots:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            slots = self._loops.get(loop)
+            if slots is None:
+                slots = self._loops[loop] = _LoopSlots()
+            return slots
+
+    def _wake(self, slots: _LoopSlots) -> None:
+        while slots.waiters and slots.in_flight < int(self.limit):
+            waiter = slots.waiters.popleft()
+            if not waiter.done():
+                slots.in_flight += 1
+                waiter.set_result(None)
+
+    async def acquire(self) -> None:
+        slots = self._slots()
+        if slots.in_flight < int(self.limit) and not slots.waiters:
+            slots.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        slots.waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        slots = self._slots()
+        slots.in_flight = max(0, slots.in_flight - 1)
+        self._wake(slots)
+
+    def on_success(self) -> None:
+        self.limit = min(float(self.maximum), self.limit + self._increase / max(1.0, self.limit))
+        self._wake(self._slots())
+
+    def on_throttle(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self._cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.minimum), self.limit * self._decrease)
+
+
+class RateLimiter:
+    """Shared throttling and retry layer for DeepSeek and the search providers.
+
+    Each provider has an AIMD concurrency limit, and each (provider, API key) pair a token
+    bucket. :meth:`call` retries transient failures with full-jitter exponential backoff,
+    waiting at least as long as a ``Retry-After`` header asks.
+    """
+
+    def __init__(self, config: RateLimitConfig) -> None:
+        self._config = config
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._limiters: Dict[str, AIMDLimiter] = {}
+        self.retries = 0
+        self.throttled = 0
+
+    def _provider(self, provider: str) -> ProviderLimitConfig:
+        return self._config.providers.get(provider) or self._config.default
+
+    def bucket(self, provider: str, key: Optional[str] = None) -> Optional[TokenBucket]:
+        limits = self._provider(provider)
+        if not limits.rate_per_second:
+            return None
+        # API keys are only used as dictionary keys; hash them so they are not kept in clear.
+        slot = (provider, hash_key(key) if key else "")
+        if slot not in self._buckets:
+            self._buckets[slot] = TokenBucket(limits.rate_per_second, limits.burst)
+        return self._buckets[slot]
+
+    def limiter(self, provider: str) -> AIMDLimiter:
+        if provider not in self._limiters:
+            limits = self._provider(provider)
+            self._limiters[provider] = AIMDLimiter(
+                initial=limits.initial_concurrency or limits.max_concurrency,
+                minimum=limits.min_concurrency,
+                maximum=limits.max_concurrency,
+                increase=self._config.aimd_increase,
+                decrease=self._config.aimd_decrease,
+                cooldown=self._config.aimd_cooldown_seconds,
+            )
+        return self._limiters[provider]
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        ceiling = min(self._config.backoff_max_ms, self._config.backoff_base_ms * (2**attempt)) / 1000
+        delay = random.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = min(self._config.max_retry_after_seconds, retry_after) + delay * 0.1
+        return delay
+
+    @asynccontextmanager
+    async def slot(self, provider: str, key: Optional[str] = None) -> AsyncIterator[None]:
+        """Wait for the provider's token bucket and a concurrency slot, then run the body once."""
+
+        bucket = self.bucket(provider, key)
+        if bucket is not None:
+            await bucket.acquire()
+        limiter = self.limiter(provider)
+        await limiter.acquire()
+        try:
+            yield
+        except BaseException as exc:
+            failure = classify(exc) if isinstance(exc, Exception) else Failure(retryable=False)
+            if failure.throttled:
+                self.throttled += 1
+                limiter.on_throttle()
+                if failure.retry_after and bucket is not None:
+                    bucket.defer(min(self._config.max_retry_after_seconds, failure.retry_after))
+            raise
+        else:
+            limiter.on_success()
+        finally:
+            limiter.release()
+
+    async def call(self, provider: str, func: Callable[[], Awaitable[T]], key: Optional[str] = None) -> T:
+        """Run ``func`` under the provider's limits, retrying transient failures up to ``max_retries`` times."""
+
+        if not self._config.enabled:
+            return await func()
+        attempt = 0
+        while True:
+            try:
+                async with self.slot(provider, key):
+                    return await func()
+            except Exception as exc:
+                failure = classify(exc)
+                if not failure.retryable or attempt >= self._config.max_retries:
+                    raise
+                delay = self.backoff(attempt, failure.retry_after)
+                attempt += 1
+                self.retries += 1
+                logger.debug("%s call failed (%s); retry %d in %.2fs", provider, exc, attempt, delay)
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, float]:
+        limits = {f"{name}_limit": round(limiter.limit, 2) for name, limiter in self._limiters.items()}
+        return {"retries": self.retries, "throttled": self.throttled, **limits}
+
+
+@lru_cache(maxsize=1)
+def get_rate_limiter() -> RateLimiter:
+    return RateLimiter(get_settings().ratelimit)
+
+
+__all__ = [
+    "AIMDLimiter",
+    "Failure",
+    "RateLimitError",
+    "RateLimiter",
+    "TokenBucket",
+    "classify",
+    "get_rate_limiter",
+    "parse_retry_after",
+]
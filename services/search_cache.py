@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import re
+from dataclasses import asdict
+from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from agents.types import Evidence
+from config.settings import CacheConfig, get_settings
+from services.cache import PersistentCache, hash_key
+
+
+class Freshness(str, Enum):
+    FRESH = "fresh"
+    STALE = "stale"
+    MISS = "miss"
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class SearchCache:
+    """Per-provider TTL cache for search results with a stale-while-revalidate window.
+
+    An entry younger than its provider TTL is ``FRESH``. Past the TTL it stays ``STALE`` for
+    ``stale_seconds`` more, during which callers serve it and refresh it in the background;
+    after that it is a ``MISS``.
+    """
+
+    def __init__(self, config: CacheConfig, store: PersistentCache | None = None) -> None:
+        self._ttls = dict(config.search_ttl_seconds)
+        self._default_ttl = config.search_default_ttl_seconds
+        self._stale = config.search_stale_seconds
+        longest = max([self._default_ttl, *self._ttls.values()])
+        self._store = store or PersistentCache(
+            Path(config.directory) / "search.sqlite",
+            ttl_seconds=longest + self._stale,
+            max_entries=config.search_max_entries,
+        )
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def ttl_for(self, provider: str) -> int:
+        return self._ttls.get(provider, self._default_ttl)
+
+    def key(self, provider: str, query: str, language: str, max_documents: int) -> str:
+        return hash_key([provider, normalize_query(query), language, max_documents])
+
+    def get(self, key: str, provider: str) -> Tuple[Freshness, Optional[List[Evidence]]]:
+        found = self._store.lookup(key)
+        if found is None:
+            self.misses += 1
+            return Freshness.MISS, None
+        payload, age = found
+        ttl = self.ttl_for(provider)
+        if age <= ttl:
+            self.hits += 1
+            return Freshness.FRESH, [Evidence(**item) for item in payload]
+        if age <= ttl + self._stale:
+            self.stale_hits += 1
+            return Freshness.STALE, [Evidence(**item) for item in payload]
+        self.misses += 1
+        return Freshness.MISS, None
+
+    def set(self, key: str, evidences: List[Evidence]) -> None:
+        self._store.set(key, [asdict(evidence) for evidence in evidences])
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses}
+
+
+@lru_cache(maxsize=1)
+def get_search_cache() -> SearchCache | None:
+    config = get_settings().cache
+    if not config.search_enabled:
+        return None
+    return SearchCache(config)
+
+
+__all__ = ["Freshness", "SearchCache", "get_search_cache", "normalize_query"]
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import random
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from agents.rerank import tokenize
+from agents.types import Evidence
+from config.settings import StubSearchConfig
+
+
+class StubSearchError(RuntimeError):
+    """Injected provider failure."""
+
+
+class StubSearchProvider:
+    """Deterministic offline search provider for load tests and benchmarks.
+
+    Fixture records are ranked by token overlap with the query; queries matching no fixture get
+    results synthesised from the query itself, so every call returns evidence. Latency and
+    failures are drawn from an RNG seeded with ``(seed, provider, query, call number)``, which
+    keeps a run reproducible however the concurrent calls interleave.
+    """
+
+    def __init__(self, config: StubSearchConfig) -> None:
+        self._config = config
+        self._fixtures = self._load_fixtures(config.fixtures_path)
+        self._fixture_terms = [
+            set(tokenize(f"{item.get('title', '')} {item.get('snippet', '')} {' '.join(item.get('keywords', []))}"))
+            for item in self._fixtures
+        ]
+        self._calls: Counter = Counter()
+
+    @staticmethod
+    def _load_fixtures(path: str | None) -> List[Dict[str, object]]:
+        if not path or not Path(path).exists():
+            return []
+        with open(path, encoding="utf-8") as handle:
+            return [json.loads(line) for line in handle if line.strip()]
+
+    def _rng(self, provider: str, query: str) -> random.Random:
+        self._calls[(provider, query)] += 1
+        material = f"{self._config.seed}|{provider}|{query}|{self._calls[(provider, query)]}"
+        return random.Random(hashlib.blake2b(material.encode("utf-8"), digest_size=8).digest())
+
+    def latency(self, rng: random.Random) -> float:
+        """Seconds to wait for one call, drawn from the configured distribution."""
+
+        mean, jitter = self._config.latency_ms, self._config.latency_jitter_ms
+        kind = self._config.latency
+        if kind == "uniform":
+            value = rng.uniform(mean - jitter, mean + jitter)
+        elif kind == "normal":
+            value = rng.gauss(mean, jitter)
+        elif kind == "lognormal":
+            value = rng.lognormvariate(0.0, self._config.latency_sigma) * mean
+        elif kind == "exponential":
+            value = rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+        else:
+            value = mean
+        return max(value, 0.0) / 1000.0
+
+    def _matches(self, query: str, limit: int) -> List[Tuple[int, int]]:
+        terms = set(tokenize(query))
+        scored = [(len(terms & fixture_terms), idx) for idx, fixture_terms in enumerate(self._fixture_terms)]
+        return sorted((item for item in scored if item[0] > 0), key=lambda item: (-item[0], item[1]))[:limit]
+
+    def _synthesise(self, provider: str, query: str, limit: int) -> List[Evidence]:
+        digest = hashlib.blake2b(f"{provider}|{query}".encode("utf-8"), digest_size=6).hexdigest()
+        return [
+            Evidence(
+                source=provider,
+                title=f"{query} ({rank + 1})",
+                url=f"https://stub.invalid/{provider}/{digest}/{rank + 1}",
+                snippet=f"Synthetic {provider} result {rank + 1} about {query}.",
+                score=round(1.0 - rank / max(limit, 1), 4),
+                metadata={"stub": True},
+            )
+            for rank in range(limit)
+        ]
+
+    async def search(self, provider: str, query: str, limit: int | None = None) -> List[Evidence]:
+        limit = self._config.results if limit is None else limit
+        rng = self._rng(provider, query)
+        delay = self.latency(rng)
+        failed = rng.random() < self._config.failure_rate
+        if delay:
+            await asyncio.sleep(delay)
+        if failed:
+            raise StubSearchError(f"injected {provider} failure for '{query}'")
+
+        matches = self._matches(query, limit)
+        if not matches:
+            return self._synthesise(provider, query, limit)
+        top = matches[0][0]
+        evidences: List[Evidence] = []
+        for overlap, idx in matches:
+            item = self._fixtures[idx]
+            evidences.append(
+                Evidence(
+                    source=str(item.get("source") or provider),
+                    title=str(item.get("title", "")),
+                    url=str(item.get("url", "")),
+                    snippet=str(item.get("snippet", "")),
+                    score=round(overlap / top, 4),
+                    published_at=item.get("published_at"),
+                    metadata={"stub": True},
+                )
+            )
+        return evidences
+
+
+__all__ = ["StubSearchError", "StubSearchProvider"]
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import httpx
+
+from agents.types import Evidence
+from services.http import PooledAsyncClient
+
+DEFAULT_API_URL = "https://{language}.wikipedia.org/w/api.php"
+USER_AGENT = "FakeScope-Agent/1.0 (https://github.com/Ricardouchub/FakeScope-Agent)"
+
+
+def wiki_language(language: str) -> str:
+    if not language or language in ("auto", "unknown"):
+        return "en"
+    return language
+
+
+class WikipediaClient:
+    """Async MediaWiki API client.
+
+    A search is a single ``action=query`` request that uses ``list=search`` as a generator and
+    pulls plain-text intro extracts and canonical URLs for every hit in the same round-trip.
+    The language is part of the URL (``api_url`` is formatted with ``{language}``), so no
+    global state is touched and a local stub server can stand in for Wikipedia.
+    """
+
+    def __init__(
+        self,
+        api_url: str = DEFAULT_API_URL,
+        timeout: httpx.Timeout | float | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._api_url = api_url
+        self._http = PooledAsyncClient(
+            timeout=timeout if timeout is not None else httpx.Timeout(20),
+            transport=transport,
+            headers={"User-Agent": USER_AGENT},
+        )
+
+    def _endpoint(self, language: str) -> str:
+        return self._api_url.format(language=wiki_language(language))
+
+    async def search(self, query: str, language: str, limit: int = 5, snippet_chars: int = 500) -> List[Evidence]:
+        params: Dict[str, Any] = {
+            "action": "query",
+            "format": "json",
+            "formatversion": 2,
+            "generator": "search",
+            "gsrsearch": query,
+            "gsrlimit": limit,
+            "prop": "extracts|info",
+            "exintro": 1,
+            "explaintext": 1,
+            "exlimit": "max",
+            "inprop": "url",
+            "redirects": 1,
+        }
+        response = await self._http.get().get(self._endpoint(language), params=params)
+        response.raise_for_status()
+        data = response.json()
+
+        pages = data.get("query", {}).get("pages", [])
+        if isinstance(pages, dict):  # formatversion=1 style payloads
+            pages = list(pages.values())
+        # ``index`` carries the search rank; page order in the payload is not guaranteed.
+        pages = sorted((page for page in pages if not page.get("missing")), key=lambda page: page.get("index", 0))
+        evidences: List[Evidence] = []
+        for page in pages:
+            extract = (page.get("extract") or "").strip()
+            if not extract:
+                continue
+            evidences.append(
+                Evidence(
+                    source="wikipedia",
+                    title=page.get("title", ""),
+                    url=page.get("fullurl") or page.get("canonicalurl", ""),
+                    snippet=extract[:snippet_chars],
+                )
+            )
+        return evidences
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+__all__ = ["WikipediaClient", "DEFAULT_API_URL", "wiki_language"]
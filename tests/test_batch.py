@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import pytest
+
+from agents.types import Claim, StanceLabel, Verdict
+from services.batch import completed_indices, run_batch
+
+
+class _FakePipeline:
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.seen = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def ainvoke(self, task, feedback=None):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        self.seen.append(task.input_text)
+        # later inputs finish first, so completion order differs from input order
+        await asyncio.sleep(0.05 / (len(self.seen) + 1))
+        self.in_flight -= 1
+        if task.input_text in self.fail_on:
+            raise RuntimeError("boom")
+        claim = Claim(identifier="c1", text=task.input_text, stance=StanceLabel.SUPPORTS, confidence=0.9)
+        return {"verdict": Verdict(label=StanceLabel.SUPPORTS, confidence=0.9), "claims": [claim], "report": "ok"}
+
+
+def _write_input(path, count):
+    lines = [json.dumps({"id": f"r{i}", "text": f"claim {i}"}) for i in range(count)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _read_output(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_batch_bounds_concurrency_and_tags_results_with_input_index(tmp_path):
+    source, target = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(source, 8)
+    pipeline = _FakePipeline(fail_on={"claim 5"})
+
+    stats = await run_batch(pipeline, source, target, concurrency=3)
+
+    records = _read_output(target)
+    assert pipeline.peak == 3
+    assert (stats.total, stats.succeeded, stats.failed, stats.skipped) == (8, 7, 1, 0)
+    assert sorted(record["index"] for record in records) == list(range(8))
+    assert [record["index"] for record in records] != list(range(8))
+    failed = next(record for record in records if record["status"] == "error")
+    assert failed["id"] == "r5" and "boom" in failed["error"]
+    ok = next(record for record in records if record["index"] == 0)
+    assert ok["result"]["verdict"] == {"label": "supports", "confidence": 0.9}
+
+
+@pytest.mark.asyncio
+async def test_batch_resumes_after_a_crash(tmp_path):
+    source, target = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(source, 4)
+    done = [{"index": 0, "status": "ok"}, {"index": 2, "status": "error", "error": "boom"}]
+    # the last record was cut off mid-write
+    target.write_text("".join(json.dumps(r) + "\n" for r in done) + '{"index": 1, "sta', encoding="utf-8")
+
+    assert completed_indices(target) == {0}
+    pipeline = _FakePipeline()
+    stats = await run_batch(pipeline, source, target, concurrency=2)
+
+    assert sorted(pipeline.seen) == ["claim 1", "claim 2", "claim 3"]
+    assert (stats.skipped, stats.succeeded) == (1, 3)
+    assert completed_indices(target) == {0, 1, 2, 3}
+
+
+@pytest.mark.asyncio
+async def test_failed_write_stops_the_batch_instead_of_hanging(tmp_path, monkeypatch):
+    source, target = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(source, 20)
+    dumps = json.dumps
+
+    def failing_dumps(record, **kwargs):
+        if isinstance(record, dict) and "elapsed_seconds" in record:
+            raise OSError("disk full")
+        return dumps(record, **kwargs)
+
+    monkeypatch.setattr("services.batch.json.dumps", failing_dumps)
+
+    with pytest.raises(OSError, match="disk full"):
+        await asyncio.wait_for(run_batch(_FakePipeline(), source, target, concurrency=1), timeout=5)
+
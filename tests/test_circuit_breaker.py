@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from agents.retrieval import EvidenceRetriever
+from agents.types import Claim, Evidence
+from config.settings import CircuitBreakerConfig, RateLimitConfig, RetrievalConfig
+from services.circuit_breaker import BreakerRegistry, BreakerState, CircuitOpenError
+from services.ratelimit import RateLimiter
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _breakers(clock, **overrides):
+    return BreakerRegistry(CircuitBreakerConfig(**{"failure_threshold": 3, "cooldown_seconds": 10, **overrides}), clock=clock)
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_fails_fast_and_recovers_through_half_open():
+    clock = _Clock()
+    breaker = _breakers(clock).get("duckduckgo")
+
+    async def call(outcome):
+        async with breaker.guard():
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+
+    for _ in range(3):
+        with pytest.raises(httpx.ConnectTimeout):
+            await call(httpx.ConnectTimeout("down"))
+    assert breaker.state is BreakerState.OPEN
+    with pytest.raises(CircuitOpenError):
+        await call("never runs")
+
+    clock.now = 10
+    assert breaker.state is BreakerState.HALF_OPEN
+    with pytest.raises(httpx.ConnectTimeout):
+        await call(httpx.ConnectTimeout("still down"))
+    assert breaker.state is BreakerState.OPEN
+
+    clock.now = 20
+    assert await call("ok") == "ok"
+    assert breaker.snapshot() == {"state": "closed", "consecutive_failures": 0, "trips": 2, "rejected": 1}
+
+
+@pytest.mark.asyncio
+async def test_client_errors_and_cancellation_do_not_trip_the_breaker():
+    breaker = _breakers(_Clock(), failure_threshold=1).get("tavily")
+    request = httpx.Request("GET", "https://example.invalid")
+    with pytest.raises(httpx.HTTPStatusError):
+        async with breaker.guard():
+            raise httpx.HTTPStatusError("bad", request=request, response=httpx.Response(400, request=request))
+    with pytest.raises(asyncio.CancelledError):
+        async with breaker.guard():
+            raise asyncio.CancelledError()
+    assert breaker.state is BreakerState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_retriever_skips_a_provider_with_an_open_circuit():
+    breakers = _breakers(_Clock(), failure_threshold=2)
+    retriever = EvidenceRetriever(
+        RetrievalConfig(search_provider="duckduckgo"),
+        cache=None,
+        limiter=RateLimiter(RateLimitConfig(enabled=False)),
+        breakers=breakers,
+    )
+    calls = []
+
+    async def fake_wikipedia(query, language):
+        return [Evidence(source="wikipedia", title=query, url=f"wiki/{query}", snippet="")]
+
+    async def hanging_duckduckgo(query):
+        calls.append(query)
+        await asyncio.sleep(0.05)
+        raise httpx.ReadTimeout("no answer")
+
+    retriever._search_wikipedia = fake_wikipedia
+    retriever._search_duckduckgo = hanging_duckduckgo
+    claim = Claim(identifier="a", text="A", language="en")
+
+    for query in ("q1", "q2"):
+        await retriever._retrieve_for_query(claim, query)
+    started = time.perf_counter()
+    found = await retriever._retrieve_for_query(claim, "q3")
+    await retriever.aclose()
+
+    assert time.perf_counter() - started < 0.04
+    assert [ev.url for ev in found] == ["wiki/q3"]
+    assert calls == ["q1", "q2"]
+    assert retriever.breaker_states()["duckduckgo"]["state"] == "open"
+    assert retriever.breaker_states()["wikipedia"]["state"] == "closed"
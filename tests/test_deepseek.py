@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from config.settings import DeepSeekConfig
+from services.cache import PersistentCache
+from services.deepseek import DeepSeekClient, DeepSeekMessage
+from services.http import PooledAsyncClient
+
+
+def _completion_handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        200,
+        json={
+            "id": "cmpl-1",
+            "model": "deepseek-chat",
+            "choices": [{"message": {"role": "assistant", "content": " hello "}}],
+            "usage": {"total_tokens": 3},
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_chat_reuses_pooled_client():
+    client = DeepSeekClient(DeepSeekConfig(api_key="test"), transport=httpx.MockTransport(_completion_handler), cache=None)
+    messages = [DeepSeekMessage(role="user", content="hi")]
+
+    first = await client.chat(messages)
+    pooled = client._http.get()
+    second = await client.chat(messages)
+
+    assert first.content == second.content == "hello"
+    assert client._http.get() is pooled
+    await client.aclose()
+    assert pooled.is_closed
+
+
+def test_chat_blocking_rebuilds_pool_per_event_loop():
+    client = DeepSeekClient(DeepSeekConfig(api_key="test"), transport=httpx.MockTransport(_completion_handler), cache=None)
+    messages = [DeepSeekMessage(role="user", content="hi")]
+
+    built = []
+    build = client._http._build
+    client._http._build = lambda: built.append(build()) or built[-1]
+
+    assert client.chat_blocking(messages).content == "hello"
+    assert client.chat_blocking(messages).content == "hello"
+
+    # each short-lived loop got its own pool and closed it before the loop went away
+    assert len(built) == 2 and all(pool.is_closed for pool in built)
+    assert len(client._http._clients) == 0
+
+
+def test_pools_of_other_loops_are_left_to_them_and_dropped_once_finished():
+    pooled = PooledAsyncClient(transport=httpx.MockTransport(_completion_handler))
+    other_loop = asyncio.new_event_loop()
+
+    async def use():
+        return pooled.get()
+
+    other = other_loop.run_until_complete(use())
+
+    async def close_mine():
+        mine = pooled.get()
+        await pooled.aclose()
+        return mine
+
+    mine = asyncio.run(close_mine())
+    assert mine is not other and mine.is_closed and not other.is_closed
+
+    other_loop.run_until_complete(other.aclose())
+    other_loop.close()
+    asyncio.run(close_mine())
+    assert len(pooled._clients) == 0
+
+
+@pytest.mark.asyncio
+async def test_chat_serves_repeated_completions_from_cache(tmp_path):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return _completion_handler(request)
+
+    cache = PersistentCache(tmp_path / "llm.sqlite", ttl_seconds=60, max_entries=10)
+    client = DeepSeekClient(DeepSeekConfig(api_key="test"), transport=httpx.MockTransport(handler), cache=cache)
+    messages = [DeepSeekMessage(role="user", content="hi")]
+
+    first = await client.chat(messages, temperature=0.2)
+    second = await client.chat(messages, temperature=0.2)
+    bypassed = await client.chat(messages, temperature=0.2, use_cache=False)
+    other = await client.chat(messages, temperature=0.7)
+
+    assert not first.cached and second.cached and not bypassed.cached and not other.cached
+    assert second.content == first.content
+    assert len(calls) == 3
+    assert client.cache_stats() == {"hits": 1, "misses": 2}
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_yields_deltas_and_caches_the_completion(tmp_path):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(request.content))
+        chunks = [{"choices": [{"delta": {"content": text}}]} for text in ("Hel", "lo", " world")]
+        chunks.append({"choices": [], "usage": {"total_tokens": 7}})
+        body = ": keep-alive\n\n" + "".join(f"data: {json.dumps({'id': 'c1', **chunk})}\n\n" for chunk in chunks)
+        return httpx.Response(200, text=body + "data: [DONE]\n\n", headers={"content-type": "text/event-stream"})
+
+    cache = PersistentCache(tmp_path / "llm.sqlite", ttl_seconds=60, max_entries=10)
+    client = DeepSeekClient(DeepSeekConfig(api_key="test"), transport=httpx.MockTransport(handler), cache=cache)
+    messages = [DeepSeekMessage(role="user", content="hi")]
+
+    streamed = [delta async for delta in client.chat_stream(messages)]
+    replayed = [delta async for delta in client.chat_stream(messages)]
+
+    assert [delta.content for delta in streamed[:-1]] == ["Hel", "lo", " world"]
+    assert streamed[-1].done and streamed[-1].usage == {"total_tokens": 7}
+    assert calls[0]["stream"] and calls[0]["stream_options"] == {"include_usage": True}
+    assert len(calls) == 1 and replayed[0].cached and replayed[0].content == "Hello world"
+    assert (await client.chat(messages)).content == "Hello world"
+    await client.aclose()
+
+
+def test_persistent_cache_evicts_least_recently_used(tmp_path):
+    cache = PersistentCache(tmp_path / "cache.sqlite", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
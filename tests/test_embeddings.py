@@ -0,0 +1,57 @@
+import numpy as np
+
+from rag.embedding_cache import EmbeddingCache
+from rag.embeddings import EmbeddingService
+
+
+class _CountingService(EmbeddingService):
+    def __init__(self, cache):
+        super().__init__("test/model", cache=cache)
+        self.encoded = []
+
+    def _encode_with_model(self, texts):
+        self.encoded.extend(texts)
+        vectors = np.array([[len(text), text.count("a") + 1.0, 1.0] for text in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_model_only_runs_on_cache_misses_across_instances(tmp_path):
+    first = _CountingService(EmbeddingCache(tmp_path, "test/model"))
+    vectors = first.encode(["alpha", "beta", "alpha"])
+    assert first.encoded == ["alpha", "beta"]
+    assert np.allclose(vectors[0], vectors[2])
+
+    reopened = _CountingService(EmbeddingCache(tmp_path, "test/model"))
+    again = reopened.encode(["beta", "gamma", "alpha"])
+
+    assert reopened.encoded == ["gamma"]
+    assert np.allclose(again[0], vectors[1], atol=1e-3)
+    assert np.allclose(np.linalg.norm(again, axis=1), 1.0)
+    assert reopened._cache.stats() == {"hits": 2, "misses": 1, "rows": 3}
+
+
+def test_cache_ignores_a_vector_written_without_its_key(tmp_path):
+    cache = EmbeddingCache(tmp_path, "test/model", dtype="float32")
+    cache.add_many(["one"], np.ones((1, 4), dtype=np.float32))
+    with (tmp_path / "test--model" / "vectors.bin").open("ab") as fh:
+        fh.write(np.full(4, 7, dtype=np.float32).tobytes())
+
+    reopened = EmbeddingCache(tmp_path, "test/model")
+    assert len(reopened) == 1
+    reopened.add_many(["two"], np.full((1, 4), 2, dtype=np.float32))
+
+    final = EmbeddingCache(tmp_path, "test/model")
+    one, two = final.get_many(["one", "two"])
+    assert np.array_equal(one, np.ones(4)) and np.array_equal(two, np.full(4, 2))
+
+
+def test_duplicates_within_one_batch_are_stored_once(tmp_path):
+    cache = EmbeddingCache(tmp_path, "test/model", dtype="float32")
+    texts = [f"text {i % 50}" for i in range(2_000)]
+    vectors = np.arange(len(texts) * 2, dtype=np.float32).reshape(-1, 2)
+
+    cache.add_many(texts, vectors)
+
+    assert len(cache) == 50
+    # the first occurrence of each text wins
+    assert np.array_equal(cache.get_many(["text 7"])[0], vectors[7])
@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("chromadb")
+
+from agents.deadline import Deadline
+from agents.retrieval import EvidenceRetriever
+from agents.types import Claim, Evidence
+from config.settings import RetrievalConfig, StorageConfig, StubSearchConfig
+from rag.embeddings import EmbeddingService
+from rag.evidence_index import EvidenceIndex
+from rag.vectorstore import VectorStoreManager
+
+TOPICS = ["tower", "rain", "football"]
+
+
+class _TopicService(EmbeddingService):
+    """One axis per topic word, so similarity is predictable."""
+
+    def __init__(self):
+        super().__init__("test/topics", cache=None)
+        self.encoded = []
+
+    def _encode_with_model(self, texts):
+        self.encoded.extend(texts)
+        vectors = np.array([[text.lower().count(topic) for topic in TOPICS] + [0.1] for text in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _index(tmp_path, service, **overrides):
+    config = StorageConfig(persist_directory=str(tmp_path), evidence_index_enabled=True, local_min_hits=1, **overrides)
+    store = VectorStoreManager(config.evidence_collection, config.persist_directory)
+    return EvidenceIndex(config, embeddings=service, store=store), config
+
+
+def test_index_returns_close_evidence_and_upserts_by_url(tmp_path):
+    index, _ = _index(tmp_path, _TopicService())
+    tower = Evidence(source="wikipedia", title="Tower", url="https://a/tower", snippet="The tower is tall", score=0.9)
+    rain = Evidence(source="duckduckgo", title="Rain", url="https://a/rain", snippet="Heavy rain in spring")
+    assert index.add([tower, rain, tower]) == 2
+    assert index.add([tower]) == 1
+    assert index.count() == 2
+
+    found = index.lookup([Claim(identifier="c1", text="Where is the tower?"), Claim(identifier="c2", text="football")])
+
+    assert [ev.url for ev in found["c1"]] == ["https://a/tower"]
+    assert found["c1"][0].source == "wikipedia" and found["c1"][0].score == pytest.approx(0.9)
+    assert found["c1"][0].metadata["local_index"] is True
+    assert found["c2"] == []
+
+
+@pytest.mark.asyncio
+async def test_retriever_only_searches_web_for_claims_missing_local_recall(tmp_path):
+    service = _TopicService()
+    index, storage = _index(tmp_path, service)
+    index.add([Evidence(source="wikipedia", title="Tower", url="https://a/tower", snippet="The tower is tall")])
+    # a silent stub stands in for the web provider
+    config = RetrievalConfig(search_provider="stub", stub=StubSearchConfig(results=0, stub_wikipedia=False))
+    retriever = EvidenceRetriever(config, cache=None, index=index, storage=storage)
+    searched = []
+
+    async def fake_wikipedia(query, language):
+        searched.append(query)
+        return [Evidence(source="wikipedia", title=query, url=f"https://w/{query}", snippet=f"{query} rain facts")]
+
+    retriever._search_wikipedia = fake_wikipedia
+    claims = [Claim(identifier="a", text="The tower"), Claim(identifier="b", text="The rain")]
+    result = await retriever.run({"claims": claims, "plan": {"a": ["tower q"], "b": ["rain q"]}})
+    await asyncio.gather(*retriever._remembering)
+    await retriever.aclose()
+
+    assert searched == ["rain q"]
+    assert [ev.url for ev in result["evidences"]["a"]] == ["https://a/tower"]
+    assert [ev.url for ev in result["evidences"]["b"]] == ["https://w/rain q"]
+    # web evidence was remembered for the next run
+    assert index.count() == 2
+    assert "rain q rain facts" in service.encoded
+
+
+@pytest.mark.asyncio
+async def test_remembering_evidence_does_not_hold_up_retrieval(tmp_path):
+    index, storage = _index(tmp_path, _TopicService())
+    config = RetrievalConfig(search_provider="stub", stub=StubSearchConfig(results=0, stub_wikipedia=False))
+    retriever = EvidenceRetriever(config, cache=None, index=index, storage=storage)
+    stored = []
+
+    def slow_add(evidences):
+        time.sleep(0.3)
+        stored.extend(evidences)
+        return len(evidences)
+
+    async def fake_wikipedia(query, language):
+        return [Evidence(source="wikipedia", title=query, url=f"https://w/{query}", snippet=f"{query} rain facts")]
+
+    index.add = slow_add
+    retriever._search_wikipedia = fake_wikipedia
+
+    started = time.perf_counter()
+    result = await retriever.run({"claims": [Claim(identifier="b", text="The rain")], "plan": {"b": ["rain q"]}})
+
+    assert time.perf_counter() - started < 0.2
+    assert [ev.url for ev in result["evidences"]["b"]] == ["https://w/rain q"]
+    assert len(retriever._remembering) == 1 and stored == []
+    await asyncio.gather(*retriever._remembering)
+    assert [ev.url for ev in stored] == ["https://w/rain q"]
+    await retriever.aclose()
+
+
+@pytest.mark.asyncio
+async def test_slow_local_lookup_is_cut_at_the_retrieval_budget(tmp_path):
+    index, storage = _index(tmp_path, _TopicService())
+    config = RetrievalConfig(search_provider="stub", stub=StubSearchConfig(results=0, stub_wikipedia=False))
+    retriever = EvidenceRetriever(config, cache=None, index=index, storage=storage)
+
+    def slow_lookup(claims):
+        time.sleep(0.5)
+        return {}
+
+    async def fake_wikipedia(query, language):
+        return [Evidence(source="wikipedia", title=query, url=f"https://w/{query}", snippet=query)]
+
+    index.lookup = slow_lookup
+    retriever._search_wikipedia = fake_wikipedia
+    state = {
+        "claims": [Claim(identifier="b", text="The rain")],
+        "plan": {"b": ["rain q"]},
+        "deadline": Deadline.split(0.1, {"retriever": 1.0}),
+    }
+
+    started = time.perf_counter()
+    result = await retriever.run(state)
+    await retriever.aclose()
+
+    # the lookup used up the budget, so the run ends on time with what it has
+    assert time.perf_counter() - started < 0.4
+    assert result["evidences"]["b"] == [] and result["degraded"] == ["retriever"]
+
@@ -0,0 +1,118 @@
+import math
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from agents.rerank import tokenize
+from agents.retrieval import EvidenceRetriever
+from config.settings import RetrievalConfig
+from rag.local_index import LocalIndex, decode_varints, encode_varints
+
+
+def _corpus(count, seed=7):
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(300)]
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    return [
+        {"url": f"https://corpus/{i}", "title": f"doc {i}", "text": " ".join(rng.choices(words, weights, k=rng.randint(3, 60)))}
+        for i in range(count)
+    ]
+
+
+def _exhaustive_bm25(documents, query, k, k1=1.2, b=0.75):
+    counts = [Counter(tokenize(f"{doc['title']} {doc['text']}")) for doc in documents]
+    lengths = [sum(c.values()) for c in counts]
+    avg_len = sum(lengths) / len(documents)
+    df = Counter(term for c in counts for term in c)
+    scores = []
+    for c, length, doc in zip(counts, lengths, documents):
+        score = 0.0
+        for term, weight in Counter(tokenize(query)).items():
+            if term in c:
+                idf = math.log1p((len(documents) - df[term] + 0.5) / (df[term] + 0.5))
+                score += weight * idf * c[term] * (k1 + 1) / (c[term] + k1 * (1 - b + b * length / avg_len))
+        if score > 0:
+            scores.append((score, doc["url"]))
+    scores.sort(key=lambda item: -item[0])
+    return scores[:k]
+
+
+def test_varints_roundtrip():
+    values = np.array([0, 1, 127, 128, 16_383, 16_384, 2**32 - 1], dtype=np.uint64)
+    encoded = encode_varints(values)
+    assert len(encoded) == 1 + 1 + 1 + 2 + 2 + 3 + 5
+    assert decode_varints(encoded).tolist() == values.tolist()
+
+
+def test_pruned_search_matches_exhaustive_bm25_across_segments(tmp_path):
+    documents = _corpus(600)
+    index = LocalIndex(tmp_path)
+    assert index.add_documents(documents, segment_size=250) == 600
+    assert len(index._segments) == 3
+
+    for query in ["w0 w7 w250", "w1 w2 w3 w4 w5", "w299", "doc w12 w12"]:
+        expected = _exhaustive_bm25(documents, query, k=5)
+        hits = index.search(query, k=5)
+        assert [hit.score for hit in hits] == pytest.approx([score for score, _ in expected])
+    assert index.search("unknownterm", k=5) == []
+
+
+@pytest.mark.parametrize("segment_size", [1, 37, 1000])
+def test_maxscore_top_k_matches_brute_force_bm25_on_random_queries(tmp_path, segment_size):
+    documents = _corpus(150, seed=segment_size)
+    index = LocalIndex(tmp_path)
+    index.add_documents(documents, segment_size=segment_size)
+
+    rng = random.Random(segment_size)
+    for _ in range(25):
+        query = " ".join(f"w{rng.randrange(300)}" for _ in range(rng.randint(1, 6)))
+        k = rng.choice([1, 3, 10])
+        expected = _exhaustive_bm25(documents, query, k=k)
+        hits = index.search(query, k=k)
+        assert [hit.score for hit in hits] == pytest.approx([score for score, _ in expected])
+        # URLs agree wherever the score is not tied with a neighbour
+        expected_urls = {url for score, url in expected if [s for s, _ in expected].count(score) == 1}
+        assert expected_urls <= {hit.url for hit in hits}
+
+
+def test_duplicates_across_a_segment_boundary_are_indexed_once(tmp_path):
+    documents = _corpus(3)
+    index = LocalIndex(tmp_path)
+
+    added = index.add_documents([documents[0], documents[1], documents[0], documents[2], documents[1]], segment_size=1)
+
+    assert added == 3
+    assert len(index) == 3 and len(index._segments) == 3
+    assert [hit.url for hit in index.search(documents[0]["text"], k=5)].count(documents[0]["url"]) == 1
+
+
+def test_extend_skips_known_documents_and_is_visible_to_open_readers(tmp_path):
+    documents = _corpus(120)
+    reader = LocalIndex(tmp_path)
+    LocalIndex(tmp_path).add_documents(documents[:80])
+    assert len(reader) == 80
+
+    added = LocalIndex(tmp_path).add_documents(documents[40:] + [{"url": "https://new", "title": "Zebra", "text": "zebra facts"}])
+
+    assert added == 41
+    assert len(reader) == 121
+    assert reader.search("zebra", k=3)[0].url == "https://new"
+
+
+@pytest.mark.asyncio
+async def test_local_provider_serves_index_hits(tmp_path):
+    LocalIndex(tmp_path).add_documents(
+        [
+            {"url": "https://local/eiffel", "title": "Eiffel Tower", "text": "The Eiffel Tower is in Paris."},
+            {"url": "https://local/rome", "title": "Colosseum", "text": "The Colosseum is in Rome."},
+        ]
+    )
+    retriever = EvidenceRetriever(RetrievalConfig(search_provider="local", local_index_path=str(tmp_path)), cache=None, index=None)
+
+    evidences = await retriever._search_local("Where is the Eiffel Tower?")
+    await retriever.aclose()
+
+    assert [ev.url for ev in evidences] == ["https://local/eiffel", "https://local/rome"]
+    assert evidences[0].source == "local" and evidences[0].score == pytest.approx(1.0)
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from services.microbatch import MicroBatcher
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submissions_share_one_call_and_get_their_own_results():
+    calls = []
+
+    async def double(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, window=0.02)
+
+    first, second, empty = await asyncio.gather(batcher.submit([1, 2]), batcher.submit([3]), batcher.submit([]))
+
+    assert calls == [[1, 2, 3]]
+    assert (first, second, empty) == ([2, 4], [6], [])
+
+
+@pytest.mark.asyncio
+async def test_full_window_flushes_early_and_a_cancelled_caller_does_not_fail_the_batch():
+    calls = []
+
+    async def slow_double(items):
+        calls.append(list(items))
+        await asyncio.sleep(0.05)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(slow_double, window=5, max_items=3)
+
+    impatient = asyncio.ensure_future(batcher.submit([1]))
+    patient = asyncio.ensure_future(batcher.submit([2, 3]))
+    await asyncio.sleep(0.01)
+    impatient.cancel()
+
+    assert await asyncio.wait_for(patient, timeout=1) == [4, 6]
+    assert calls == [[1, 2, 3]]
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller_of_the_batch():
+    async def failing(items):
+        raise RuntimeError("model crashed")
+
+    batcher = MicroBatcher(failing, window=0.01)
+
+    results = await asyncio.gather(batcher.submit([1]), batcher.submit([2]), return_exceptions=True)
+
+    assert [str(result) for result in results] == ["model crashed", "model crashed"]
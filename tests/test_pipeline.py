@@ -1,9 +1,12 @@
 import asyncio
+import time
 
 import pytest
 
 from agents.pipeline import FakeScopePipeline
-from agents.types import VerificationTask
+from agents.types import Evidence, PipelineEventKind, VerificationTask
+from config.settings import DeepSeekConfig
+from services.deepseek import DeepSeekClient
 
 
 @pytest.mark.asyncio
@@ -25,3 +28,97 @@ async def test_pipeline_executes_with_minimal_input(monkeypatch):
     assert "verdict" in result
     assert result["verdict"].label.value in {"unknown", "supports", "refutes", "neutral", "mixed"}
     assert isinstance(result.get("report"), str)
+
+
+@pytest.mark.asyncio
+async def test_astream_yields_progress_events_before_the_final_state(monkeypatch):
+    pipeline = FakeScopePipeline()
+
+    async def fake_retrieve_for_query(self, claim, query):
+        return [Evidence(source="stub", title=query, url=f"https://stub/{query}", snippet="The Eiffel Tower is in Paris.")]
+
+    monkeypatch.setattr(pipeline.retriever, "_retrieve_for_query", fake_retrieve_for_query.__get__(pipeline.retriever))
+
+    task = VerificationTask(input_text="The Eiffel Tower is located in Paris.", language="en")
+    events = [event async for event in pipeline.astream(task)]
+    await pipeline.aclose()
+
+    kinds = [event.kind for event in events if event.kind is not PipelineEventKind.NODE]
+    assert kinds[:3] == [PipelineEventKind.CLAIMS, PipelineEventKind.PLAN, PipelineEventKind.EVIDENCE]
+    assert kinds[-3:] == [PipelineEventKind.VERDICT, PipelineEventKind.REPORT, PipelineEventKind.DONE]
+    assert PipelineEventKind.STANCE in kinds
+    evidence = next(event for event in events if event.kind is PipelineEventKind.EVIDENCE)
+    assert evidence.claim_id and evidence.data[0].url.startswith("https://stub/")
+    done = events[-1]
+    assert done.data["report"] == next(e.data for e in events if e.kind is PipelineEventKind.REPORT)
+    assert [event.elapsed for event in events] == sorted(event.elapsed for event in events)
+
+
+@pytest.mark.asyncio
+async def test_claims_run_through_independent_branches(monkeypatch):
+    pipeline = FakeScopePipeline(deepseek=DeepSeekClient(DeepSeekConfig(api_key=""), cache=None))
+
+    async def fake_retrieve_for_query(self, claim, query):
+        if "Great Wall" in claim.text:
+            await asyncio.sleep(0.3)
+        return [Evidence(source="stub", title=query, url=f"https://stub/{claim.identifier}", snippet=claim.text)]
+
+    monkeypatch.setattr(pipeline.retriever, "_retrieve_for_query", fake_retrieve_for_query.__get__(pipeline.retriever))
+
+    text = "The Eiffel Tower is located in Paris, France. The Great Wall of China is visible from space."
+    events = [event async for event in pipeline.astream(VerificationTask(input_text=text, language="en"))]
+    await pipeline.aclose()
+
+    fast_stance = next(i for i, e in enumerate(events) if e.kind is PipelineEventKind.STANCE and e.claim_id == "claim-1")
+    slow_evidence = next(i for i, e in enumerate(events) if e.kind is PipelineEventKind.EVIDENCE and e.claim_id == "claim-2")
+    assert fast_stance < slow_evidence
+    result = events[-1].data
+    assert [claim.identifier for claim in result["claims"]] == ["claim-1", "claim-2"]
+    assert set(result["plan"]) == set(result["evidences"]) == set(result["stance_results"]) == {"claim-1", "claim-2"}
+    assert all(claim.evidences for claim in result["claims"])
+
+
+@pytest.mark.asyncio
+async def test_branches_reaching_rerank_together_share_one_batch(monkeypatch):
+    pipeline = FakeScopePipeline(deepseek=DeepSeekClient(DeepSeekConfig(api_key=""), cache=None))
+    batches = []
+    rerank_many = pipeline.reranker.rerank_many
+
+    async def fake_retrieve_for_query(self, claim, query):
+        return [Evidence(source="stub", title=query, url=f"https://stub/{claim.identifier}", snippet=claim.text)]
+
+    def spy_rerank_many(claims, candidates):
+        batches.append({claim.identifier for claim in claims})
+        return rerank_many(claims, candidates)
+
+    monkeypatch.setattr(pipeline.retriever, "_retrieve_for_query", fake_retrieve_for_query.__get__(pipeline.retriever))
+    monkeypatch.setattr(pipeline.reranker, "rerank_many", spy_rerank_many)
+
+    text = "The Eiffel Tower is located in Paris, France. The Great Wall of China is visible from space."
+    result = await pipeline.ainvoke(VerificationTask(input_text=text, language="en"))
+    await pipeline.aclose()
+
+    assert batches == [{"claim-1", "claim-2"}]
+    assert [claim.evidences[0].url for claim in result["claims"]] == ["https://stub/claim-1", "https://stub/claim-2"]
+
+
+@pytest.mark.asyncio
+async def test_deadline_cuts_slow_searches_and_records_degraded_stages(monkeypatch):
+    pipeline = FakeScopePipeline(deepseek=DeepSeekClient(DeepSeekConfig(api_key=""), cache=None))
+
+    async def fake_retrieve_for_query(self, claim, query):
+        if query.startswith("verify"):
+            await asyncio.sleep(30)
+        return [Evidence(source="stub", title=query, url=f"https://stub/{query}", snippet=claim.text)]
+
+    monkeypatch.setattr(pipeline.retriever, "_retrieve_for_query", fake_retrieve_for_query.__get__(pipeline.retriever))
+
+    task = VerificationTask(input_text="The Eiffel Tower is located in Paris, France.", language="en")
+    started = time.perf_counter()
+    result = await pipeline.ainvoke(task, deadline=1.0)
+    await pipeline.aclose()
+
+    assert time.perf_counter() - started < 2.0
+    assert result["degraded"] == ["retriever"]
+    assert [ev.title for ev in result["claims"][0].evidences] == [task.input_text]
+    assert result["run_metadata"]["deadline_seconds"] == 1.0
@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+
+from agents.query_planner import QueryPlanner
+from agents.types import Claim
+from config.settings import PlannerConfig
+from services.deepseek import DeepSeekResponse
+
+
+class FakeDeepSeek:
+    enabled = True
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.in_flight = 0
+        self.peak = 0
+
+    async def chat(self, messages, **kwargs):
+        prompt = messages[-1].content
+        claim_text = prompt.split("CLAIM: ", 1)[1].split("\n", 1)[0]
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(claim_text, 0.01))
+            if claim_text == "broken claim":
+                raise RuntimeError("boom")
+            return DeepSeekResponse(id="1", model="m", content=json.dumps({"queries": [f"q {claim_text}"]}))
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.mark.asyncio
+async def test_planner_runs_claims_concurrently_and_falls_back_per_claim():
+    claims = [Claim(identifier=f"c{i}", text=text) for i, text in enumerate(["slow claim", "broken claim", "fast claim", "other claim"])]
+    client = FakeDeepSeek({"slow claim": 0.05, "fast claim": 0.0})
+    planner = QueryPlanner(client=client, config=PlannerConfig(max_concurrency=2, timeout_seconds=5))
+
+    result = await planner.run({"claims": claims})
+
+    assert list(result["plan"]) == ["c0", "c1", "c2", "c3"]
+    assert [claim.identifier for claim in result["claims"]] == ["c0", "c1", "c2", "c3"]
+    assert result["plan"]["c0"] == ["q slow claim"]
+    assert result["plan"]["c1"] == planner._fallback(claims[1])
+    assert client.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_planner_timeout_falls_back_for_that_claim_only():
+    claims = [Claim(identifier="a", text="hanging claim"), Claim(identifier="b", text="quick claim")]
+    client = FakeDeepSeek({"hanging claim": 1.0})
+    planner = QueryPlanner(client=client, config=PlannerConfig(max_concurrency=4, timeout_seconds=0.05))
+
+    result = await planner.run({"claims": claims})
+
+    assert result["plan"]["a"] == planner._fallback(claims[0])
+    assert result["plan"]["b"] == ["q quick claim"]
+
+
+class FakeBatchDeepSeek:
+    enabled = True
+
+    def __init__(self, batch_delay=0.0):
+        self.prompts = []
+        self.batch_delay = batch_delay
+
+    async def chat(self, messages, **kwargs):
+        prompt = messages[-1].content
+        self.prompts.append(prompt)
+        if "CLAIMS:" not in prompt:
+            claim_text = prompt.split("CLAIM: ", 1)[1].split("\n", 1)[0]
+            return DeepSeekResponse(id="1", model="m", content=json.dumps({"queries": [f"single {claim_text}"]}))
+        claims = json.loads(prompt.split("CLAIMS:\n", 1)[1])
+        await asyncio.sleep(self.batch_delay)
+        # drop the last claim of every batch to exercise the per-claim fallback
+        plans = {entry["id"]: [f"batched {entry['claim']}"] for entry in claims[:-1]}
+        return DeepSeekResponse(id="1", model="m", content=json.dumps({"plans": plans}))
+
+
+@pytest.mark.asyncio
+async def test_batched_mode_chunks_claims_and_replans_missing_ones():
+    claims = [Claim(identifier=f"c{i}", text=f"claim {i}") for i in range(5)]
+    client = FakeBatchDeepSeek()
+    planner = QueryPlanner(client=client, config=PlannerConfig(mode="batched", batch_size=3))
+
+    result = await planner.run({"claims": claims})
+
+    assert list(result["plan"]) == [f"c{i}" for i in range(5)]
+    assert result["plan"]["c0"] == ["batched claim 0"]
+    assert result["plan"]["c2"] == ["single claim 2"]
+    assert result["plan"]["c4"] == ["single claim 4"]
+    assert sum("CLAIMS:" in prompt for prompt in client.prompts) == 2
+
+
+@pytest.mark.asyncio
+async def test_batched_prompt_gets_the_planning_timeout_of_each_claim():
+    claims = [Claim(identifier=f"c{i}", text=f"claim {i}") for i in range(3)]
+    # slower than one claim's timeout, within the three claims' budget
+    client = FakeBatchDeepSeek(batch_delay=0.1)
+    planner = QueryPlanner(client=client, config=PlannerConfig(mode="batched", batch_size=3, timeout_seconds=0.05))
+
+    result = await planner.run({"claims": claims})
+
+    assert result["plan"]["c0"] == ["batched claim 0"]
+    assert result["plan"]["c1"] == ["batched claim 1"]
+    assert result["plan"]["c2"] == ["single claim 2"]
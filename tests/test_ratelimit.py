@@ -0,0 +1,127 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from config.settings import DeepSeekConfig, ProviderLimitConfig, RateLimitConfig
+from services.deepseek import DeepSeekClient, DeepSeekMessage
+from services.ratelimit import AIMDLimiter, RateLimiter, TokenBucket, parse_retry_after
+
+
+def _limiter(**overrides):
+    config = RateLimitConfig(backoff_base_ms=1, **overrides)
+    return RateLimiter(config)
+
+
+@pytest.mark.asyncio
+async def test_deepseek_retries_429_honouring_retry_after_and_backs_off_concurrency():
+    responses = iter(
+        [
+            httpx.Response(429, headers={"retry-after": "0.05"}, json={"error": "slow down"}),
+            httpx.Response(503),
+            httpx.Response(200, json={"id": "1", "model": "m", "choices": [{"message": {"content": "ok"}}]}),
+        ]
+    )
+    limiter = _limiter(providers={"deepseek": ProviderLimitConfig(max_concurrency=8)})
+    client = DeepSeekClient(
+        DeepSeekConfig(api_key="test"), transport=httpx.MockTransport(lambda request: next(responses)), cache=None, limiter=limiter
+    )
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    response = await client.chat([DeepSeekMessage(role="user", content="hi")])
+    await client.aclose()
+
+    assert response.content == "ok"
+    assert loop.time() - started >= 0.05
+    assert limiter.retries == 2 and limiter.throttled == 2
+    # the two throttles inside the cooldown halve the limit once; the success adds 1/limit back
+    assert limiter.limiter("deepseek").limit == 4.25
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400, json={"error": "bad request"})
+
+    limiter = _limiter()
+    client = DeepSeekClient(DeepSeekConfig(api_key="test"), transport=httpx.MockTransport(handler), cache=None, limiter=limiter)
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.chat([DeepSeekMessage(role="user", content="hi")])
+    await client.aclose()
+    assert len(calls) == 1 and limiter.retries == 0
+
+
+@pytest.mark.asyncio
+async def test_aimd_limit_grows_additively_and_queues_excess_callers():
+    limiter = AIMDLimiter(initial=2, minimum=1, maximum=3, cooldown=0)
+    await limiter.acquire()
+    await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    limiter.release()
+    await waiter
+    assert limiter.in_flight == 2
+    for _ in range(10):
+        limiter.on_success()
+    assert limiter.limit == 3.0
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.limit == 1.0
+
+
+def test_limiter_shared_by_concurrent_event_loops_does_not_strand_waiters():
+    limiter = _limiter(providers={"search": ProviderLimitConfig(max_concurrency=1)})
+    finished, errors = [], []
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def session():
+        results = await asyncio.wait_for(asyncio.gather(*(limiter.call("search", fetch) for _ in range(4))), timeout=2)
+        finished.append(results)
+
+    def run_session():
+        try:
+            asyncio.run(session())
+        except Exception as exc:  # surfaced through the assertion below
+            errors.append(exc)
+
+    # two UI sessions, each on its own thread and event loop, share the process-wide limiter
+    threads = [threading.Thread(target=run_session) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert finished == [["ok"] * 4, ["ok"] * 4]
+    assert limiter.limiter("search").in_flight == 0
+
+
+def test_token_bucket_spaces_requests_after_the_burst_and_defers():
+    bucket = TokenBucket(rate=10, burst=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1, abs=0.01) and waits[3] == pytest.approx(0.2, abs=0.01)
+
+    deferred = TokenBucket(rate=10, burst=5)
+    deferred.defer(1.0)
+    assert deferred.reserve() == pytest.approx(1.0, abs=0.01)
+    assert deferred.reserve() == pytest.approx(1.1, abs=0.01)
+
+
+def test_parse_retry_after_accepts_seconds_and_http_dates():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None and parse_retry_after("soon") is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < parse_retry_after(later) <= 30
@@ -0,0 +1,105 @@
+import math
+
+import numpy as np
+
+from agents.rerank import HybridReranker, reciprocal_rank_fusion, tokenize
+from agents.types import Claim, Evidence
+from config.settings import RetrievalConfig
+
+
+def _evidence(url, snippet, score=None):
+    return Evidence(source="test", title=url, url=url, snippet=snippet, score=score)
+
+
+def _reference_bm25(query, documents, k1, b):
+    tokenized = [tokenize(doc) for doc in documents]
+    avg_len = sum(len(doc) for doc in tokenized) / len(tokenized)
+    scores = []
+    for doc in tokenized:
+        score = 0.0
+        for term in tokenize(query):
+            df = sum(term in other for other in tokenized)
+            tf = doc.count(term)
+            if not tf:
+                continue
+            idf = math.log1p((len(tokenized) - df + 0.5) / (df + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avg_len))
+        scores.append(score)
+    return scores
+
+
+def test_bm25_matrix_matches_reference_formula():
+    config = RetrievalConfig(bm25_k=1.5, bm25_b=0.6)
+    reranker = HybridReranker(config=config)
+    documents = [
+        "The Eiffel Tower is in Paris",
+        "Paris is the capital of France and Paris is large",
+        "Rome is the capital of Italy",
+        "",
+    ]
+    queries = ["Eiffel Tower Paris", "capital of Italy"]
+
+    matrix = reranker._bm25_scores(queries, documents)
+
+    for row, query in enumerate(queries):
+        expected = _reference_bm25(query, documents, 1.5, 0.6)
+        assert all(math.isclose(a, e, rel_tol=1e-9, abs_tol=1e-12) for a, e in zip(matrix[row], expected))
+
+
+def test_rerank_many_scores_each_claim_against_its_candidates():
+    reranker = HybridReranker(top_k=2, config=RetrievalConfig())
+    paris = Claim(identifier="paris", text="The Eiffel Tower is in Paris")
+    rome = Claim(identifier="rome", text="Rome is the capital of Italy")
+    shared = _evidence("shared", "Paris and Rome are European capitals")
+    candidates = {
+        "paris": [_evidence("noise", "Cooking pasta"), shared, _evidence("tower", "The Eiffel Tower stands in Paris")],
+        "rome": [shared, _evidence("italy", "Rome is the capital city of Italy"), _evidence("scored", "unrelated", score=0.9)],
+    }
+
+    ranked = reranker.rerank_many([paris, rome], candidates)
+
+    assert [ev.url for ev in ranked["paris"]] == ["tower", "shared"]
+    assert [ev.url for ev in ranked["rome"]][0] == "italy"
+    assert [ev.url for ev in reranker.rerank(rome, [])] == []
+
+
+class _KeywordEmbeddings:
+    """Embeds texts on two axes (weather, sport) so dense ranking is predictable."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        vectors = np.array(
+            [[text.count("rain") + text.count("storm") + 0.01, text.count("goal") + 0.01] for text in texts],
+            dtype=np.float32,
+        )
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_dense_scores_are_fused_with_bm25_in_one_encode_call():
+    embeddings = _KeywordEmbeddings()
+    reranker = HybridReranker(top_k=4, config=RetrievalConfig(dense_rerank=True, rrf_k=1), embeddings=embeddings)
+    claim = Claim(identifier="c", text="heavy rain expected tomorrow")
+    other = Claim(identifier="d", text="late goal decided the match")
+    candidates = {
+        "c": [
+            _evidence("lexical", "tomorrow expected heavy traffic"),
+            _evidence("both", "heavy rain tomorrow storm warning"),
+            _evidence("sport", "a goal was scored"),
+            _evidence("rainy", "rain storm"),
+        ],
+        "d": [_evidence("match", "the goal came late in the match")],
+    }
+
+    ranked = reranker.rerank_many([claim, other], candidates)
+
+    # BM25 alone prefers "lexical"; the dense ranking lifts "both" above it
+    assert [ev.url for ev in ranked["c"]] == ["both", "lexical", "rainy", "sport"]
+    assert len(embeddings.calls) == 1 and len(embeddings.calls[0]) == 2 + 5
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion(np.array([3.0, 2.0, 1.0]), np.array([0.1, 0.9, 0.5]), k=60)
+    assert fused.argmax() == 1
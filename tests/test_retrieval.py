@@ -0,0 +1,219 @@
+import asyncio
+import time
+
+import pytest
+
+from agents.retrieval import EvidenceRetriever
+from agents.types import Claim, Evidence
+from config.settings import CacheConfig, RateLimitConfig, RetrievalConfig
+from services.latency import LatencyTracker
+from services.ratelimit import RateLimiter, RateLimitError
+from services.search_cache import SearchCache
+
+
+UNLIMITED = RateLimiter(RateLimitConfig(enabled=False))
+
+
+def _evidence(source, url):
+    return Evidence(source=source, title=url, url=url, snippet=f"snippet {url}")
+
+
+@pytest.mark.asyncio
+async def test_retrieval_fans_out_and_merges_in_plan_order():
+    retriever = EvidenceRetriever(
+        RetrievalConfig(search_provider="duckduckgo", max_concurrency=8, provider_concurrency={"wikipedia": 8, "duckduckgo": 8}),
+        cache=None,
+        limiter=UNLIMITED,
+    )
+    in_flight = {"now": 0, "peak": 0}
+
+    async def track(delay):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(delay)
+        in_flight["now"] -= 1
+
+    async def fake_wikipedia(query, language):
+        await track(0.05 if query.endswith("1") else 0.01)
+        return [_evidence("wikipedia", f"wiki/{query}")]
+
+    async def fake_duckduckgo(query):
+        await track(0.01)
+        return [_evidence("duckduckgo", f"web/{query}")]
+
+    retriever._search_wikipedia = fake_wikipedia
+    retriever._search_duckduckgo = fake_duckduckgo
+
+    claims = [Claim(identifier="a", text="A"), Claim(identifier="b", text="B")]
+    plan = {"a": ["a-q1", "a-q2"], "b": ["b-q1"]}
+    result = await retriever.run({"claims": claims, "plan": plan})
+    await retriever.aclose()
+
+    assert [ev.url for ev in result["evidences"]["a"]] == ["wiki/a-q1", "web/a-q1", "wiki/a-q2", "web/a-q2"]
+    assert [ev.url for ev in result["evidences"]["b"]] == ["wiki/b-q1", "web/b-q1"]
+    assert in_flight["peak"] == 6
+
+
+@pytest.mark.asyncio
+async def test_provider_failure_keeps_other_provider_results():
+    retriever = EvidenceRetriever(RetrievalConfig(search_provider="duckduckgo"), cache=None, limiter=UNLIMITED)
+
+    async def fake_wikipedia(query, language):
+        return [_evidence("wikipedia", "wiki/ok")]
+
+    async def failing_duckduckgo(query):
+        raise RuntimeError("rate limited")
+
+    retriever._search_wikipedia = fake_wikipedia
+    retriever._search_duckduckgo = failing_duckduckgo
+
+    results = await retriever._retrieve_for_query(Claim(identifier="a", text="A"), "query")
+    await retriever.aclose()
+
+    assert [ev.url for ev in results] == ["wiki/ok"]
+
+
+@pytest.mark.asyncio
+async def test_search_cache_serves_stale_results_while_revalidating(tmp_path, monkeypatch):
+    cache = SearchCache(
+        CacheConfig(
+            directory=str(tmp_path),
+            search_ttl_seconds={"wikipedia": 100, "duckduckgo": 10},
+            search_stale_seconds=50,
+        )
+    )
+    retriever = EvidenceRetriever(RetrievalConfig(search_provider="duckduckgo"), cache=cache, limiter=UNLIMITED)
+    calls = {"duckduckgo": 0}
+
+    async def fake_wikipedia(query, language):
+        return [_evidence("wikipedia", "wiki/eiffel")]
+
+    async def fake_duckduckgo(query):
+        calls["duckduckgo"] += 1
+        return [_evidence("duckduckgo", f"web/{calls['duckduckgo']}")]
+
+    retriever._search_wikipedia = fake_wikipedia
+    retriever._search_duckduckgo = fake_duckduckgo
+    claim = Claim(identifier="a", text="A", language="en")
+
+    first = await retriever._retrieve_for_query(claim, "Eiffel  Tower")
+    again = await retriever._retrieve_for_query(claim, "eiffel tower")
+    assert [ev.url for ev in again] == [ev.url for ev in first] == ["wiki/eiffel", "web/1"]
+    assert calls["duckduckgo"] == 1
+
+    clock = {"now": time.time() + 30}
+    monkeypatch.setattr("services.cache.time.time", lambda: clock["now"])
+    stale = await retriever._retrieve_for_query(claim, "eiffel tower")
+    await asyncio.sleep(0)
+    await asyncio.gather(*retriever._refreshing.values())
+    refreshed = await retriever._retrieve_for_query(claim, "eiffel tower")
+    await retriever.aclose()
+
+    assert [ev.url for ev in stale] == ["wiki/eiffel", "web/1"]
+    assert [ev.url for ev in refreshed] == ["wiki/eiffel", "web/2"]
+    assert calls["duckduckgo"] == 2
+    assert cache.stats() == {"hits": 5, "stale_hits": 1, "misses": 2}
+
+
+@pytest.mark.asyncio
+async def test_backoff_sleeps_release_the_provider_slot():
+    limiter = RateLimiter(RateLimitConfig(backoff_base_ms=1))
+    retriever = EvidenceRetriever(RetrievalConfig(provider_concurrency={"bing": 1}), cache=None, limiter=limiter)
+    attempts = []
+
+    async def throttled_once():
+        attempts.append("first")
+        if len(attempts) == 1:
+            raise RateLimitError(retry_after=0.3)
+        return [_evidence("bing", "bing/retried")]
+
+    async def quick():
+        return [_evidence("bing", "bing/quick")]
+
+    retrying = asyncio.ensure_future(retriever._call_provider("bing", throttled_once))
+    await asyncio.sleep(0.05)
+    # the retrying call is sleeping off Retry-After; it must not hold bing's only slot meanwhile
+    quick_results = await asyncio.wait_for(retriever._call_provider("bing", quick), timeout=0.2)
+    retried = await retrying
+    await retriever.aclose()
+
+    assert [ev.url for ev in quick_results] == ["bing/quick"]
+    assert [ev.url for ev in retried] == ["bing/retried"]
+    # latency is sampled per completed attempt, not over the retry loop
+    assert retriever._latency.count("bing") == 2
+    assert max(retriever._latency._samples["bing"]) < 0.1
+
+
+@pytest.mark.asyncio
+async def test_race_returns_first_results_and_cancels_stragglers():
+    config = RetrievalConfig(search_strategy="race", race_providers=["wikipedia", "duckduckgo", "bing"], race_min_results=3)
+    retriever = EvidenceRetriever(config, cache=None, limiter=UNLIMITED)
+    cancelled = []
+
+    async def slow_wikipedia(query, language):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append("wikipedia")
+            raise
+        return [_evidence("wikipedia", "wiki/late")]
+
+    async def fast(source, delay):
+        await asyncio.sleep(delay)
+        return [_evidence(source, f"{source}/1"), _evidence(source, f"{source}/2")]
+
+    retriever._search_wikipedia = slow_wikipedia
+    retriever._search_duckduckgo = lambda query: fast("duckduckgo", 0.02)
+    retriever._search_bing = lambda query: fast("bing", 0.01)
+
+    started = time.perf_counter()
+    found = await retriever._retrieve_for_query(Claim(identifier="a", text="A", language="en"), "q")
+    await retriever.aclose()
+
+    assert time.perf_counter() - started < 1
+    assert [ev.url for ev in found] == ["duckduckgo/1", "duckduckgo/2", "bing/1", "bing/2"]
+    assert cancelled == ["wikipedia"]
+
+
+@pytest.mark.asyncio
+async def test_hedge_starts_backup_once_primary_is_overdue():
+    config = RetrievalConfig(
+        search_strategy="hedge", race_providers=["duckduckgo", "bing"], hedge_default_delay_ms=50, hedge_min_delay_ms=10
+    )
+    retriever = EvidenceRetriever(config, cache=None, limiter=UNLIMITED)
+    calls = []
+
+    async def duckduckgo(query):
+        calls.append(("duckduckgo", query))
+        await asyncio.sleep(5 if query == "slow" else 0.001)
+        return [_evidence("duckduckgo", f"web/{query}")]
+
+    async def bing(query):
+        calls.append(("bing", query))
+        return [_evidence("bing", f"bing/{query}")]
+
+    retriever._search_duckduckgo = duckduckgo
+    retriever._search_bing = bing
+    claim = Claim(identifier="a", text="A", language="en")
+
+    fast = await retriever._retrieve_for_query(claim, "fast")
+    started = time.perf_counter()
+    hedged = await retriever._retrieve_for_query(claim, "slow")
+    await retriever.aclose()
+
+    assert [ev.url for ev in fast] == ["web/fast"] and [ev.url for ev in hedged] == ["bing/slow"]
+    assert 0.04 < time.perf_counter() - started < 1
+    assert calls == [("duckduckgo", "fast"), ("duckduckgo", "slow"), ("bing", "slow")]
+
+
+def test_latency_tracker_reports_quantiles_over_its_window():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for value in range(5):
+        tracker.record("duckduckgo", value / 100)
+    assert tracker.quantile("duckduckgo", 0.95) is None
+
+    for value in range(200):
+        tracker.record("duckduckgo", value / 100)
+    assert tracker.count("duckduckgo") == 100
+    assert tracker.quantile("duckduckgo", 0.95) == pytest.approx(1.94)
+    assert tracker.quantile("duckduckgo", 0.5) == pytest.approx(1.49)
@@ -0,0 +1,84 @@
+import asyncio
+
+import httpx
+import pytest
+from pydantic import ValidationError
+
+from agents.types import StanceLabel, Verdict
+from config.settings import ServerConfig
+from server import create_app
+
+
+class _GatedPipeline:
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.calls = 0
+
+    async def ainvoke(self, task, feedback=None):
+        self.calls += 1
+        await self.gate.wait()
+        return {"verdict": Verdict(label=StanceLabel.REFUTES, confidence=0.8), "claims": [], "report": task.input_text}
+
+
+async def _started(pipeline, **overrides):
+    service = create_app(pipeline, ServerConfig(**{"workers": 1, "max_queue": 1, **overrides}))
+    await service.startup()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=service), base_url="http://test")
+    return service, client
+
+
+@pytest.mark.asyncio
+async def test_submit_poll_and_sync_verify():
+    pipeline = _GatedPipeline()
+    service, client = await _started(pipeline)
+    pipeline.gate.set()
+
+    submitted = await client.post("/jobs", json={"text": "The sky is green", "language": "en"})
+    assert submitted.status_code == 202
+    job_id = submitted.json()["job_id"]
+    assert submitted.headers["location"] == f"/jobs/{job_id}"
+    await asyncio.sleep(0.01)
+    status = await client.get(f"/jobs/{job_id}")
+    result = await client.get(f"/jobs/{job_id}/result")
+    verified = await client.post("/verify", json={"text": "Water is wet"})
+
+    assert status.json()["status"] == "done"
+    assert result.status_code == 200
+    assert result.json()["result"]["verdict"] == {"label": "refutes", "confidence": 0.8}
+    assert verified.status_code == 200 and verified.json()["result"]["report"] == "Water is wet"
+    assert (await client.post("/jobs", json={"language": "en"})).status_code == 400
+    assert (await client.get("/jobs/" + "0" * 32)).status_code == 404
+    await service.shutdown()
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_saturated_queue_answers_429_and_shutdown_drains():
+    pipeline = _GatedPipeline()
+    service, client = await _started(pipeline)
+
+    running = await client.post("/jobs", json={"text": "one"})
+    await asyncio.sleep(0.01)
+    queued = await client.post("/jobs", json={"text": "two"})
+    rejected = await client.post("/jobs", json={"text": "three"})
+    assert (running.status_code, queued.status_code) == (202, 202)
+    assert rejected.status_code == 429 and int(rejected.headers["retry-after"]) >= 1
+
+    draining = asyncio.create_task(service.shutdown())
+    await asyncio.sleep(0.01)
+    assert (await client.post("/jobs", json={"text": "four"})).status_code == 503
+    assert (await client.get("/health")).json()["status"] == "draining"
+    pipeline.gate.set()
+    await draining
+
+    for response in (running, queued):
+        job = await client.get(f"/jobs/{response.json()['job_id']}")
+        assert job.json()["status"] == "done"
+    assert pipeline.calls == 2
+    await client.aclose()
+
+
+def test_max_queue_must_leave_room_for_a_waiting_job():
+    # with no waiting room every submission would be answered 429
+    with pytest.raises(ValidationError):
+        ServerConfig(max_queue=0)
@@ -0,0 +1,192 @@
+import asyncio
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from agents.stance import StanceAnalyzer
+from agents.types import Claim, Evidence
+from config.settings import StanceConfig
+
+ROOT = Path(__file__).resolve().parents[1]
+WORDS = "[PAD] [UNK] [CLS] [SEP] [MASK] the eiffel tower is in paris located city capital of france a big rome italy not".split()
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("tiny-nli")
+    vocab = directory / "vocab.txt"
+    vocab.write_text("\n".join(WORDS))
+    tokenizer = transformers.BertTokenizer(str(vocab))
+    config = transformers.BertConfig(
+        vocab_size=len(WORDS),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        num_labels=3,
+        id2label={0: "entailment", 1: "neutral", 2: "contradiction"},
+        label2id={"entailment": 0, "neutral": 1, "contradiction": 2},
+    )
+    torch.manual_seed(0)
+    model = transformers.BertForSequenceClassification(config)
+    model.save_pretrained(directory / "model")
+    tokenizer.save_pretrained(directory / "model")
+    return directory
+
+
+def _claims():
+    first = Claim(identifier="c1", text="the eiffel tower is in paris")
+    second = Claim(identifier="c2", text="rome is the capital of italy")
+    first.evidences = [
+        Evidence(source="s", title="t", url=f"u{i}", snippet=text)
+        for i, text in enumerate(["paris", "the city of paris is the capital of france a big city", "rome"])
+    ]
+    second.evidences = [
+        Evidence(source="s", title="t", url=f"v{i}", snippet=text) for i, text in enumerate(["not italy", ""])
+    ]
+    return [first, second]
+
+
+@pytest.mark.asyncio
+async def test_batched_inference_matches_single_pair_inference(tiny_model):
+    model_dir = str(tiny_model / "model")
+    batched = StanceAnalyzer(model_name=model_dir, load_model=True, config=StanceConfig(batch_size=2))
+    single = StanceAnalyzer(model_name=model_dir, load_model=True, config=StanceConfig(batch_size=1))
+    claims = _claims()
+
+    result = await batched.run({"claims": claims})
+
+    for claim in claims:
+        assessments = result["stance_results"][claim.identifier]
+        assert [a.evidence.url for a in assessments] == [ev.url for ev in claim.evidences]
+        for assessment, evidence in zip(assessments, claim.evidences):
+            expected = single.analyze(claim, [evidence])[0]
+            assert assessment.label == expected.label
+            assert assessment.confidence == pytest.approx(expected.confidence, abs=1e-5)
+    # empty snippets still go through the heuristic
+    assert result["stance_results"]["c2"][1].confidence == 0.2
+
+
+def test_pairs_are_length_sorted_into_batches_and_mapped_back_in_order(tiny_model, monkeypatch):
+    analyzer = StanceAnalyzer(model_name=str(tiny_model / "model"), load_model=True, config=StanceConfig(batch_size=2))
+    batches = []
+    predict_proba = analyzer._model.predict_proba
+
+    def recording(features):
+        batches.append([len(feature["input_ids"]) for feature in features])
+        return predict_proba(features)
+
+    monkeypatch.setattr(analyzer._model, "predict_proba", recording)
+    claims = _claims() + [Claim(identifier="c3", text="")]
+    claims[2].evidences = [Evidence(source="s", title="t", url="w0", snippet="paris")]
+    pairs = [(claim, evidence) for claim in claims for evidence in claim.evidences]
+
+    predicted = analyzer._predict_batch(pairs)
+
+    # one pass over every scorable pair: shortest first, at most batch_size per forward
+    lengths = [length for batch in batches for length in batch]
+    assert len(lengths) == 4 and lengths == sorted(lengths)
+    assert all(len(batch) <= 2 for batch in batches)
+
+    results = analyzer.analyze_pairs(pairs)
+    # results line up with the input pairs, across claims
+    assert [(a.claim_id, a.evidence.url) for a in results] == [(c.identifier, e.url) for c, e in pairs]
+    # an empty snippet or claim cannot be scored and falls back to the heuristic
+    assert [index for index, assessment in enumerate(predicted) if assessment is None] == [4, 5]
+    for index in (4, 5):
+        assert results[index] == analyzer._heuristic(*pairs[index])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_claim_branches_share_one_nli_batch(tiny_model, monkeypatch):
+    analyzer = StanceAnalyzer(
+        model_name=str(tiny_model / "model"), load_model=True, config=StanceConfig(batch_size=16, batch_window_ms=50)
+    )
+    batches = []
+    predict_batch = analyzer._predict_batch
+
+    def recording(pairs):
+        batches.append({claim.identifier for claim, _ in pairs})
+        return predict_batch(pairs)
+
+    monkeypatch.setattr(analyzer, "_predict_batch", recording)
+    first, second = _claims()
+
+    # each claim branch calls run with a state holding just its claim
+    results = await asyncio.gather(analyzer.run({"claims": [first]}), analyzer.run({"claims": [second]}))
+    analyzer.close()
+
+    assert batches == [{"c1", "c2"}]
+    assert [a.evidence.url for a in results[0]["stance_results"]["c1"]] == ["u0", "u1", "u2"]
+    assert [a.evidence.url for a in results[1]["stance_results"]["c2"]] == ["v0", "v1"]
+    assert list(results[0]["stance_results"]) == ["c1"] and list(results[1]["stance_results"]) == ["c2"]
+
+
+@pytest.mark.parametrize("quantize", [False, True])
+def test_onnx_backend_agrees_with_torch(tiny_model, quantize):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    model_dir = str(tiny_model / "model")
+    reference = StanceAnalyzer(model_name=model_dir, load_model=True, config=StanceConfig())
+    onnx = StanceAnalyzer(
+        model_name=model_dir,
+        load_model=True,
+        config=StanceConfig(backend="onnx", quantize=quantize, onnx_directory=str(tiny_model / "onnx")),
+    )
+    pairs = [(claim, evidence) for claim in _claims() for evidence in claim.evidences]
+
+    expected = reference.analyze_pairs(pairs)
+    actual = onnx.analyze_pairs(pairs)
+
+    assert onnx._use_model
+    assert [a.label for a in actual] == [e.label for e in expected]
+    tolerance = 1e-2 if quantize else 1e-4
+    assert all(abs(a.confidence - e.confidence) < tolerance for a, e in zip(actual, expected))
+
+
+def test_exported_onnx_backend_serves_without_torch(tiny_model):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    model_dir, onnx_dir = str(tiny_model / "model"), str(tiny_model / "onnx-serving")
+    StanceAnalyzer(model_name=model_dir, load_model=True, config=StanceConfig(backend="onnx", onnx_directory=onnx_dir))
+
+    # a serving process without torch reuses the exported graph
+    script = f"""
+import sys
+sys.modules["torch"] = None
+from agents.stance import StanceAnalyzer
+from config.settings import StanceConfig
+analyzer = StanceAnalyzer(model_name={model_dir!r}, load_model=True, config=StanceConfig(backend="onnx", onnx_directory={onnx_dir!r}))
+print(analyzer._use_model, type(analyzer._model).__name__)
+"""
+    served = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, cwd=ROOT, timeout=120)
+
+    assert served.stdout.split() == ["True", "OnnxStanceModel"], served.stderr
+
+
+@pytest.mark.asyncio
+async def test_inference_runs_on_stance_workers(tiny_model, monkeypatch):
+    analyzer = StanceAnalyzer(
+        model_name=str(tiny_model / "model"), load_model=True, config=StanceConfig(workers=2, batch_size=2)
+    )
+    threads = []
+    original = analyzer.analyze_pairs
+
+    def recording(pairs):
+        threads.append(threading.current_thread().name)
+        return original(pairs)
+
+    monkeypatch.setattr(analyzer, "analyze_pairs", recording)
+    pairs = [(claim, evidence) for claim in _claims() for evidence in claim.evidences]
+
+    results = await analyzer.analyze_pairs_async(pairs)
+    analyzer.close()
+
+    assert [a.evidence.url for a in results] == [evidence.url for _, evidence in pairs]
+    assert len(threads) == 2 and all(name.startswith("fakescope-stance") for name in threads)
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from agents.retrieval import EvidenceRetriever
+from agents.types import Claim
+from config.settings import RetrievalConfig, StubSearchConfig
+from services.stub_search import StubSearchError, StubSearchProvider
+
+FIXTURES = "config/stub_evidence.jsonl"
+
+
+@pytest.mark.asyncio
+async def test_fixtures_are_ranked_by_overlap_and_unknown_queries_are_synthesised():
+    provider = StubSearchProvider(StubSearchConfig(fixtures_path=FIXTURES, results=2))
+
+    hits = await provider.search("stub", "Eiffel Tower Paris France")
+    synthetic = await provider.search("stub", "zzqx")
+    again = await StubSearchProvider(StubSearchConfig(fixtures_path=FIXTURES, results=2)).search("stub", "zzqx")
+
+    assert [hit.title for hit in hits] == ["Eiffel Tower", "Paris"]
+    assert hits[0].score == pytest.approx(1.0)
+    assert len(synthetic) == 2 and all(ev.metadata["stub"] for ev in synthetic)
+    assert [ev.url for ev in synthetic] == [ev.url for ev in again]
+
+
+@pytest.mark.asyncio
+async def test_latency_and_failures_are_seeded():
+    config = StubSearchConfig(fixtures_path=None, latency="uniform", latency_ms=20, latency_jitter_ms=5, failure_rate=0.5, seed=3)
+
+    async def outcomes(provider):
+        results = []
+        for query in ["a", "b", "c", "d", "e", "f", "a", "a"]:
+            try:
+                await provider.search("stub", query)
+                results.append(True)
+            except StubSearchError:
+                results.append(False)
+        return results
+
+    started = time.perf_counter()
+    first = await outcomes(StubSearchProvider(config))
+    elapsed = time.perf_counter() - started
+
+    assert first == await outcomes(StubSearchProvider(config))
+    assert True in first and False in first
+    assert elapsed >= 8 * 0.015
+    always = StubSearchProvider(StubSearchConfig(fixtures_path=None, failure_rate=1.0))
+    with pytest.raises(StubSearchError):
+        await always.search("stub", "anything")
+
+
+@pytest.mark.asyncio
+async def test_retriever_runs_offline_on_the_stub():
+    config = RetrievalConfig(search_provider="stub", stub=StubSearchConfig(fixtures_path=FIXTURES, results=2), wikipedia_results=1)
+    retriever = EvidenceRetriever(config, index=None)
+    claims = [Claim(identifier="c1", text="The Eiffel Tower is in Paris", language="en")]
+
+    result = await retriever.run({"claims": claims, "plan": {"c1": ["Eiffel Tower Paris"]}})
+    await retriever.aclose()
+
+    assert retriever._cache is None
+    assert [ev.url for ev in result["evidences"]["c1"]] == [
+        "https://en.wikipedia.org/wiki/Eiffel_Tower",
+        "https://en.wikipedia.org/wiki/Paris",
+    ]
@@ -0,0 +1,57 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from services.wikipedia import WikipediaClient
+
+
+class _StubMediaWiki(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        self.requests.append((parsed.path, params))
+        pages = [
+            {"pageid": 2, "index": 2, "title": "Paris", "fullurl": "https://es.wikipedia.org/wiki/Paris", "extract": "Paris es la capital."},
+            {"pageid": 1, "index": 1, "title": "Torre Eiffel", "fullurl": "https://es.wikipedia.org/wiki/Torre_Eiffel", "extract": "La torre Eiffel."},
+            {"pageid": 3, "index": 3, "title": "Vacia", "fullurl": "https://es.wikipedia.org/wiki/Vacia", "extract": ""},
+        ]
+        body = json.dumps({"query": {"pages": pages}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubMediaWiki)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _StubMediaWiki.requests = []
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_search_uses_language_endpoint_and_single_batched_request(stub_server):
+    client = WikipediaClient(api_url=stub_server + "/{language}/api.php")
+
+    evidences = await client.search("torre eiffel", "es", limit=3)
+    await client.aclose()
+
+    assert [ev.title for ev in evidences] == ["Torre Eiffel", "Paris"]
+    assert evidences[0].url == "https://es.wikipedia.org/wiki/Torre_Eiffel"
+    assert len(_StubMediaWiki.requests) == 1
+    path, params = _StubMediaWiki.requests[0]
+    assert path == "/es/api.php"
+    assert params["generator"] == "search" and params["gsrsearch"] == "torre eiffel"
+    assert params["prop"] == "extracts|info"
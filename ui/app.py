@@ -10,7 +10,7 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
 from agents.pipeline import FakeScopePipeline
-from agents.types import VerificationTask
+from agents.types import PipelineEvent, PipelineEventKind, VerificationTask
 
 st.set_page_config(page_title="FakeScope", layout="wide")
 
@@ -31,6 +31,13 @@ LANG_STRINGS = {
         "submit": "Verify",
         "warning": "Provide a URL or text to verify.",
         "processing": "Processing...",
+        "progress_claims": "Extracted {count} claims",
+        "progress_plan": "Planned {count} search queries",
+        "progress_evidence": "**{claim}**: {count} evidence items retrieved",
+        "progress_stance": "**{claim}**: stance {label} ({confidence:.2f})",
+        "progress_verdict": "Verdict: **{label}** ({confidence:.2f})",
+        "progress_report": "Report written",
+        "progress_done": "Finished in {seconds:.1f}s",
         "process": "Agent process",
         "planner": "Search plan per claim",
         "no_plan": "No plan recorded.",
@@ -61,6 +68,13 @@ LANG_STRINGS = {
         "submit": "Verificar",
         "warning": "Proporciona una URL o un texto para verificar.",
         "processing": "Procesando...",
+        "progress_claims": "{count} afirmaciones extraídas",
+        "progress_plan": "{count} consultas de búsqueda planificadas",
+        "progress_evidence": "**{claim}**: {count} evidencias recuperadas",
+        "progress_stance": "**{claim}**: postura {label} ({confidence:.2f})",
+        "progress_verdict": "Veredicto: **{label}** ({confidence:.2f})",
+        "progress_report": "Reporte redactado",
+        "progress_done": "Terminado en {seconds:.1f}s",
         "process": "Proceso del agente",
         "planner": "Plan de búsqueda por claim",
         "no_plan": "Sin plan registrado.",
@@ -84,6 +98,24 @@ DEFAULT_LANGUAGE = "en"
 def get_strings(lang: str) -> dict[str, str]:
     return LANG_STRINGS.get(lang, LANG_STRINGS[DEFAULT_LANGUAGE])
 
+
+def describe_event(event: PipelineEvent, strings: dict) -> str | None:
+    if event.kind is PipelineEventKind.CLAIMS:
+        return strings["progress_claims"].format(count=len(event.data))
+    if event.kind is PipelineEventKind.PLAN:
+        return strings["progress_plan"].format(count=sum(len(queries) for queries in event.data.values()))
+    if event.kind is PipelineEventKind.EVIDENCE:
+        return strings["progress_evidence"].format(claim=event.claim_id, count=len(event.data))
+    if event.kind is PipelineEventKind.STANCE and event.data:
+        best = max(event.data, key=lambda item: item.confidence)
+        return strings["progress_stance"].format(claim=event.claim_id, label=best.label.value, confidence=best.confidence)
+    if event.kind is PipelineEventKind.VERDICT:
+        return strings["progress_verdict"].format(label=event.data.label.value.upper(), confidence=event.data.confidence)
+    if event.kind is PipelineEventKind.REPORT:
+        return strings["progress_report"]
+    return None
+
+
 pipeline = FakeScopePipeline()
 
 language = st.selectbox(
@@ -121,9 +153,20 @@ if submitted:
     if not url and not text:
         st.warning(strings["warning"])
     else:
-        with st.spinner(strings["processing"]):
+        result = {}
+        with st.status(strings["processing"], expanded=True) as status:
             task = VerificationTask(input_text=text or None, url=url or None, language=language)
-            result = pipeline.invoke(task)
+            draft, report_view = "", st.empty()
+            for event in pipeline.stream(task):
+                if event.kind is PipelineEventKind.DONE:
+                    result = event.data
+                    status.update(label=strings["progress_done"].format(seconds=event.elapsed), state="complete", expanded=False)
+                elif event.kind is PipelineEventKind.REPORT_DELTA:
+                    draft += event.data
+                    report_view.markdown(draft)
+                elif message := describe_event(event, strings):
+                    status.write(message)
+            report_view.empty()
         st.session_state["result"] = result
         st.session_state["result_language"] = result.get("language", language)
 